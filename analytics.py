@@ -0,0 +1,278 @@
+import inspect
+
+import numpy as np
+import pandas as pd
+
+
+##________________________________________________________________________
+# In-process analytics engine: the ten menu queries answered from the cleaned
+# dataset held in memory as columns, without a round trip to the database
+
+ENERGY_ORDER = ['High Energy', 'Medium Energy', 'Low Energy']   # FIELD() order of query 8
+COVER_MISSING = ['', 'Not Found']
+
+def count_column(series):
+    """
+    Vectorized parse_count(): counts written as "1,021" (or "826.0") become int64.
+    """
+    return pd.to_numeric(series.astype(str).str.replace(',', '', regex=False)).astype('int64').to_numpy()
+
+
+def round_half_up(values, decimals=2):
+    """
+    ROUND() as the SQL engines do it (halves away from zero), not numpy's round-half-to-even.
+    """
+    scale = 10 ** decimals
+    values = np.asarray(values, dtype='float64')
+    return np.sign(values) * np.floor(np.abs(values) * scale + 0.5) / scale
+
+
+def energy_category(energy, low=30, high=70):
+    """
+    The Energy_Category buckets of queries 7 and 8 over an array of Energy values.
+    """
+    return np.select([energy < low, energy <= high], ['Low Energy', 'Medium Energy'], 'High Energy')
+
+
+def platform_presence(spotify, deezer, apple):
+    """
+    The Platform_Presence CASE of query 8 over arrays of chart positions.
+    """
+    single = (
+        ((spotify == 0) & (deezer == 0) & (apple > 0)) |
+        ((spotify == 0) & (deezer > 0) & (apple == 0)) |
+        ((spotify > 0) & (deezer == 0) & (apple == 0))
+    )
+    multi = ((spotify > 0) & (deezer > 0)) | ((spotify > 0) & (apple > 0)) | ((deezer > 0) & (apple > 0))
+    return np.select([single, multi], ['Single-Platform Presence', 'Multi-Platform Presence'], 'Other')
+
+
+def dominant_platform(spotify, apple, deezer):
+    """
+    The Dominant_Platform CASE of query 10 over arrays of playlist counts.
+    """
+    return np.select(
+        [(spotify > apple) & (spotify > deezer), (apple > spotify) & (apple > deezer), (deezer > spotify) & (deezer > apple)],
+        ['Spotify', 'Apple Music', 'Deezer'], 'Tied'
+    )
+
+
+class AnalyticsEngine:
+    """
+    Columnar copy of the loaded tables plus an artist -> track index.
+    Track positions play the role of Track_ID: row i of the cleaned CSV is the i-th track loaded.
+    run(query_id) returns the same [(columns, rows)] shape as fetch_query().
+    energy_low / energy_high must match the thresholds the database was loaded with.
+    year_from / year_to keep only the tracks released in that window, like YEAR_FROM / YEAR_TO.
+    """
+
+    def __init__(self, df, energy_low=30, energy_high=70, year_from=None, year_to=None):
+        if year_from is not None or year_to is not None:
+            years = count_column(df['released_year'])
+            df = df[(years >= (year_from if year_from is not None else years.min())) &
+                    (years <= (year_to if year_to is not None else years.max()))]
+        df = df.reset_index(drop=True)
+        self.energy_low = energy_low
+        self.energy_high = energy_high
+        self.size = len(df)
+        self.track_name = df['track_name'].astype(str).to_numpy(dtype=object)
+        # Group-bys on names run over these integer codes instead of the strings
+        self.name_code, self.names = pd.factorize(self.track_name)
+        self.cover_url = df['cover_url'].fillna('').astype(str).to_numpy(dtype=object)
+        self.streams = count_column(df['streams'])
+        self.spotify_playlists = count_column(df['in_spotify_playlists'])
+        self.apple_playlists = count_column(df['in_apple_playlists'])
+        self.deezer_playlists = count_column(df['in_deezer_playlists'])
+        self.spotify_charts = count_column(df['in_spotify_charts'])
+        self.apple_charts = count_column(df['in_apple_charts'])
+        self.deezer_charts = count_column(df['in_deezer_charts'])
+        self.shazam_charts = count_column(df['in_shazam_charts'])
+        self.released_year = count_column(df['released_year'])
+        self.released_month = count_column(df['released_month'])
+        self.bpm = count_column(df['bpm'])
+        self.danceability = count_column(df['danceability_%'])
+        self.energy = count_column(df['energy_%'])
+        self.liveness = count_column(df['liveness_%'])
+        self.build_artist_index(df['artist(s)_name'])
+
+    @classmethod
+    def from_csv(cls, csv_file, **settings):
+        # Read every field as written, like the csv.DictReader the loaders use
+        return cls(pd.read_csv(csv_file, keep_default_na=False), **settings)
+
+    def build_artist_index(self, artists):
+        """
+        Splits the artist lists the way split_row() does and keeps the (track, artist) pairs
+        of Released_By twice in CSR form: grouped by artist, and grouped by track.
+        Artist codes follow the sorted artist names, so sorting by code sorts by name.
+        """
+        exploded = artists.astype(str).str.split(',').explode().str.strip()
+        pairs = pd.DataFrame({'track': exploded.index.to_numpy(dtype='int64'), 'artist': exploded.to_numpy()})
+        pairs = pairs.drop_duplicates()
+        codes, self.artist_names = pd.factorize(pairs['artist'], sort=True)
+        tracks = pairs['track'].to_numpy()
+
+        by_artist = np.lexsort((tracks, codes))
+        self.artist_tracks = tracks[by_artist]
+        self.artist_offsets = np.searchsorted(codes[by_artist], np.arange(len(self.artist_names) + 1))
+
+        by_track = np.lexsort((codes, tracks))
+        self.track_artists = codes[by_track]
+        self.track_offsets = np.searchsorted(tracks[by_track], np.arange(self.size + 1))
+        # Inner joins on Released_By drop tracks without artists
+        self.has_artist = np.diff(self.track_offsets) > 0
+
+    def tracks_of(self, artist_name):
+        """
+        Track positions released by one artist.
+        """
+        code = self.artist_names.get_indexer([artist_name])[0]
+        if code < 0:
+            return np.empty(0, dtype='int64')
+        return self.artist_tracks[self.artist_offsets[code]:self.artist_offsets[code + 1]]
+
+    def group_artists(self, tracks, groups):
+        """
+        GROUP_CONCAT(DISTINCT Artist_Name) for each group: `tracks` and `groups` pair every
+        track position with the id of the group it falls in. Returns a Series indexed by group.
+        """
+        lengths = self.track_offsets[tracks + 1] - self.track_offsets[tracks]
+        starts = np.repeat(self.track_offsets[tracks], lengths)
+        steps = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        pairs = pd.DataFrame({
+            'group': np.repeat(groups, lengths),
+            'artist': self.track_artists[starts + steps],
+        }).drop_duplicates().sort_values(['group', 'artist'])
+        names = self.artist_names.to_numpy()[pairs['artist'].to_numpy()]
+        return pd.Series(names, index=pairs['group'].to_numpy()).groupby(level=0).agg(','.join)
+
+    def artists_for(self, members, top):
+        """
+        Artists of the groups in `top` (indexed by group id); `members` maps tracks to group ids.
+        """
+        members = members[members['group'].isin(top.index)]
+        return self.group_artists(members['track'].to_numpy(), members['group'].to_numpy())
+
+    def grouped_with_artists(self, keys, values, aggregate, order, limit):
+        """
+        Shared shape of queries 2, 3, 4 and 10: join Released_By, group tracks by `keys`, aggregate
+        them with aggregate(frame), keep the top `limit` groups by `order` and GROUP_CONCAT their artists.
+        The "track_name" key is passed as name codes and turned back into names for the top groups.
+        """
+        mask = self.has_artist
+        frame = pd.DataFrame({**{k: v[mask] for k, v in keys.items()}, **{k: v[mask] for k, v in values.items()}})
+        frame['track'] = np.flatnonzero(mask)
+        frame['group'] = frame.groupby(list(keys), sort=False).ngroup()
+        top = aggregate(frame).nlargest(limit, order)
+        artists = self.artists_for(frame[['track', 'group']], top)
+        return top.assign(track_name=self.names[top['track_name'].to_numpy()],
+                          artist_name=artists.reindex(top.index).to_numpy())
+
+    def query_1(self):
+        frame = pd.DataFrame({'year': self.released_year, 'bpm': self.bpm, 'dance': self.danceability})
+        result = frame.groupby('year').agg(avg_bpm=('bpm', 'mean'), avg_danceability=('dance', 'mean'),
+                                           total_songs=('bpm', 'size'))
+        return ["Released_Year", "avg_bpm", "avg_danceability", "total_songs"], list(result.itertuples(name=None))
+
+    def query_2(self, top_n=10):
+        top = self.grouped_with_artists(
+            {'track_name': self.name_code, 'shazam': self.shazam_charts}, {'streams': self.streams},
+            lambda f: f.groupby('group').agg(track_name=('track_name', 'first'), shazam=('shazam', 'first'), streams=('streams', 'max')),
+            'shazam', top_n
+        )
+        rows = list(top[['track_name', 'artist_name', 'shazam', 'streams']].itertuples(index=False, name=None))
+        return ["track_name", "artist_name", "in_shazam_charts", "streams"], rows
+
+    def query_3(self, top_n=10):
+        total = self.spotify_playlists + self.apple_playlists + self.deezer_playlists
+        # SUM(DISTINCT ...): equal totals inside one name are only counted once
+        top = self.grouped_with_artists(
+            {'track_name': self.name_code}, {'total': total},
+            lambda f: f.drop_duplicates(['group', 'total']).groupby('group').agg(
+                track_name=('track_name', 'first'), total=('total', 'sum')),
+            'total', top_n
+        )
+        rows = list(top[['track_name', 'artist_name', 'total']].itertuples(index=False, name=None))
+        return ["track_name", "artist_name", "total_playlist_presence"], rows
+
+    def query_4(self, top_n=10):
+        top = self.grouped_with_artists(
+            {'track_name': self.name_code, 'bpm': self.bpm, 'streams': self.streams}, {},
+            lambda f: f.groupby('group').agg(track_name=('track_name', 'first'), bpm=('bpm', 'first'), streams=('streams', 'first')),
+            'streams', top_n
+        )
+        rows = list(top[['track_name', 'artist_name', 'streams', 'bpm']].itertuples(index=False, name=None))
+        return ["track_name", "artist_name", "streams", "bpm"], rows
+
+    def query_5(self, liveliness=70):
+        lively = self.liveness > liveliness
+        total = int(lively.sum())
+        with_cover = int((lively & ~np.isin(self.cover_url, COVER_MISSING)).sum())
+        # SUM() over no rows and the division by zero are both NULL in SQL
+        percentage = float(round_half_up(with_cover * 100.0 / total)) if total else None
+        row = (total, with_cover if total else None, percentage)
+        return ["total_high_liveness_songs", "songs_with_cover_url", "percentage_with_cover_url"], [row]
+
+    def query_6(self, top_n=5):
+        in_playlists = self.spotify_playlists > 0
+        # Walks the artist -> track index: one segment per artist
+        counts = np.add.reduceat(in_playlists[self.artist_tracks].astype('int64'), self.artist_offsets[:-1]) \
+            if len(self.artist_tracks) else np.empty(0, dtype='int64')
+        frame = pd.DataFrame({'artist': self.artist_names, 'tracks': counts})
+        top = frame[frame['tracks'] > 0].nlargest(top_n, 'tracks')
+        return ["Artist_Name", "tracks_in_playlists"], list(top.itertuples(index=False, name=None))
+
+    def query_7(self):
+        if not self.size:
+            return ["Energy_Category", "avg_high_streams"], []
+        high = self.streams > self.streams.mean()
+        frame = pd.DataFrame({'category': energy_category(self.energy[high], self.energy_low, self.energy_high), 'streams': self.streams[high]})
+        result = frame.groupby('category')['streams'].mean()
+        return ["Energy_Category", "avg_high_streams"], list(result.items())
+
+    def query_8(self):
+        mask = self.has_artist
+        frame = pd.DataFrame({
+            'category': energy_category(self.energy[mask], self.energy_low, self.energy_high),
+            'presence': platform_presence(self.spotify_charts[mask], self.deezer_charts[mask], self.apple_charts[mask]),
+            'streams': self.streams[mask],
+        })
+        frame = frame[frame['presence'] != 'Other']
+        result = frame.groupby(['category', 'presence'])['streams'].agg(['mean', 'size']).reset_index()
+        result['rank'] = result['category'].map({name: i for i, name in enumerate(ENERGY_ORDER)})
+        result = result.sort_values(['rank', 'presence'])
+        rows = [(category, presence, float(round_half_up(mean)), int(size))
+                for category, presence, mean, size in result[['category', 'presence', 'mean', 'size']].itertuples(index=False)]
+        return ["Energy_Category", "Platform_Presence", "avg_streams", "unique_tracks"], rows
+
+    def query_9(self, top_n=12):
+        frame = pd.DataFrame({'month': self.released_month, 'streams': self.streams})
+        result = frame.groupby('month')['streams'].agg(['size', 'mean'])
+        result['mean'] = round_half_up(result['mean'])
+        result = result.nlargest(top_n, 'mean')
+        return ["release_month", "track_count", "avg_streams"], list(result.itertuples(name=None))
+
+    def query_10(self, top_n=20):
+        dominant = dominant_platform(self.spotify_playlists, self.apple_playlists, self.deezer_playlists)
+        top = self.grouped_with_artists(
+            {'track_name': self.name_code, 'dominant': dominant}, {'streams': self.streams},
+            lambda f: f.groupby('group').agg(track_name=('track_name', 'first'), dominant=('dominant', 'first'), streams=('streams', 'max')),
+            'streams', top_n
+        )
+        rows = list(top[['track_name', 'artist_name', 'streams', 'dominant']].itertuples(index=False, name=None))
+        return ["Track_Name", "Artists", "Streams", "Dominant_Platform"], rows
+
+    def run(self, query_id, top_n=None, liveliness=None):
+        """
+        Answers one menu query; returns [(columns, rows)] like fetch_query(). top_n and
+        liveliness replace the query's own LIMIT and threshold where it has them.
+        """
+        method = getattr(self, f"query_{query_id}", None)
+        if method is None:
+            raise KeyError(f"No analytics implementation for query {query_id}")
+        accepted = inspect.signature(method).parameters
+        settings = {name: value for name, value in (("top_n", top_n), ("liveliness", liveliness))
+                    if value is not None and name in accepted}
+        columns, rows = method(**settings)
+        return [(columns, [tuple(value.item() if isinstance(value, np.generic) else value for value in row)
+                           for row in rows])]
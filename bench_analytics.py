@@ -0,0 +1,84 @@
+import argparse
+import time
+
+import numpy as np
+from tabulate import tabulate
+
+import bench_queries
+import project_final as pf
+from analytics import AnalyticsEngine
+
+
+##________________________________________________________________________
+# Timings of the in-process analytics engine against the SQL menu queries
+# (tests/test_analytics.py checks that both return the same rows)
+
+def time_sql(user, passwd, query, params, repeats):
+    """
+    Runs one query `repeats` times after a warm-up run; returns its rows and the median seconds.
+    """
+    connection = pf.get_connection(user, passwd)
+    try:
+        cursor = connection.cursor()
+        latencies = []
+        for run in range(repeats + 1):
+            start = time.perf_counter()
+            cursor.execute(query.strip().rstrip(";"), params)
+            rows = cursor.fetchall()
+            if run:
+                latencies.append(time.perf_counter() - start)
+        cursor.close()
+    finally:
+        connection.close()
+    return rows, float(np.median(latencies))
+
+
+def time_engine(engine, query_id, repeats):
+    latencies = []
+    for run in range(repeats + 1):
+        start = time.perf_counter()
+        [(_, rows)] = engine.run(query_id, top_n=pf.TOP_N, liveliness=pf.LIVELINESS_THRESHOLD)
+        if run:
+            latencies.append(time.perf_counter() - start)
+    return rows, float(np.median(latencies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the analytics engine against the SQL menu queries.")
+    parser.add_argument("--csv", default="Spotify.csv", help="cleaned CSV loaded into both engines")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per query")
+    parser.add_argument("--backend", default=pf.BACKEND, choices=["mysql", *pf.EMBEDDED_BACKENDS])
+    parser.add_argument("--user", default=pf.user)
+    parser.add_argument("--password", default=pf.password)
+    parser.add_argument("--database", default="Spotify_bench", help="scratch database, dropped before loading")
+    parser.add_argument("--year-from", type=int, help="only use tracks released in or after this year")
+    parser.add_argument("--year-to", type=int, help="only use tracks released in or before this year")
+    parser.add_argument("--top", type=int, help="rows of the top-N queries (default: each query's own)")
+    parser.add_argument("--liveliness", type=int, default=pf.LIVELINESS_THRESHOLD, help="query 5 threshold")
+    args = parser.parse_args()
+
+    pf.BACKEND = args.backend
+    pf.DB_NAME = args.database
+    pf.YEAR_FROM, pf.YEAR_TO = args.year_from, args.year_to
+    pf.TOP_N, pf.LIVELINESS_THRESHOLD = args.top, args.liveliness
+    bench_queries.reset_database(args.user, args.password)
+    if pf.bulk_dataload(args.user, args.password, args.csv, batch_size=pf.BATCH_SIZE) is None:
+        raise RuntimeError(f"Loading {args.csv} failed")
+
+    start = time.perf_counter()
+    engine = AnalyticsEngine.from_csv(args.csv, year_from=args.year_from, year_to=args.year_to)
+    build_time = time.perf_counter() - start
+    print(f"Analytics engine built over {engine.size:,} tracks in {build_time:.3f}s")
+
+    table = []
+    for query_id, entry in pf.QUERIES.items():
+        query, params = pf.query_statement(entry["query"], entry)
+        _, sql_time = time_sql(args.user, args.password, query, params, args.repeats)
+        _, engine_time = time_engine(engine, query_id, args.repeats)
+        table.append([query_id, round(sql_time * 1000, 3), round(engine_time * 1000, 3),
+                      round(sql_time / engine_time, 1) if engine_time else None])
+
+    print(tabulate(table, headers=["Query", "SQL ms", "Engine ms", "Speedup"], tablefmt="fancy_grid"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import argparse
+import csv
+import json
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from tabulate import tabulate
+
+import generate_spotify
+import project_final as pf
+
+
+##________________________________________________________________________
+# Benchmark of the menu queries at several dataset scale factors
+
+def scaled_rows(csv_file, scale):
+    """
+    Yields the cleaned CSV rows `scale` times; copies get a numbered track name so they stay distinct tracks.
+    """
+    with open(csv_file, mode='r', encoding='utf-8') as file:
+        base_rows = list(csv.DictReader(file))
+    for copy in range(scale):
+        for row in base_rows:
+            if copy:
+                row = dict(row, track_name=f"{row['track_name']} ({copy})")
+            yield row
+
+
+def reset_database(user, passwd):
+    """
+    Drops and recreates the benchmark database with the full schema.
+    """
+    if pf.BACKEND != "mysql":
+        pf.EMBEDDED_BACKENDS[pf.BACKEND].drop_database()
+    else:
+        connection = pf.get_connection(user, passwd, use_database=False)
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"DROP DATABASE IF EXISTS {pf.DB_NAME}")
+            cursor.close()
+        finally:
+            connection.close()
+        # Pooled connections still point at the dropped database
+        pf.reset_pool(user, pf.DB_NAME)
+    pf.createdb(user, passwd)
+    pf.creattables(user, passwd)
+
+
+def measure_query(user, passwd, query, repeats, params=()):
+    """
+    Runs one query with its bound parameters `repeats` times (after a warm-up run) on a single connection and returns
+    its latencies, result size, handler reads of the last run and the EXPLAIN row estimate.
+    Handler reads and row estimates are MySQL statistics and stay None on the embedded backends.
+    """
+    sql = query.strip().rstrip(";")
+    on_mysql = pf.BACKEND == "mysql"
+    explain_rows = handler_reads = None
+    connection = pf.get_connection(user, passwd)
+    try:
+        cursor = connection.cursor(dictionary=True)
+        if on_mysql:
+            cursor.execute("EXPLAIN " + sql, params)
+            explain_rows = sum(int(step["rows"] or 0) for step in cursor.fetchall())
+
+        latencies = []
+        for run in range(repeats + 1):
+            if on_mysql:
+                cursor.execute("FLUSH STATUS")
+            start = time.perf_counter()
+            cursor.execute(sql, params)
+            result_rows = len(cursor.fetchall())
+            elapsed = time.perf_counter() - start
+            if run:
+                latencies.append(elapsed)
+
+        if on_mysql:
+            cursor.execute("SHOW SESSION STATUS LIKE 'Handler_read%'")
+            handler_reads = sum(int(status["Value"]) for status in cursor.fetchall())
+        cursor.close()
+    finally:
+        connection.close()
+
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 3),
+        "result_rows": result_rows,
+        "handler_reads": handler_reads,
+        "explain_rows": explain_rows,
+    }
+
+
+def run_scale(user, passwd, load, scale, repeats):
+    """
+    Loads one scale factor into a fresh database with load(scale) and measures every menu query on it,
+    as the menu runs it (from the summary tables where USE_SUMMARY_TABLES allows).
+    """
+    reset_database(user, passwd)
+    loaded = load(scale)
+    if loaded is None:
+        raise RuntimeError(f"Loading scale factor {scale} failed")
+    loaded_rows, load_seconds = loaded
+
+    queries = []
+    for query_id, entry in pf.QUERIES.items():
+        query, params = pf.menu_query(entry)
+        stats = measure_query(user, passwd, query, repeats, params)
+        queries.append({"id": query_id, "description": entry["description"].strip(), **stats})
+    return {
+        "scale": scale,
+        "rows": loaded_rows,
+        "load_seconds": round(load_seconds, 3),
+        "load_rows_per_sec": round(loaded_rows / load_seconds, 1) if load_seconds else None,
+        "queries": queries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the menu queries at several dataset scale factors.")
+    parser.add_argument("--csv", default="Spotify.csv", help="cleaned CSV used as the base dataset")
+    parser.add_argument("--scales", default="1,10,100", help="comma-separated scale factors")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per query")
+    parser.add_argument("--batch-size", type=int, default=pf.BATCH_SIZE, help="rows per load batch")
+    parser.add_argument("--backend", default=pf.BACKEND, choices=["mysql", *pf.EMBEDDED_BACKENDS])
+    parser.add_argument("--user", default=pf.user)
+    parser.add_argument("--password", default=pf.password)
+    parser.add_argument("--database", default="Spotify_bench", help="scratch database, dropped for every scale")
+    parser.add_argument("--output", default="bench_queries.json", help="machine-readable results file")
+    parser.add_argument("--synthetic", type=int, default=0, metavar="ROWS",
+                        help="load ROWS x scale generated rows (generate_spotify.py) instead of copies of --csv")
+    parser.add_argument("--seed", type=int, default=42, help="seed for --synthetic")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        def load(scale):
+            chunks = generate_spotify.generate_chunks(args.synthetic * scale, seed=args.seed)
+            return pf.stream_dataload(args.user, args.password, chunks, batch_size=args.batch_size)
+    else:
+        def load(scale):
+            return pf.bulk_load_rows(args.user, args.password, scaled_rows(args.csv, scale), batch_size=args.batch_size)
+
+    pf.BACKEND = args.backend
+    pf.DB_NAME = args.database
+    scales = [int(scale) for scale in args.scales.split(",")]
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "backend": args.backend,
+        "database": args.database,
+        "dataset": f"synthetic x{args.synthetic} (seed {args.seed})" if args.synthetic else args.csv,
+        "repeats": args.repeats,
+        "results": [],
+    }
+    for scale in scales:
+        print(f"Scale factor {scale}...")
+        result = run_scale(args.user, args.password, load, scale, args.repeats)
+        report["results"].append(result)
+        print(tabulate(
+            [[q["id"], q["p50_ms"], q["p95_ms"], q["result_rows"], q["handler_reads"], q["explain_rows"]]
+             for q in result["queries"]],
+            headers=["Query", "p50 ms", "p95 ms", "Result rows", "Handler reads", "EXPLAIN rows"],
+            tablefmt="fancy_grid"
+        ))
+        print(f"Loaded {result['rows']} rows at {result['load_rows_per_sec']} rows/sec")
+
+    with open(args.output, mode='w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+
+##________________________________________________________________________
+# Synthetic Spotify dataset shaped like Spotify.csv, for load and query tests at scale
+
+COLUMNS = [
+    'track_name', 'artist(s)_name', 'artist_count', 'released_year', 'released_month', 'released_day',
+    'in_spotify_playlists', 'in_spotify_charts', 'streams', 'in_apple_playlists', 'in_apple_charts',
+    'in_deezer_playlists', 'in_deezer_charts', 'in_shazam_charts', 'bpm', 'key', 'mode',
+    'danceability_%', 'valence_%', 'energy_%', 'acousticness_%', 'instrumentalness_%',
+    'liveness_%', 'speechiness_%', 'cover_url'
+]
+
+SHARD_ROWS = 250_000      # fixed shard size, so the output does not depend on the number of processes
+MAX_ARTISTS_PER_TRACK = 5
+ARTIST_COUNT_WEIGHTS = [0.62, 0.27, 0.09, 0.016, 0.004]   # as in Spotify.csv
+KEYS = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+SYLLABLES = [
+    'ka', 'lo', 'mi', 'ra', 'ne', 'to', 'su', 'vi', 'da', 'ze', 'po', 'li', 'ma', 'ro', 'ti',
+    'be', 'no', 'sa', 'ju', 'fe', 'ha', 'yo', 'ki', 'ba', 'le', 'mo', 'ri', 'ta', 'go', 'ny'
+]
+ARTIST_PREFIXES = ['', '', '', '', 'Lil ', 'DJ ', 'The ', 'MC ', 'Young ', 'Big ']
+WORDS = [
+    'Love', 'Night', 'Summer', 'Dance', 'Heart', 'Fire', 'Dreams', 'Gold', 'Rain', 'Midnight',
+    'Baby', 'Stars', 'Blue', 'Wild', 'Forever', 'Money', 'Ghost', 'City', 'Lights', 'Moon',
+    'Sunflower', 'Paradise', 'Shape', 'Bad', 'Habits', 'Flowers', 'Calm', 'Down', 'Kill', 'Bill',
+    'Cruel', 'Levitating', 'Tattoo', 'Ella', 'Quiero', 'Corazon', 'Vida', 'Noche', 'Amor', 'Loco'
+]
+# Title words: the real ones above plus made-up two and three syllable words, so titles rarely collide
+VOCABULARY = np.array(
+    WORDS
+    + [(a + b).capitalize() for a in SYLLABLES for b in SYLLABLES]
+    + [(a + b + c).capitalize() for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES],
+    dtype=object
+)
+TITLE_LENGTH_WEIGHTS = [0.1, 0.5, 0.4]     # one, two or three words
+# Characters that step 1.3 replaces, sprinkled into some names like in the real export
+ACCENTS = {'e': 'é', 'a': 'á', 'o': 'ö', 'n': 'ñ', 'u': 'ü'}
+
+
+def spawn_rng(seed, *key):
+    return np.random.default_rng(np.random.SeedSequence([seed, *key]))
+
+
+def make_artist_pool(artists, seed):
+    """
+    Builds `artists` distinct artist names (the index written in syllables keeps them unique)
+    and Zipf-like popularity weights, so a few prolific artists dominate as in the real charts.
+    """
+    rng = spawn_rng(seed, 0)
+    base = len(SYLLABLES)
+    names = []
+    for index in range(artists):
+        digits = []
+        value = index
+        while True:
+            value, digit = divmod(value, base)
+            digits.append(SYLLABLES[digit])
+            if value == 0:
+                break
+        first = SYLLABLES[rng.integers(base)] + SYLLABLES[rng.integers(base)]
+        name = ARTIST_PREFIXES[rng.integers(len(ARTIST_PREFIXES))] + first.capitalize() + ' ' + ''.join(digits).capitalize()
+        if rng.random() < 0.03:
+            letter = next((c for c in name.lower() if c in ACCENTS), None)
+            if letter is not None:
+                name = name.replace(letter, ACCENTS[letter], 1)
+        names.append(name)
+    weights = 1.0 / np.arange(1, artists + 1) ** 1.1
+    return np.array(names, dtype=object), weights / weights.sum()
+
+
+def format_thousands(values):
+    return np.array([f"{value:,}" for value in values], dtype=object)
+
+
+def generate_shard(shard, rows, seed, artist_names, artist_weights, duplicate_rate):
+    """
+    Generates one shard of raw rows as a DataFrame with the dtypes pd.read_csv would give
+    the streaming loader: missing keys and Shazam charts, comma-formatted Deezer playlists,
+    and near-duplicate track/artist pairs that only match after normalize_string().
+    """
+    rng = spawn_rng(seed, 1, shard)
+
+    artist_count = rng.choice(np.arange(1, MAX_ARTISTS_PER_TRACK + 1), size=rows, p=ARTIST_COUNT_WEIGHTS)
+    picks = rng.choice(len(artist_names), size=(rows, MAX_ARTISTS_PER_TRACK), p=artist_weights)
+    artists = [
+        ", ".join(dict.fromkeys(artist_names[picks[i, :artist_count[i]]]))
+        for i in range(rows)
+    ]
+
+    name_length = rng.choice(np.arange(1, 4), size=rows, p=TITLE_LENGTH_WEIGHTS)
+    # Real chart words are picked half of the time so titles still read like songs
+    word_picks = np.where(
+        rng.random((rows, 3)) < 0.5,
+        VOCABULARY[rng.integers(len(WORDS), size=(rows, 3))],
+        VOCABULARY[rng.integers(len(VOCABULARY), size=(rows, 3))]
+    )
+    track_names = pd.Series(word_picks[:, 0])
+    track_names = track_names.where(name_length < 2, track_names + ' ' + word_picks[:, 1])
+    track_names = track_names.where(name_length < 3, track_names + ' ' + word_picks[:, 2])
+    featured = (artist_count > 1) & (rng.random(rows) < 0.3)
+    feat_artist = pd.Series([name.split(', ')[-1] for name in artists])
+    track_names = track_names.where(~featured, track_names + ' (feat. ' + feat_artist + ')')
+
+    # Skewed streams: log-normal around the ~290M median of Spotify.csv
+    streams = np.minimum(rng.lognormal(mean=19.5, sigma=1.1, size=rows), 4e9).astype(np.int64)
+    popularity = streams / 3e8
+    year = np.clip(2023 - rng.exponential(scale=4.0, size=rows), 1930, 2023).astype(np.int64)
+
+    def scaled(median, size_sigma=0.8, upper=None):
+        values = median * popularity * rng.lognormal(0, size_sigma, size=rows)
+        if upper is not None:
+            values = np.minimum(values, upper)
+        return values.astype(np.int64)
+
+    deezer_playlists = scaled(95)
+    shazam_charts = rng.integers(0, 1000, size=rows).astype(str).astype(object)
+    shazam_charts[rng.random(rows) < 0.05] = np.nan
+    keys = np.array(KEYS, dtype=object)[rng.integers(len(KEYS), size=rows)]
+    keys[rng.random(rows) < 0.1] = np.nan
+    # One hex string for all cover hashes, cut into 24-character pieces without a Python loop
+    cover_hash = np.frombuffer(rng.bytes(12 * rows).hex().encode('ascii'), dtype='S24').astype(str)
+    cover_urls = np.where(
+        rng.random(rows) < 0.24,
+        'Not Found',
+        np.char.add('https://i.scdn.co/image/ab67616d0000b273', cover_hash)
+    )
+
+    data = {
+        'track_name': track_names.to_numpy(dtype=object),
+        'artist(s)_name': np.array(artists, dtype=object),
+        'artist_count': artist_count,
+        'released_year': year,
+        'released_month': rng.integers(1, 13, size=rows),
+        'released_day': rng.integers(1, 29, size=rows),
+        'in_spotify_playlists': scaled(2200) + 31,
+        'in_spotify_charts': scaled(3, upper=147),
+        'streams': streams,
+        'in_apple_playlists': scaled(34, upper=672),
+        'in_apple_charts': rng.integers(0, 276, size=rows),
+        'in_deezer_playlists': format_thousands(deezer_playlists),
+        'in_deezer_charts': scaled(1, upper=58),
+        'in_shazam_charts': shazam_charts,
+        'bpm': rng.integers(65, 207, size=rows),
+        'key': keys,
+        'mode': np.where(rng.random(rows) < 0.58, 'Major', 'Minor').astype(object),
+        'danceability_%': rng.integers(23, 97, size=rows),
+        'valence_%': rng.integers(4, 98, size=rows),
+        'energy_%': rng.integers(9, 98, size=rows),
+        'acousticness_%': np.minimum(rng.exponential(25, size=rows), 97).astype(np.int64),
+        'instrumentalness_%': np.where(rng.random(rows) < 0.9, 0, rng.integers(1, 92, size=rows)),
+        'liveness_%': np.minimum(rng.exponential(15, size=rows) + 3, 97).astype(np.int64),
+        'speechiness_%': np.minimum(rng.exponential(8, size=rows) + 2, 64).astype(np.int64),
+        'cover_url': cover_urls.astype(object),
+    }
+
+    # Near-duplicates: copy an earlier row of the shard, re-spell its names, draw new streams
+    duplicates = np.flatnonzero(rng.random(rows) < duplicate_rate)
+    duplicates = duplicates[duplicates > 0]
+    if len(duplicates):
+        sources = (rng.random(len(duplicates)) * duplicates).astype(np.int64)
+        for values in data.values():
+            values[duplicates] = values[sources]
+        variant = rng.integers(4, size=len(duplicates))
+        names = pd.Series(data['track_name'][duplicates])
+        names = names.where(variant != 0, names.str.upper())
+        names = names.where(variant != 1, names.str.lower())
+        names = names.where(variant != 2, names + '!')
+        names = names.where(variant != 3, names.str.replace(' ', '  '))
+        data['track_name'][duplicates] = names.to_numpy()
+        artists = pd.Series(data['artist(s)_name'][duplicates])
+        data['artist(s)_name'][duplicates] = artists.where(rng.random(len(duplicates)) < 0.5, artists.str.lower()).to_numpy()
+        data['streams'][duplicates] = (streams[sources] * rng.uniform(0.5, 1.5, size=len(duplicates))).astype(np.int64)
+    return pd.DataFrame(data, columns=COLUMNS)
+
+
+def shard_sizes(rows):
+    full, rest = divmod(rows, SHARD_ROWS)
+    return [SHARD_ROWS] * full + ([rest] if rest else [])
+
+
+def write_shard(task):
+    shard, rows, seed, artists, duplicate_rate, path = task
+    artist_names, artist_weights = make_artist_pool(artists, seed)
+    df = generate_shard(shard, rows, seed, artist_names, artist_weights, duplicate_rate)
+    df.to_csv(path, index=False, header=False)
+    return path
+
+
+def generate_csv(output, rows, seed=42, artists=50_000, duplicate_rate=0.05, processes=None):
+    """
+    Writes `rows` synthetic rows to `output`, generating shards in parallel worker processes.
+    The file is identical for a given seed whatever the number of processes.
+    """
+    with tempfile.TemporaryDirectory(prefix="spotify_synthetic_") as shard_dir:
+        tasks = [
+            (shard, size, seed, artists, duplicate_rate, os.path.join(shard_dir, f"shard_{shard:06d}.csv"))
+            for shard, size in enumerate(shard_sizes(rows))
+        ]
+        with Pool(processes) as pool:
+            paths = pool.map(write_shard, tasks)
+        with open(output, mode='w', encoding='utf-8', newline='') as out:
+            out.write(','.join(COLUMNS) + '\n')
+            for path in paths:
+                with open(path, encoding='utf-8') as shard_file:
+                    shutil.copyfileobj(shard_file, out)
+
+
+def generate_chunks(rows, seed=42, artists=50_000, duplicate_rate=0.05):
+    """
+    Yields the same rows as generate_csv() shard by shard, as DataFrames that
+    project_final.stream_dataload() can clean and load without a CSV in between.
+    """
+    artist_names, artist_weights = make_artist_pool(artists, seed)
+    for shard, size in enumerate(shard_sizes(rows)):
+        yield generate_shard(shard, size, seed, artist_names, artist_weights, duplicate_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset shaped like Spotify.csv.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--artists", type=int, default=50_000, help="number of distinct artists")
+    parser.add_argument("--duplicate-rate", type=float, default=0.05, help="share of rows that re-spell an earlier track")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--output", default="Spotify_synthetic.csv")
+    parser.add_argument("--load", action="store_true", help="clean and load straight into the database instead of writing a CSV")
+    # Database options of --load; project_final's settings are used for the ones not given
+    parser.add_argument("--backend", choices=["mysql", "sqlite", "duckdb"])
+    parser.add_argument("--user")
+    parser.add_argument("--password")
+    parser.add_argument("--database", help="database created and loaded by --load")
+    parser.add_argument("--batch-size", type=int, help="rows per load batch")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.load:
+        # Imported here so writing a CSV needs neither the database drivers nor a server
+        import project_final as pf
+        pf.ANIMATION = False
+        pf.BACKEND = args.backend or pf.BACKEND
+        pf.DB_NAME = args.database or pf.DB_NAME
+        pf.BATCH_SIZE = args.batch_size or pf.BATCH_SIZE
+        user = args.user if args.user is not None else pf.user
+        password = args.password if args.password is not None else pf.password
+        chunks = generate_chunks(args.rows, args.seed, args.artists, args.duplicate_rate)
+        if pf.setup_database(user, password, csv_file=chunks, streaming=True) is None:
+            print(f"Loading the generated rows into {pf.DB_NAME} failed.")
+            return 1
+    else:
+        generate_csv(args.output, args.rows, args.seed, args.artists, args.duplicate_rate, args.processes)
+        print(f"Wrote {args.rows:,} rows to {args.output}")
+    print(f"Done in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,76 @@
 import mysql.connector as mysql
-from mysql.connector import Error
+from mysql.connector import Error, errorcode, errors, pooling
 import csv
-import pandas as pd
-import numpy as np
-from tabulate import tabulate
+import importlib
+import argparse
+import abc
+import contextlib
+import json
+import html
+import itertools
+import concurrent.futures
+from decimal import Decimal
 import re
 from colorama import Fore, Style
 import time
 import sys
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import sqlite3
+import hashlib
+import inspect
+import datetime
+import multiprocessing
+from collections import OrderedDict
+
+
+class LazyModule:
+    """
+    Stands in for a module and imports it on first attribute access, so CLI commands
+    that never clean data (e.g. `query N`) start without loading pandas and numpy.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.module = None
+
+    def __getattr__(self, attr):
+        if self.module is None:
+            self.module = importlib.import_module(self.name)
+        return getattr(self.module, attr)
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+
+def tabulate(*args, **kwargs):
+    from tabulate import tabulate as render
+    return render(*args, **kwargs)
+
+_optional_modules = {}
+
+def optional_module(name):
+    """
+    Imports an optional dependency on first use: duckdb (only needed for BACKEND = "duckdb")
+    and pyarrow (only needed for the cleaned-data cache). Returns None when it is not installed.
+    """
+    if name not in _optional_modules:
+        try:
+            _optional_modules[name] = importlib.import_module(name)
+        except ImportError:
+            _optional_modules[name] = None
+    return _optional_modules[name]
+
+ANIMATION = True          # False (or --no-animation on the CLI) skips the loading animations
 
 def loading_animation(text="Loading"):
     """
     Displays a loading animation with the given text.
     """
+    if not ANIMATION:
+        return
     for i in range(10):  # Number of animation cycles
         sys.stdout.write(f"\r{text} {'.' * (i % 4)}")  # Cycle through dots
         sys.stdout.flush()
@@ -26,72 +84,83 @@ def loading_animation(text="Loading"):
 ##__________________________________________________
 # 1.1 Filling missing values for Shazam Charts and Key
 
-df = pd.read_csv('Spotify.csv')
-
-# Print missing value counts before cleaning
-missing_counts = df.isnull().sum()
-print("Missing Value Counts BEFORE CLEANING:")
-print(missing_counts)
-
-# Fill missing values in the `in_spotify_playlist` column with 0
-if 'in_shazam_charts' in df.columns:
-    df['in_shazam_charts'].fillna(0, inplace=True)
-
-# Fill missing values in the `key` column with a random letter from A to G
 random_letters = ['A', 'B', 'C', 'D', 'E', 'F', 'G']
-if 'key' in df.columns:
-    df['key'] = df['key'].apply(
-        lambda x: np.random.choice(random_letters) if pd.isnull(x) else x
-    )
-# Save the cleaned dataset
-df.to_csv('Spotify.csv', index=False)
 
-# Print missing value counts after cleaning to ensure completion
-missing_counts = df.isnull().sum()
-print("Missing Value Counts AFTER CLEANING:")
-print(missing_counts)
+def fill_missing_values(df):
+    """
+    Fills missing Shazam Charts with 0 and missing keys with a random letter from A to G.
+    The random keys are drawn in one batch, in row order, so a fixed seed gives the
+    same letters as drawing them one row at a time.
+    """
+    # Fill missing values in the `in_shazam_charts` column with 0
+    if 'in_shazam_charts' in df.columns:
+        df['in_shazam_charts'] = df['in_shazam_charts'].fillna(0)
+
+    # Fill missing values in the `key` column with a random letter from A to G
+    if 'key' in df.columns:
+        missing_key = df['key'].isnull()
+        if missing_key.any():
+            df.loc[missing_key, 'key'] = np.random.choice(random_letters, size=int(missing_key.sum()))
+    return df
 
 ##__________________________________________________
 # 1.2 Removing faulty row that had concatenated string within "streams" column
 
 track_name_to_remove = "Love Grows (Where My Rosemary Goes)"
 artist_name_to_remove = "Edison Lighthouse"
-df = df[~((df['track_name'] == track_name_to_remove) & (df['artist(s)_name'] == artist_name_to_remove))]
 
-# Save the modified DataFrame back to the same CSV file
-df.to_csv('Spotify.csv', index=False)
-
-print(f"The song '{track_name_to_remove}' by '{artist_name_to_remove}' has been removed.")
+def remove_faulty_rows(df):
+    """
+    Drops the row whose "streams" value is a concatenated string.
+    """
+    df = df[~((df['track_name'] == track_name_to_remove) & (df['artist(s)_name'] == artist_name_to_remove))].copy()
+    # With the faulty row gone the column is numeric, so streams sort as numbers in step 1.4
+    df['streams'] = pd.to_numeric(df['streams'])
+    return df
 
 ##__________________________________________________
 # 1.3 Replacing non-conventional characters with letters for human-readability
 
+# Regex to match characters that are not letters, digits, spaces, or allowed punctuation
+UNCONVENTIONAL_CHARACTERS = re.compile(r'[^a-zA-Z0-9\s.,!?:;()\'\"\-]')
+REPLACEMENT_LETTERS = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+
 def replace_characters(value):
     if isinstance(value, str):  # Only process string values
-        # Regex to match characters that are not letters, digits, spaces, or allowed punctuation
-        return re.sub(
-            r'[^a-zA-Z0-9\s.,!?:;()\'\"\-]',  # Matches characters NOT in the allowed set
-            lambda _: np.random.choice(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ")),  # Replace with random letter
+        return UNCONVENTIONAL_CHARACTERS.sub(
+            lambda _: np.random.choice(REPLACEMENT_LETTERS),  # Replace with random letter
             value
         )
     return value
 
-# Apply the function to the 'track_name' and 'artist(s)_name' columns
-df['track_name'] = df['track_name'].apply(replace_characters)
-df['artist(s)_name'] = df['artist(s)_name'].apply(replace_characters)
-
-# Save the cleaned DataFrame back to the CSV
-df.to_csv('Spotify.csv', index=False)
+def replace_characters_column(series):
+    """
+    Vectorized replace_characters(): counts the matches of the whole column at once,
+    draws every replacement letter in one batch and only rewrites the affected values.
+    """
+    counts = series.str.count(UNCONVENTIONAL_CHARACTERS.pattern).fillna(0).astype(int)
+    total = int(counts.sum())
+    if total == 0:
+        return series
+    letters = iter(np.random.choice(REPLACEMENT_LETTERS, size=total))
+    affected = counts > 0
+    series = series.copy()
+    series[affected] = series[affected].str.replace(
+        UNCONVENTIONAL_CHARACTERS, lambda _: next(letters), regex=True
+    )
+    return series
 
-print("Unconventional characters in 'track_name' and 'artist(s)_name' have been replaced with random letters.")
+def replace_unconventional_characters(df):
+    """
+    Replaces unconventional characters in 'track_name' and 'artist(s)_name' with random letters.
+    """
+    df['track_name'] = replace_characters_column(df['track_name'])
+    df['artist(s)_name'] = replace_characters_column(df['artist(s)_name'])
+    return df
 
 ##__________________________________________________ 
 # 1.4 Uses process of normalization to assess and drop duplicates (that are lower performing)
 
-# Load the dataset
-file_path = 'Spotify.csv'
-df = pd.read_csv(file_path)
-
 # Function to normalize strings
 def normalize_string(value):
     if isinstance(value, str):
@@ -100,38 +169,844 @@ def normalize_string(value):
         value = re.sub(r'\s+', ' ', value).strip()  # Remove extra spaces
     return value
 
-# Normalize the track and artist names
-df['normalized_track_name'] = df['track_name'].apply(normalize_string)
-df['normalized_artist_name'] = df['artist(s)_name'].apply(normalize_string)
+def normalize_column(series):
+    """
+    Vectorized normalize_string() over a whole column.
+    """
+    return (
+        series.str.lower()
+        .str.replace(r'[^a-z0-9\s]', '', regex=True)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+    )
+
+def drop_normalized_duplicates(df):
+    """
+    Drops duplicates of the normalized track/artist names, keeping the row with the highest streams.
+    """
+    # Normalize the track and artist names
+    df['normalized_track_name'] = normalize_column(df['track_name'])
+    df['normalized_artist_name'] = normalize_column(df['artist(s)_name'])
+
+    # Sort by streams in descending order (higher streams first)
+    df = df.sort_values('streams', ascending=False)
+
+    # Drop duplicates based on normalized names, keeping the row with the highest streams
+    df = df.drop_duplicates(subset=['normalized_track_name', 'normalized_artist_name'], keep='first')
+
+    # Drop the temporary normalized columns
+    return df.drop(columns=['normalized_track_name', 'normalized_artist_name'])
+
+
+##__________________________________________________
+# 1.5 Near-duplicate detection: MinHash-LSH over the track names, confirmed on the artists
+
+FUZZY_THRESHOLD = 0.8          # Jaccard similarity of the title shingles from which two rows are merged
+FUZZY_ARTIST_THRESHOLD = 0.9   # ... and of the artist shingles: only the same artists' versions of a title merge
+MINHASH_BANDS = 16             # LSH bands x rows per band = signature length
+MINHASH_BAND_ROWS = 4
+MINHASH_CHUNK = 4_096          # rows hashed per vectorized block (bounds the hashing buffer)
+MINHASH_PRIME = (1 << 31) - 1
+MINHASH_BUCKET_CAP = 50        # LSH buckets up to this size compare all their pairs, larger ones only neighbours
+MINHASH_MARGIN = 0.15          # candidates whose estimated similarity is this far below the threshold skip the exact check
+MINHASH_ARTIST_MARGIN = 0.25   # the same for the artists, estimated less precisely from their short lists
+NEAR_DUPLICATE_REPORT = 'near_duplicates.csv'
+
+# "(feat. X)", "[with X]" and "- feat. X" tags; the featured artist is in the artist list anyway
+FEATURE_TAG = re.compile(
+    r'\s*[(\[]\s*(?:feat|ft|featuring|with)\b[^)\]]*[)\]]|\s+-?\s*\b(?:feat|ft|featuring)\b\.?\s.*$',
+    re.IGNORECASE
+)
+
+def fuzzy_names(df):
+    """
+    The texts compared for near-duplicates, scored separately: the normalized titles without
+    feature tags and the normalized artists in sorted order. Both are padded so every row has
+    at least one shingle.
+    """
+    titles = normalize_column(df['track_name'].str.replace(FEATURE_TAG, '', regex=True))
+    artists = df['artist(s)_name'].str.split(',').map(
+        lambda names: "|".join(sorted(normalize_string(name) for name in names))
+    )
+    pad = lambda names: (" " + names.where(names != "", "|") + " ").tolist()
+    return pad(titles), pad(artists)
+
+def name_shingles(names):
+    """
+    Character 3-grams of every name as integers: the 24-bit 3-gram (the names are ASCII after
+    normalization) plus the number of the word it starts in, so repeated or reordered words
+    do not look alike ("amor" and "amor amor", "wild bill" and "bill wild").
+    Returns the shingles of all rows back to back and the offset where each row starts.
+    """
+    encoded = [name.encode('ascii', 'ignore') for name in names]
+    lengths = np.fromiter((len(name) for name in encoded), dtype=np.int64, count=len(encoded))
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.int64)
+    starts = np.cumsum(lengths) - lengths
+    grams = (data[:-2] << 16) | (data[1:-1] << 8) | data[2:]
+    # Keep only the 3-grams that start and end inside the same row
+    counts = lengths - 2
+    position = np.arange(len(data)) - np.repeat(starts, lengths)
+    keep = (position < np.repeat(counts, lengths))[:-2]
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    # Spaces up to each character of its row (normalization leaves single spaces between words)
+    spaces = np.cumsum(data == ord(" "))
+    words = spaces - np.repeat(spaces[starts] - (data[starts] == ord(" ")), lengths)
+    # Capped so the shingles stay below 2**31 and their hashes fit in int64
+    return grams[keep] | (np.minimum(words[:-2][keep], 127) << 24), offsets
+
+def minhash_signatures(shingles, offsets, seed=1):
+    """
+    MinHash signature of every row (uint32: the hashes are below MINHASH_PRIME) and the LSH
+    key of every band, both built block by block from MINHASH_CHUNK rows at a time.
+    """
+    rng = np.random.default_rng(seed)
+    size = MINHASH_BANDS * MINHASH_BAND_ROWS
+    a = rng.integers(1, MINHASH_PRIME, size=size, dtype=np.int64)[:, None]
+    b = rng.integers(0, MINHASH_PRIME, size=size, dtype=np.int64)[:, None]
+    rows = len(offsets) - 1
+    signatures = np.empty((rows, size), dtype=np.uint32)
+    band_keys = np.empty((rows, MINHASH_BANDS), dtype=np.uint64)
+    for first in range(0, rows, MINHASH_CHUNK):
+        last = min(first + MINHASH_CHUNK, rows)
+        hashed = a * shingles[offsets[first]:offsets[last]]
+        hashed += b
+        hashed %= MINHASH_PRIME
+        block = np.minimum.reduceat(hashed, offsets[first:last] - offsets[first], axis=1).T
+        signatures[first:last] = block
+        keys = np.zeros((last - first, MINHASH_BANDS), dtype=np.uint64)
+        for column in block.reshape(last - first, MINHASH_BANDS, MINHASH_BAND_ROWS).transpose(2, 0, 1):
+            keys = keys * np.uint64(1_000_003) ^ column.astype(np.uint64)
+        band_keys[first:last] = keys
+    return signatures, band_keys
+
+def lsh_candidates(band_keys):
+    """
+    Pairs of rows that share the key of at least one band. Every pair of a bucket of up to
+    MINHASH_BUCKET_CAP rows is a candidate; rows of larger buckets (names too short or common
+    to tell apart) are only chained to their neighbour, which keeps the pair count bounded.
+    """
+    rows = len(band_keys)
+    # Every pair (left < right) as the single integer left * rows + right, cheap to deduplicate
+    codes = [np.empty(0, dtype=np.int64)]
+    for band in range(MINHASH_BANDS):
+        keys = band_keys[:, band]
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        sizes = np.diff(np.r_[starts, len(keys)])
+        bucket = np.repeat(np.arange(len(starts)), sizes)
+        # Distance 1 pairs neighbours in every bucket, larger distances only reach into the
+        # small buckets still wider than the distance
+        distance = 1
+        while len(order) > distance:
+            same = bucket[:-distance] == bucket[distance:]
+            left, right = order[:-distance][same], order[distance:][same]
+            codes.append(np.minimum(left, right).astype(np.int64) * rows + np.maximum(left, right))
+            distance += 1
+            wider = sizes[bucket] > distance
+            wider &= sizes[bucket] <= MINHASH_BUCKET_CAP
+            order, bucket = order[wider], bucket[wider]
+    codes = np.sort(np.concatenate(codes))
+    first = np.ones(len(codes), dtype=bool)
+    first[1:] = codes[1:] != codes[:-1]
+    codes = codes[first]
+    return np.stack([codes // rows, codes % rows], axis=1)
+
+def near_duplicate_clusters(titles, artists, threshold=FUZZY_THRESHOLD, artist_threshold=FUZZY_ARTIST_THRESHOLD):
+    """
+    Groups rows whose title shingles have a Jaccard similarity of at least `threshold` and whose
+    artist shingles reach `artist_threshold`, so different songs of one artist are never merged
+    on the artist name they share. LSH over the titles proposes candidate pairs in near-linear
+    time, the signatures weed out the clear misses, the rest are checked exactly on both and
+    the confirmed pairs are joined with union-find.
+    Returns a cluster id per row.
+    """
+    shingles, offsets = name_shingles(titles)
+    artist_shingles, artist_offsets = name_shingles(artists)
+    signatures, band_keys = minhash_signatures(shingles, offsets)
+    artist_signatures, _ = minhash_signatures(artist_shingles, artist_offsets)
+    candidates = lsh_candidates(band_keys)
+    # Estimated in blocks, so the gathered signatures never outgrow a hashing block
+    likely = np.zeros(len(candidates), dtype=bool)
+    step = MINHASH_CHUNK * 64
+    for first in range(0, len(candidates), step):
+        left, right = candidates[first:first + step].T
+        estimated = (signatures[left] == signatures[right]).mean(axis=1)
+        artist_estimated = (artist_signatures[left] == artist_signatures[right]).mean(axis=1)
+        likely[first:first + step] = ((estimated >= threshold - MINHASH_MARGIN)
+                                      & (artist_estimated >= artist_threshold - MINHASH_ARTIST_MARGIN))
+    candidates = candidates[likely]
+    parent = np.arange(len(titles))
+
+    def root(row):
+        while parent[row] != row:
+            parent[row] = parent[parent[row]]
+            row = parent[row]
+        return row
+
+    def similar(shingles, offsets, seen, left, right, threshold):
+        for row in (left, right):
+            if row not in seen:
+                seen[row] = np.unique(shingles[offsets[row]:offsets[row + 1]])
+        common = len(np.intersect1d(seen[left], seen[right], assume_unique=True))
+        union = len(seen[left]) + len(seen[right]) - common
+        return common >= threshold * union
+
+    unique_titles, unique_artists = {}, {}
+    for left, right in candidates:
+        if (similar(shingles, offsets, unique_titles, left, right, threshold)
+                and similar(artist_shingles, artist_offsets, unique_artists, left, right, artist_threshold)):
+            parent[root(left)] = root(right)
+    return np.array([root(row) for row in range(len(titles))])
+
+def drop_near_duplicates(df):
+    """
+    Drops the rows that are near-duplicates of another one (feature tags, spelling variants,
+    the letters 1.3 put in), keeping the row with the highest streams of every cluster.
+    The merged clusters are written to NEAR_DUPLICATE_REPORT.
+    """
+    if df.empty:
+        return df
+    clusters = pd.Series(near_duplicate_clusters(*fuzzy_names(df)), index=df.index)
+    sizes = clusters.map(clusters.value_counts())
+    merged = df[sizes > 1]
+    if merged.empty:
+        return df
+    # Highest streams first; the stable sort keeps the earlier row on ties
+    kept = merged.sort_values('streams', ascending=False, kind='stable').groupby(clusters[sizes > 1]).head(1).index
+    report = merged[['track_name', 'artist(s)_name', 'streams']].assign(
+        cluster=clusters[sizes > 1], kept=merged.index.isin(kept)
+    ).sort_values(['cluster', 'kept', 'streams'], ascending=[True, False, False])
+    report[['cluster', 'kept', 'track_name', 'artist(s)_name', 'streams']].to_csv(NEAR_DUPLICATE_REPORT, index=False)
+    print(f"Near duplicates: {len(merged) - len(kept)} rows merged into {len(kept)} clusters, see {NEAR_DUPLICATE_REPORT}")
+    return df.drop(merged.index.difference(kept))
+
+
+##__________________________________________________
+# 1.6 Running the stages as one in-memory pipeline, written to disk once
+
+# Each stage takes and returns a DataFrame, so stages can be reordered, dropped or added
+CLEANING_STAGES = [
+    ("fill missing values", fill_missing_values),
+    ("remove faulty rows", remove_faulty_rows),
+    ("replace unconventional characters", replace_unconventional_characters),
+    ("drop normalized duplicates", drop_normalized_duplicates),
+]
+# Opt-in (clean --near-duplicates): merging clusters is not idempotent, so it must not run
+# again on its own output, which the default in-place cleaning of SOURCE_CSV would do
+NEAR_DUPLICATE_STAGE = ("drop near duplicates", drop_near_duplicates)
+
+def clean_dataframe(df, stages=CLEANING_STAGES):
+    """
+    Runs the cleaning stages in order on an in-memory DataFrame.
+    """
+    for name, stage in stages:
+        df = stage(df)
+        print(f"Cleaning stage done: {name} ({len(df)} rows)")
+    return df
+
+def run_cleaning(file_path='Spotify.csv', output_path=None, stages=CLEANING_STAGES, use_cache=True):
+    """
+    Reads the CSV once, runs STEP 1 in memory and writes the cleaned dataset once.
+    By default the source file is overwritten; pass output_path to keep it untouched.
+    With use_cache, an unchanged source cleaned with the same stages is read back from
+    the columnar cache (see 1.8) instead of being parsed and cleaned again; that includes
+    a source this function cleaned in place before.
+    """
+    output_path = output_path or file_path
+    cache_path = None
+    if use_cache and USE_CLEANED_CACHE and optional_module("pyarrow.feather") is not None:
+        cache_path = cleaned_cache_path(file_path, stages)
+        if os.path.exists(cache_path):
+            df = read_cleaned_cache(cache_path)
+            print(f"Cleaned data loaded from the cache {cache_path} ({len(df)} rows), STEP 1 skipped.")
+            rows_path = cleaned_rows_path(output_path) if os.path.exists(output_path) else None
+            if rows_path is not None and os.path.exists(rows_path) and os.path.samefile(rows_path, cache_path):
+                print(f"{output_path} already holds the cleaned dataset.")
+            else:
+                df.to_csv(output_path, index=False)
+                register_cleaned_output(cache_path, output_path, stages)
+                print(f"Cleaned dataset saved to: {output_path}")
+            return df
+
+    df = pd.read_csv(file_path)
+
+    # Print missing value counts before cleaning
+    print("Missing Value Counts BEFORE CLEANING:")
+    print(df.isnull().sum())
+
+    df = compact_dtypes(clean_dataframe(df, stages))
+
+    # Print missing value counts after cleaning to ensure completion
+    print("Missing Value Counts AFTER CLEANING:")
+    print(df.isnull().sum())
+
+    if cache_path is not None:
+        write_cleaned_cache(df, cache_path)
+    df.to_csv(output_path, index=False)
+    if cache_path is not None:
+        register_cleaned_output(cache_path, output_path, stages)
+    print(f"Cleaned dataset saved to: {output_path}")
+    return df
+
+
+
+
+##__________________________________________________
+# 1.7 Streaming mode: cleaning in chunks for files larger than memory
+
+# Text columns that must not be parsed as floats in chunks that happen to hold no commas
+STREAMING_TEXT_COLUMNS = {'streams': str, 'in_deezer_playlists': str, 'in_shazam_charts': str, 'key': str}
+DEDUP_KEYS = ['normalized_track_name', 'normalized_artist_name']
+
+def read_chunks(source, chunksize=100_000):
+    """
+    Returns the raw chunks of a CSV path, or `source` itself when it already is an
+    iterable of DataFrames (e.g. generate_spotify.generate_chunks()).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return pd.read_csv(source, chunksize=chunksize, dtype=STREAMING_TEXT_COLUMNS)
+    return source
+
+def stream_clean_chunks(source, spool_path, chunksize=100_000):
+    """
+    First pass of the streaming mode. Runs steps 1.1 - 1.3 on each chunk, appends the
+    cleaned chunk to spool_path and keeps a running-max table with one entry per
+    normalized track/artist key (highest streams seen so far and its row number).
+    Returns the row numbers of the spooled rows that survive step 1.4.
+    """
+    best = pd.DataFrame(columns=DEDUP_KEYS + ['streams', 'row_number'])
+    row_number = 0
+    for chunk in read_chunks(source, chunksize):
+        chunk = fill_missing_values(chunk)
+        chunk = remove_faulty_rows(chunk)
+        chunk = replace_unconventional_characters(chunk)
+        chunk.to_csv(spool_path, mode='a', header=(row_number == 0), index=False)
+
+        candidates = pd.DataFrame({
+            'normalized_track_name': normalize_column(chunk['track_name']).to_numpy(),
+            'normalized_artist_name': normalize_column(chunk['artist(s)_name']).to_numpy(),
+            'streams': chunk['streams'].to_numpy(),
+            'row_number': np.arange(row_number, row_number + len(chunk)),
+        })
+        # Stable sort keeps the earlier row on ties, so the table never grows past one row per key
+        best = (
+            pd.concat([best, candidates], ignore_index=True)
+            .sort_values('streams', ascending=False, kind='stable')
+            .drop_duplicates(subset=DEDUP_KEYS, keep='first')
+        )
+        row_number += len(chunk)
+        print(f"Cleaned {row_number} rows, {len(best)} distinct tracks so far")
+
+    return np.sort(best['row_number'].to_numpy(dtype=np.int64))
+
+def iter_deduplicated_rows(spool_path, winners, chunksize=100_000, output_path=None):
+    """
+    Second pass of the streaming mode. Re-reads the spooled chunks and yields only the
+    rows picked by stream_clean_chunks(), as text dicts like csv.DictReader gives.
+    """
+    row_number = 0
+    header = True
+    for chunk in pd.read_csv(spool_path, chunksize=chunksize, dtype=str, keep_default_na=False):
+        positions = np.arange(row_number, row_number + len(chunk))
+        kept = chunk[np.isin(positions, winners, assume_unique=True)]
+        row_number += len(chunk)
+        if output_path is not None:
+            kept.to_csv(output_path, mode='w' if header else 'a', header=header, index=False)
+            header = False
+        yield from kept.to_dict('records')
+
+
+##__________________________________________________
+# 1.8 Columnar cache of the cleaned dataset, keyed by the source file and the cleaning setup
+
+USE_CLEANED_CACHE = True
+CLEANED_CACHE_DIR = '.cleaned_cache'
+
+PERCENT_COLUMNS = [
+    'danceability_%', 'valence_%', 'energy_%', 'acousticness_%',
+    'instrumentalness_%', 'liveness_%', 'speechiness_%'
+]
+CATEGORY_COLUMNS = ['key', 'mode']
+TEXT_COLUMNS = ['track_name', 'artist(s)_name', 'cover_url']
+
+def compact_dtypes(df):
+    """
+    Shrinks the cleaned frame: the smallest integer type that fits for the counts and
+    % columns, categories for key/mode and int64 for streams. Counts written as "1,021"
+    are parsed on the way.
+    """
+    df = df.copy()
+    for column in df.columns:
+        if column in TEXT_COLUMNS:
+            continue
+        if column in CATEGORY_COLUMNS:
+            df[column] = df[column].astype('category')
+        elif column == 'streams':
+            df[column] = df[column].astype('int64')
+        else:
+            values = df[column].astype(str).str.replace(',', '', regex=False)
+            df[column] = pd.to_numeric(pd.to_numeric(values).astype('int64'), downcast='integer')
+    for column in PERCENT_COLUMNS:
+        if column in df.columns and df[column].min() >= 0:
+            df[column] = df[column].astype('uint8')
+    return df
+
+def cleaning_config(stages):
+    """
+    Everything the cleaned output depends on besides the source: the stages, their code and the tuning settings.
+    """
+    parts = [
+        UNCONVENTIONAL_CHARACTERS.pattern, "".join(REPLACEMENT_LETTERS), "".join(random_letters),
+        FEATURE_TAG.pattern, FUZZY_THRESHOLD, FUZZY_ARTIST_THRESHOLD, MINHASH_BANDS, MINHASH_BAND_ROWS, MINHASH_MARGIN,
+        MINHASH_ARTIST_MARGIN, MINHASH_BUCKET_CAP, inspect.getsource(compact_dtypes),
+    ]
+    for name, stage in stages:
+        parts.extend([name, stage.__qualname__, inspect.getsource(stage)])
+    return "\n".join(str(part) for part in parts)
+
+def file_digest(file_path):
+    digest = hashlib.sha1()
+    with open(file_path, mode='rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest
+
+def cleaned_cache_path(file_path, stages, digest=None):
+    """
+    Cache file for this source and cleaning setup: any change to either gives a new key.
+    The key is the content of the file read, so it survives the file being renamed.
+    """
+    digest = (digest or file_digest(file_path)).copy()
+    digest.update(cleaning_config(stages).encode('utf-8'))
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(CLEANED_CACHE_DIR, f"{name}-{digest.hexdigest()[:16]}.arrow")
+
+def cleaned_rows_path(csv_file, digest=None):
+    """
+    Cache file holding exactly the rows of the cleaned CSV csv_file, which the loaders read
+    instead of parsing the CSV (see 4.1). Only run_cleaning() files one, for its own output.
+    """
+    digest = digest or file_digest(csv_file)
+    name = os.path.splitext(os.path.basename(csv_file))[0]
+    return os.path.join(CLEANED_CACHE_DIR, f"{name}-{digest.hexdigest()[:16]}.rows.arrow")
+
+def link_cleaned_cache(cache_path, alias):
+    """
+    Makes alias name the same cache file: a hard link, or a copy where links are not supported.
+    """
+    if os.path.exists(alias) and os.path.samefile(alias, cache_path):
+        return
+    partial = alias + ".tmp"
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(partial)
+    try:
+        os.link(cache_path, partial)
+    except OSError:
+        shutil.copyfile(cache_path, partial)
+    os.replace(partial, alias)
+
+def register_cleaned_output(cache_path, output_path, stages):
+    """
+    Files the cleaned CSV just written under its own content as well: cleaning it again (the
+    default cleans SOURCE_CSV in place) hits the cache, and the loaders read its rows from it.
+    """
+    digest = file_digest(output_path)
+    link_cleaned_cache(cache_path, cleaned_cache_path(output_path, stages, digest))
+    link_cleaned_cache(cache_path, cleaned_rows_path(output_path, digest))
+
+def write_cleaned_cache(df, cache_path):
+    """
+    Stores the cleaned frame as an uncompressed Arrow IPC file, so it can be memory-mapped back.
+    """
+    os.makedirs(CLEANED_CACHE_DIR, exist_ok=True)
+    partial = cache_path + ".tmp"
+    feather = optional_module("pyarrow.feather")
+    feather.write_feather(df.reset_index(drop=True), partial, compression='uncompressed')
+    os.replace(partial, cache_path)
+    print(f"Cleaned data cached in {cache_path}")
+
+def read_cleaned_cache(cache_path):
+    """
+    Memory-maps the Arrow file; the columns are converted without parsing any text. Every
+    column keeps its own block, so the numeric ones are (read-only) views on the map rather
+    than copies, and the Arrow buffers are released as their columns are converted.
+    """
+    pa = optional_module("pyarrow")
+    table = pa.ipc.open_file(pa.memory_map(cache_path, 'r')).read_all()
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+def iter_cached_rows(cache_path, start=None, batch_rows=10_000):
+    """
+    Yields (row dict, number of the next row) for the rows of a cleaned-data cache file from
+    row `start` on, one record batch at a time: the values arrive typed, nothing is parsed.
+    """
+    pa = optional_module("pyarrow")
+    table = pa.ipc.open_file(pa.memory_map(cache_path, 'r')).read_all()
+    position = start or 0
+    for batch in table.slice(position).to_batches(max_chunksize=batch_rows):
+        for row in batch.to_pylist():
+            position += 1
+            yield row, position
 
-# Sort by streams in descending order (higher streams first)
-df = df.sort_values('streams', ascending=False)
 
-# Drop duplicates based on normalized names, keeping the row with the highest streams
-df = df.drop_duplicates(subset=['normalized_track_name', 'normalized_artist_name'], keep='first')
+##________________________________________________________________________
+# CONNECTION POOL SHARED BY EVERY DATABASE STEP
+
+BACKEND = "mysql"         # "mysql" server, or the embedded "sqlite" / "duckdb" engines (see below)
+DB_HOST = "localhost"
+DB_NAME = "Spotify"
+POOL_SIZE = 5             # connections kept open per (user, database) pool
+POOL_WAIT = 10            # seconds to wait for a free connection before giving up
+CONNECT_RETRIES = 3       # attempts to reach the server before an error is raised
 
-# Drop the temporary normalized columns
-df = df.drop(columns=['normalized_track_name', 'normalized_artist_name'])
+_pools = {}
+_pools_lock = threading.Lock()
 
-# Save the cleaned DataFrame back to the original CSV file
-df.to_csv(file_path, index=False)
+def get_pool(user: str, passwd: str, database=None, local_infile: bool = False):
+    """
+    Returns the shared pool for this user and database, creating it on first use.
+    Only the separate local_infile pool, used by LOAD DATA loads, lets the server ask
+    for client files; every other session refuses LOAD DATA LOCAL INFILE.
+    """
+    key = (DB_HOST, user, database, local_infile)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = pooling.MySQLConnectionPool(
+                pool_name=f"spotify_pool_{len(_pools)}",
+                pool_size=POOL_SIZE,
+                # Sessions outlive a checkout so their prepared statements can be reused (see 4.13);
+                # get_pooled_connection() rolls back whatever the previous borrower left open instead
+                pool_reset_session=False,
+                host=DB_HOST,
+                user=user,
+                passwd=passwd,
+                database=database,
+                allow_local_infile=local_infile
+            )
+        return _pools[key]
 
-print(f"Duplicates removed and cleaned dataset saved back to the original file: {file_path}")
+def reset_pool(user: str, database=None, local_infile: bool = False):
+    """
+    Forgets a pool so the next get_connection() builds a fresh one, e.g. after a server restart.
+    """
+    with _pools_lock:
+        _pools.pop((DB_HOST, user, database, local_infile), None)
+    statement_cache.clear()
 
+def get_connection(user: str, passwd: str, use_database: bool = True, local_infile: bool = False):
+    """
+    Returns a connection to the configured BACKEND; close() releases it.
+    local_infile=True borrows from the LOAD DATA LOCAL INFILE pool (MySQL only).
+    """
+    if BACKEND == "mysql":
+        return get_pooled_connection(user, passwd, use_database, local_infile)
+    return EMBEDDED_BACKENDS[BACKEND].connect()
 
+def get_pooled_connection(user: str, passwd: str, use_database: bool = True, local_infile: bool = False):
+    """
+    Borrows a healthy connection from the shared pool; close() hands it back.
+    Safe to call from several threads. Waits up to POOL_WAIT seconds when every
+    connection is busy, pings the connection before handing it out (reconnecting
+    stale ones) and rebuilds the pool if the server could not be reached.
+    """
+    database = DB_NAME if use_database else None
+    deadline = time.monotonic() + POOL_WAIT
+    failures = 0
+    while True:
+        try:
+            connection = get_pool(user, passwd, database, local_infile).get_connection()
+            connection.ping(reconnect=True, attempts=CONNECT_RETRIES, delay=1)
+            connection.rollback()
+            return connection
+        except errors.PoolError:
+            # Every connection is checked out by another thread, wait for one to come back
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+        except (errors.InterfaceError, errors.OperationalError):
+            failures += 1
+            reset_pool(user, database, local_infile)
+            if failures >= CONNECT_RETRIES:
+                raise
+            time.sleep(failures)
 
 
 ##________________________________________________________________________
-# STEP 2: CREATING DATABASE 
+# EMBEDDED BACKENDS: THE SAME SCHEMA AND QUERIES WITHOUT A MYSQL SERVER
+
+class EmbeddedBackend(abc.ABC):
+    """
+    Runs the pipeline on an in-process engine stored in the file "<DB_NAME>.<name>".
+    Connections are wrapped so the MySQL-dialect SQL and mysql.connector calls used
+    everywhere else work unchanged; engine errors are raised as mysql.connector Error.
+    """
+    name = None
+    module = None
+    errors = ()
+    implicit_transactions = True   # the driver opens a transaction before data changes by itself
+
+    def database_path(self):
+        return f"{DB_NAME}.{self.name}"
+
+    @abc.abstractmethod
+    def open(self):
+        """
+        Opens a new connection of the underlying driver to database_path().
+        """
+
+    def connect(self):
+        return EmbeddedConnection(self, self.open())
+
+    def raw_cursor(self, raw_connection):
+        return raw_connection.cursor()
+
+    def executemany(self, raw_cursor, sql, seq_params):
+        raw_cursor.executemany(self.translate(sql), seq_params)
+
+    def drop_database(self):
+        if os.path.exists(self.database_path()):
+            os.remove(self.database_path())
+
+    def translate(self, sql):
+        """
+        Rewrites the MySQL-only constructs the schema, loader and menu queries use.
+        """
+        sql = sql.replace("INT AUTO_INCREMENT PRIMARY KEY", "INTEGER PRIMARY KEY")
+        sql = sql.replace("INSERT IGNORE INTO", "INSERT OR IGNORE INTO")
+        sql = sql.replace("%s", "?")
+        # FIELD(x, 'a', 'b', ...) gives the 1-based position of x in the list
+        return re.sub(r"FIELD\(([^,()]+),([^()]*)\)", self.translate_field, sql)
+
+    def wrap_error(self, e):
+        """
+        Converts an engine error into the mysql.connector error class of the same DB-API
+        name, so callers can still tell bad data (IntegrityError, DataError) from a failing engine.
+        """
+        for name in ("IntegrityError", "DataError", "OperationalError", "ProgrammingError"):
+            if isinstance(e, getattr(self.module, name)):
+                return getattr(errors, name)(msg=str(e))
+        return Error(msg=str(e))
+
+    @staticmethod
+    def translate_field(match):
+        values = [value.strip() for value in match.group(2).split(",")]
+        cases = " ".join(f"WHEN {value} THEN {position}" for position, value in enumerate(values, start=1))
+        return f"(CASE {match.group(1).strip()} {cases} ELSE {len(values) + 1} END)"
+
+
+class SQLiteBackend(EmbeddedBackend):
+    name = "sqlite"
+    module = sqlite3
+    errors = (sqlite3.Error,)
+
+    def open(self):
+        connection = sqlite3.connect(self.database_path(), check_same_thread=False, timeout=POOL_WAIT)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA foreign_keys = ON")
+        return connection
+
+    def translate(self, sql):
+        sql = super().translate(sql)
+        sql = sql.replace("GREATEST(", "MAX(")
+        sql = sql.replace(" DIV ", " / ")     # integer operands divide as integers
+        if sql.lstrip().upper().startswith("EXPLAIN ANALYZE "):
+            # SQLite cannot time a plan; the chosen plan is the closest it offers
+            sql = sql.replace("EXPLAIN ANALYZE ", "EXPLAIN QUERY PLAN ", 1)
+        elif sql.lstrip().upper().startswith("EXPLAIN "):
+            sql = sql.replace("EXPLAIN ", "EXPLAIN QUERY PLAN ", 1)
+        return sql
+
+
+class DuckDBBackend(EmbeddedBackend):
+    """
+    Columnar engine: the aggregations of the menu queries run vectorized in-process.
+    One database instance is opened per process and every connection is a cursor on it.
+    """
+    name = "duckdb"
+    # DuckDB autocommits every statement and each cursor() is a connection with its own
+    # transaction, so statements run on the connection itself and BEGIN is issued for it
+    implicit_transactions = False
+
+    def __init__(self):
+        self.database = None
+        self.lock = threading.Lock()
+
+    @property
+    def module(self):
+        return optional_module("duckdb")
+
+    @property
+    def errors(self):
+        return (self.module.Error,)
+
+    def open(self):
+        if self.module is None:
+            raise Error(msg='BACKEND = "duckdb" needs the duckdb package (pip install duckdb)')
+        with self.lock:
+            if self.database is None:
+                self.database = self.module.connect(self.database_path())
+            return self.database.cursor()
+
+    def raw_cursor(self, raw_connection):
+        return raw_connection
+
+    def drop_database(self):
+        with self.lock:
+            if self.database is not None:
+                self.database.close()
+                self.database = None
+        super().drop_database()
+        if os.path.exists(self.database_path() + ".wal"):
+            os.remove(self.database_path() + ".wal")
+
+    def translate(self, sql):
+        sql = super().translate(sql)
+        sql = sql.replace(" DIV ", " // ")
+        return sql.replace("ON DELETE CASCADE", "")
+
+    def executemany(self, raw_cursor, sql, seq_params):
+        # Row-by-row executemany() is slow in DuckDB, so multi-row INSERTs go through a DataFrame scan
+        match = re.match(r"\s*INSERT (IGNORE )?INTO (\w+) \(([^)]*)\) VALUES", sql)
+        if match is None:
+            return super().executemany(raw_cursor, sql, seq_params)
+        ignore, table, columns = match.groups()
+        batch = pd.DataFrame(seq_params, columns=[column.strip() for column in columns.split(",")])
+        raw_cursor.register("insert_batch", batch)
+        try:
+            raw_cursor.execute(
+                f"INSERT {'OR IGNORE ' if ignore else ''}INTO {table} ({columns}) SELECT {columns} FROM insert_batch"
+            )
+        finally:
+            raw_cursor.unregister("insert_batch")
+
+
+class EmbeddedConnection:
+    """
+    The subset of the mysql.connector connection API the pipeline uses.
+    """
+
+    def __init__(self, backend, raw):
+        self.backend = backend
+        self.raw = raw
+        self.in_transaction = False
+
+    def cursor(self, buffered=False, dictionary=False):
+        return EmbeddedCursor(self, self.backend.raw_cursor(self.raw), dictionary)
+
+    def begin(self, sql):
+        """
+        Opens a transaction before the first data change, as mysql.connector and sqlite3 do.
+        """
+        if self.backend.implicit_transactions or self.in_transaction:
+            return
+        if sql.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            self.raw.begin()
+            self.in_transaction = True
+
+    def commit(self):
+        if self.backend.implicit_transactions or self.in_transaction:
+            self.raw.commit()
+        self.in_transaction = False
+
+    def rollback(self):
+        if self.backend.implicit_transactions or self.in_transaction:
+            self.raw.rollback()
+        self.in_transaction = False
+
+    def ping(self, reconnect=True, attempts=1, delay=0):
+        pass
+
+    def is_connected(self):
+        return self.raw is not None
+
+    def close(self):
+        if self.raw is not None:
+            self.raw.close()
+            self.raw = None
+
+
+class EmbeddedCursor:
+    """
+    The subset of the mysql.connector cursor API the pipeline uses, translating SQL on the way.
+    """
+
+    def __init__(self, connection, raw, dictionary=False):
+        self.connection = connection
+        self.backend = connection.backend
+        self.raw = raw
+        self.dictionary = dictionary
+
+    def execute(self, sql, params=()):
+        try:
+            self.connection.begin(sql)
+            self.raw.execute(self.backend.translate(sql), tuple(params or ()))
+        except self.backend.errors as e:
+            raise self.backend.wrap_error(e) from e
+
+    def executemany(self, sql, seq_params):
+        seq_params = [tuple(params) for params in seq_params]
+        if not seq_params:
+            return
+        try:
+            self.connection.begin(sql)
+            self.backend.executemany(self.raw, sql, seq_params)
+        except self.backend.errors as e:
+            raise self.backend.wrap_error(e) from e
+
+    @property
+    def description(self):
+        return self.raw.description
+
+    @property
+    def with_rows(self):
+        return self.raw.description is not None
+
+    @property
+    def lastrowid(self):
+        return getattr(self.raw, "lastrowid", None)
 
-df.to_csv('Spotify.csv', index=False)
+    @property
+    def rowcount(self):
+        return self.raw.rowcount
+
+    def as_dicts(self, rows):
+        if not self.dictionary:
+            return rows
+        columns = [desc[0] for desc in self.raw.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def fetchall(self):
+        return self.as_dicts(self.raw.fetchall())
+
+    def fetchmany(self, size=1):
+        return self.as_dicts(self.raw.fetchmany(size))
+
+    def fetchone(self):
+        row = self.raw.fetchone()
+        return None if row is None else self.as_dicts([row])[0]
+
+    def close(self):
+        if self.raw is not self.connection.raw:
+            self.raw.close()
+
+
+EMBEDDED_BACKENDS = {"sqlite": SQLiteBackend(), "duckdb": DuckDBBackend()}
+
+
+##________________________________________________________________________
+# STEP 2: CREATING DATABASE 
 
 def createdb(user: str, passw: str):
+    if BACKEND != "mysql":
+        # The embedded engines create their database file on first connect
+        print(f"Using the embedded {BACKEND} database {EMBEDDED_BACKENDS[BACKEND].database_path()}")
+        return
     db = None
     try:
-        db = mysql.connect(host="localhost", user=user, passwd=passw)
+        db = get_connection(user, passw, use_database=False)
         curs = db.cursor()
-        curs.execute("CREATE DATABASE IF NOT EXISTS Spotify")
+        curs.execute(f"CREATE DATABASE IF NOT EXISTS {DB_NAME}")
         print("Database created or already exists")
     except Error as e:
         print("Error:", e)
@@ -139,7 +1014,7 @@ def createdb(user: str, passw: str):
         if db is not None and db.is_connected():
             curs.close()
             db.close()
-            print("MySQL connection is closed")
+            print("Database connection released.")
 
 
 ##________________________________________________________________________
@@ -148,7 +1023,7 @@ def createdb(user: str, passw: str):
 def creattables(user: str, passw: str):
     db = None
     try:
-        db = mysql.connect(host="localhost", user=user, passwd=passw, database="Spotify")
+        db = get_connection(user, passw)
         curs = db.cursor()
 
         artist_table = """
@@ -186,7 +1061,10 @@ def creattables(user: str, passw: str):
             Streams BIGINT NOT NULL, 
             Deezer_Charts INT NOT NULL,
             Deezer_Playlists INT NOT NULL,
-            Shazam_Charts INT NOT NULL
+            Shazam_Charts INT NOT NULL,
+            Platform_Presence VARCHAR(30) NOT NULL,
+            Dominant_Platform VARCHAR(20) NOT NULL,
+            Released_Year SMALLINT NOT NULL
         );
         """
 
@@ -205,188 +1083,2569 @@ def creattables(user: str, passw: str):
             Energy SMALLINT NOT NULL,
             Released_Day SMALLINT NOT NULL,
             Released_Month SMALLINT NOT NULL,
-            Released_Year SMALLINT NOT NULL
+            Released_Year SMALLINT NOT NULL,
+            Energy_Category VARCHAR(20) NOT NULL
         );
         """
+        if PARTITION_BY_YEAR and BACKEND == "mysql":
+            info_table = partitioned_table(info_table, "Info_ID")
+            profile_table = partitioned_table(profile_table, "Profile_ID")
+        elif PARTITION_BY_YEAR:
+            print(f"{BACKEND} has no table partitioning; year windows use the Released_Year indexes instead.")
         curs.execute(artist_table)
         curs.execute(track_table)
         curs.execute(info_table)
         curs.execute(profile_table)
         curs.execute(released_by_table)
+        ensure_indexes(curs)
+        create_summary_tables(curs)
 
         print("Tables created successfully.")
     except Error as e:
         print("Error", e)
     finally:
-        if db.is_connected():
+        if db is not None and db.is_connected():
             curs.close()
             db.close()
-            print("MySQL connection is closed")
+            print("Database connection released.")
 
 
 
-##________________________________________________________________________
-# STEP 4: LOADING DATA INTO TABLES
-
-def dataload(user: str, passwd: str, csv_file: str):
-    """
-    Load data from a CSV file into the database.
-    """
-    try:
-        db = mysql.connect(
-            host="localhost",
-            user=user,
-            passwd=passwd,
-            database="Spotify"
-        )
-        cursor = db.cursor()
+##__________________________________________________
+# 3.1 Indexes and foreign keys derived from the query workload
 
-        with open(csv_file, mode='r', encoding='utf-8') as file:
-            csv_reader = csv.DictReader(file)
+# (table, index name, columns): every query joins on the shared Track/Info/Profile ID,
+# the rest serve the WHERE / GROUP BY / ORDER BY columns of the menu queries
+INDEXES = [
+    ("TrackProfile", "idx_profile_year", "Released_Year, Bpm, Danceability"),             # query 1 (covering)
+    ("TrackProfile", "idx_profile_month", "Released_Month"),                               # query 9
+    ("TrackProfile", "idx_profile_energy_category", "Energy_Category"),                    # queries 7, 8
+    ("TrackProfile", "idx_profile_liveliness", "Liveliness"),                              # query 5
+    ("StreamingInfo", "idx_info_streams", "Streams, Spotify_Playlists, Apple_Playlists, Deezer_Playlists"),  # queries 4, 7, 10 (top-N covering)
+    ("StreamingInfo", "idx_info_shazam", "Shazam_Charts, Streams"),                        # query 2 (top-N covering)
+    ("StreamingInfo", "idx_info_spotify_playlists", "Spotify_Playlists"),                  # query 6
+    ("StreamingInfo", "idx_info_presence", "Platform_Presence, Streams"),                  # query 8 (range scan on the IN list)
+    ("StreamingInfo", "idx_info_dominant", "Dominant_Platform, Streams"),                  # query 10 (covering)
+    ("StreamingInfo", "idx_info_year", "Released_Year, Streams"),                          # year windows (see 3.3)
+    ("Track", "idx_track_name", "Track_Name"),                                             # queries 2, 3, 10
+    ("Released_By", "idx_released_by_artist", "Artist_Name, Track_ID"),                    # query 6, artist-first lookups
+]
 
-            for row in csv_reader:
+# (table, constraint name, column, referenced column): StreamingInfo and TrackProfile share Track's ID
+FOREIGN_KEYS = [
+    ("StreamingInfo", "fk_info_track", "Info_ID", "Track(Track_ID)"),
+    ("TrackProfile", "fk_profile_track", "Profile_ID", "Track(Track_ID)"),
+]
 
-                track_insert_query = """
-                INSERT IGNORE INTO Track (Track_Name, Cover_URL, Artist_Count)
-                VALUES (%s, %s, %s)
-                """
+def ensure_indexes(curs):
+    """
+    Adds every index in INDEXES and foreign key in FOREIGN_KEYS that the current
+    database does not have yet, so it is safe to run again on an existing database.
+    """
+    if BACKEND != "mysql":
+        # Embedded engines: plain indexes only, they cannot add foreign keys to existing tables
+        for table, name, columns in INDEXES:
+            curs.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        print(f"Indexes in place ({len(INDEXES)} checked).")
+        return
+    curs.execute(
+        "SELECT TABLE_NAME, INDEX_NAME FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE()"
+    )
+    existing = {(table, name) for table, name in curs.fetchall()}
+    curs.execute(
+        "SELECT TABLE_NAME, CONSTRAINT_NAME FROM information_schema.TABLE_CONSTRAINTS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND CONSTRAINT_TYPE = 'FOREIGN KEY'"
+    )
+    existing.update((table, name) for table, name in curs.fetchall())
+    # MySQL has no foreign keys on partitioned tables (see 3.3)
+    curs.execute(
+        "SELECT DISTINCT TABLE_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND PARTITION_NAME IS NOT NULL"
+    )
+    partitioned = {table for (table,) in curs.fetchall()}
 
-                cursor.execute(track_insert_query, (
-                    row['track_name'],
-                    row['cover_url'],
-                    row['artist_count']
-                ))
+    added = 0
+    for table, name, column, reference in FOREIGN_KEYS:
+        if (table, name) not in existing and table not in partitioned:
+            try:
+                curs.execute(
+                    f"ALTER TABLE {table} ADD CONSTRAINT {name} "
+                    f"FOREIGN KEY ({column}) REFERENCES {reference} ON DELETE CASCADE"
+                )
+                added += 1
+            except Error as e:
+                # e.g. rows without a matching Track; the indexes below are still worth adding
+                print(f"Could not add foreign key {name}:", e)
+    for table, name, columns in INDEXES:
+        if (table, name) not in existing:
+            curs.execute(f"ALTER TABLE {table} ADD INDEX {name} ({columns})")
+            added += 1
+    print(f"Indexes and foreign keys in place ({added} added).")
 
-                track_id = cursor.lastrowid
+def explain_queries(curs, queries):
+    """
+    Prints the EXPLAIN plan of every menu query.
+    """
+    for query_id, entry in queries.items():
+        query, params = query_statement(entry["query"], entry)
+        curs.execute("EXPLAIN " + query.strip().rstrip(";"), params)
+        columns = [desc[0] for desc in curs.description]
+        print(Fore.BLUE + f"\nQuery {query_id}: {entry['description'].strip()}" + Style.RESET_ALL)
+        print(tabulate(curs.fetchall(), headers=columns, tablefmt="fancy_grid"))
 
-                artist_names = [artist.strip() for artist in row['artist(s)_name'].split(',')]
+def add_indexes(user: str, passw: str, show_explain: bool = True):
+    """
+    Adds the workload indexes to an existing database, printing the query plans before and after.
+    The derived columns the queries read (see 3.2) are added first when the database predates them.
+    """
+    db = None
+    try:
+        db = get_connection(user, passw)
+        curs = db.cursor()
+        if not use_stored_energy_thresholds(curs):
+            return
+        ensure_derived_columns(curs)
+        db.commit()
+        if show_explain:
+            print(Fore.YELLOW + "Query plans BEFORE adding indexes:" + Style.RESET_ALL)
+            explain_queries(curs, QUERIES)
+        ensure_indexes(curs)
+        db.commit()
+        if show_explain:
+            print(Fore.YELLOW + "Query plans AFTER adding indexes:" + Style.RESET_ALL)
+            explain_queries(curs, QUERIES)
+    except Error as e:
+        print("Error", e)
+    finally:
+        if db is not None and db.is_connected():
+            curs.close()
+            db.close()
+            print("Database connection released.")
+
+
+##__________________________________________________
+# 3.2 Derived columns: the CASE buckets of queries 7, 8 and 10, stored and indexed at load time
+
+ENERGY_LOW = 30           # Energy below this is 'Low Energy'
+ENERGY_HIGH = 70          # Energy above this is 'High Energy'; in between (inclusive) is 'Medium Energy'
+ENERGY_THRESHOLDS_GIVEN = False   # set by the CLI when --energy-low/--energy-high were passed
+
+# The thresholds the stored Energy_Category values were computed with: every load and the
+# analytics engine use these, and only derive changes them
+ENERGY_THRESHOLDS_TABLE = """
+CREATE TABLE IF NOT EXISTS Energy_Thresholds(
+    Id SMALLINT PRIMARY KEY,
+    Energy_Low INT NOT NULL,
+    Energy_High INT NOT NULL
+);
+"""
+
+def stored_energy_thresholds(curs):
+    """
+    Returns the (low, high) thresholds stored in the database, or None before the first load
+    (creating the table in a database loaded before it existed).
+    """
+    curs.execute(ENERGY_THRESHOLDS_TABLE)
+    curs.execute("SELECT Energy_Low, Energy_High FROM Energy_Thresholds WHERE Id = 1")
+    rows = curs.fetchall()
+    return (rows[0][0], rows[0][1]) if rows else None
+
+def store_energy_thresholds(curs):
+    """
+    Records ENERGY_LOW / ENERGY_HIGH as the thresholds of the database. The caller commits.
+    """
+    curs.execute("DELETE FROM Energy_Thresholds WHERE Id = 1")
+    curs.execute("INSERT INTO Energy_Thresholds (Id, Energy_Low, Energy_High) VALUES (1, %s, %s)",
+                 (ENERGY_LOW, ENERGY_HIGH))
+
+def use_stored_energy_thresholds(curs):
+    """
+    Makes a load categorize with the thresholds stored in the database, and stores the
+    current ones on the first load. Returns False, after saying why, when --energy-low /
+    --energy-high asked for other thresholds than the stored ones (derive changes them).
+    """
+    global ENERGY_LOW, ENERGY_HIGH
+    stored = stored_energy_thresholds(curs)
+    if stored is None:
+        store_energy_thresholds(curs)
+        return True
+    if stored != (ENERGY_LOW, ENERGY_HIGH):
+        if ENERGY_THRESHOLDS_GIVEN:
+            print(f"Error: the database was loaded with energy thresholds {stored[0]} / {stored[1]}, "
+                  f"not {ENERGY_LOW} / {ENERGY_HIGH}; run derive to change them.")
+            return False
+        ENERGY_LOW, ENERGY_HIGH = stored
+    return True
+
+def database_energy_thresholds():
+    """
+    Returns the thresholds stored in the database, or ENERGY_LOW / ENERGY_HIGH when there is
+    no loaded database to read them from.
+    """
+    if BACKEND != "mysql" and not os.path.exists(EMBEDDED_BACKENDS[BACKEND].database_path()):
+        return ENERGY_LOW, ENERGY_HIGH
+    db = None
+    try:
+        db = get_connection(user, password)
+        curs = db.cursor(buffered=True)
+        curs.execute("SELECT Energy_Low, Energy_High FROM Energy_Thresholds WHERE Id = 1")
+        rows = curs.fetchall()
+        stored = (rows[0][0], rows[0][1]) if rows else None
+        curs.close()
+    except Error:
+        stored = None
+    finally:
+        if db is not None:
+            db.close()
+    return stored or (ENERGY_LOW, ENERGY_HIGH)
+
+def energy_category(energy):
+    if energy < ENERGY_LOW:
+        return 'Low Energy'
+    if energy <= ENERGY_HIGH:
+        return 'Medium Energy'
+    return 'High Energy'
+
+def platform_presence(spotify_charts, deezer_charts, apple_charts):
+    charted = (spotify_charts > 0) + (deezer_charts > 0) + (apple_charts > 0)
+    if charted == 1 and min(spotify_charts, deezer_charts, apple_charts) == 0:
+        return 'Single-Platform Presence'
+    if charted >= 2:
+        return 'Multi-Platform Presence'
+    return 'Other'
+
+def dominant_platform(spotify_playlists, apple_playlists, deezer_playlists):
+    if spotify_playlists > apple_playlists and spotify_playlists > deezer_playlists:
+        return 'Spotify'
+    if apple_playlists > spotify_playlists and apple_playlists > deezer_playlists:
+        return 'Apple Music'
+    if deezer_playlists > spotify_playlists and deezer_playlists > apple_playlists:
+        return 'Deezer'
+    return 'Tied'
+
+# The same rules in SQL, to fill the columns of rows already in the database
+# ({low} and {high} are replaced by the thresholds above)
+ENERGY_CATEGORY_SQL = """
+    CASE
+        WHEN Energy < {low} THEN 'Low Energy'
+        WHEN Energy BETWEEN {low} AND {high} THEN 'Medium Energy'
+        ELSE 'High Energy'
+    END"""
+
+PLATFORM_PRESENCE_SQL = """
+    CASE
+        WHEN
+            (Spotify_Charts = 0 AND Deezer_Charts = 0 AND Apple_Charts > 0) OR
+            (Spotify_Charts = 0 AND Deezer_Charts > 0 AND Apple_Charts = 0) OR
+            (Spotify_Charts > 0 AND Deezer_Charts = 0 AND Apple_Charts = 0)
+        THEN 'Single-Platform Presence'
+        WHEN
+            (Spotify_Charts > 0 AND Deezer_Charts > 0) OR
+            (Spotify_Charts > 0 AND Apple_Charts > 0) OR
+            (Deezer_Charts > 0 AND Apple_Charts > 0)
+        THEN 'Multi-Platform Presence'
+        ELSE 'Other'
+    END"""
+
+DOMINANT_PLATFORM_SQL = """
+    CASE
+        WHEN Spotify_Playlists > Apple_Playlists AND Spotify_Playlists > Deezer_Playlists THEN 'Spotify'
+        WHEN Apple_Playlists > Spotify_Playlists AND Apple_Playlists > Deezer_Playlists THEN 'Apple Music'
+        WHEN Deezer_Playlists > Spotify_Playlists AND Deezer_Playlists > Apple_Playlists THEN 'Deezer'
+        ELSE 'Tied'
+    END"""
+
+# (table, column, SQL type, expression over the row)
+DERIVED_COLUMNS = [
+    ("TrackProfile", "Energy_Category", "VARCHAR(20)", ENERGY_CATEGORY_SQL),
+    ("StreamingInfo", "Platform_Presence", "VARCHAR(30)", PLATFORM_PRESENCE_SQL),
+    ("StreamingInfo", "Dominant_Platform", "VARCHAR(20)", DOMINANT_PLATFORM_SQL),
+    # The track's year, copied so StreamingInfo can be filtered and partitioned by it (see 3.3)
+    ("StreamingInfo", "Released_Year", "SMALLINT",
+     "(SELECT tp.Released_Year FROM TrackProfile tp WHERE tp.Profile_ID = StreamingInfo.Info_ID)"),
+]
+
+def update_derived_columns(curs, only_missing=True):
+    """
+    Computes the derived columns in SQL, only where they are NULL or (only_missing=False)
+    for every row, e.g. after the thresholds changed. The caller commits.
+    """
+    for table, column, _, expression in DERIVED_COLUMNS:
+        condition = f" WHERE {column} IS NULL" if only_missing else ""
+        curs.execute(f"UPDATE {table} SET {column} = "
+                     f"{expression.format(low=ENERGY_LOW, high=ENERGY_HIGH)}{condition}")
+
+def ensure_derived_columns(curs):
+    """
+    Adds the derived columns a database created before they existed is missing, and fills them.
+    """
+    added = 0
+    for table, column, sql_type, _ in DERIVED_COLUMNS:
+        curs.execute(f"SELECT * FROM {table} LIMIT 0")
+        names = {desc[0].lower() for desc in curs.description}
+        curs.fetchall()
+        if column.lower() not in names:
+            curs.execute(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}")
+            added += 1
+    update_derived_columns(curs)
+    print(f"Derived columns in place ({added} added).")
+
+def refresh_derived_columns(user: str, passwd: str):
+    """
+    Recomputes every derived column with the thresholds given by --energy-low/--energy-high
+    (the stored ones otherwise), stores them for later loads and rebuilds the summary
+    tables, whose energy rollups are grouped by them.
+    """
+    global ENERGY_LOW, ENERGY_HIGH
+    db = None
+    try:
+        db = get_connection(user, passwd)
+        curs = db.cursor()
+        stored = stored_energy_thresholds(curs)
+        if stored is not None and not ENERGY_THRESHOLDS_GIVEN:
+            ENERGY_LOW, ENERGY_HIGH = stored
+        ensure_derived_columns(curs)
+        update_derived_columns(curs, only_missing=False)
+        store_energy_thresholds(curs)
+        ensure_indexes(curs)
+        rebuild_summaries(curs)
+        bump_dataset_version(curs)
+        db.commit()
+        print(f"Derived columns recomputed with energy thresholds {ENERGY_LOW} / {ENERGY_HIGH}.")
+    except Error as e:
+        print("Error:", e)
+    finally:
+        if db is not None and db.is_connected():
+            curs.close()
+            db.close()
+
+
+##__________________________________________________
+# 3.3 Year-range partitioning and year windows: recent-year queries only read recent rows
+
+PARTITION_BY_YEAR = False   # create TrackProfile and StreamingInfo RANGE-partitioned on Released_Year (MySQL)
+# Upper bounds (exclusive) of the year partitions: decades for the old catalogue, single years for
+# the recent charts. Later years go to the last partition; split it with REORGANIZE PARTITION.
+YEAR_PARTITIONS = (1990, 2000, 2010, 2015, 2018, 2020, 2021, 2022, 2023, 2024)
+YEAR_PARTITIONED_TABLES = ("TrackProfile", "StreamingInfo")
+
+YEAR_FROM = None          # first Released_Year the menu queries look at (None: no lower bound)
+YEAR_TO = None            # last Released_Year the menu queries look at (None: no upper bound)
+
+def year_partition_clause():
+    partitions = [f"PARTITION before_{bound} VALUES LESS THAN ({bound})" for bound in YEAR_PARTITIONS]
+    partitions.append("PARTITION later VALUES LESS THAN MAXVALUE")
+    return "PARTITION BY RANGE (Released_Year) (\n            " + ",\n            ".join(partitions) + "\n        )"
+
+def partitioned_table(create_sql, id_column):
+    """
+    Turns the CREATE TABLE of TrackProfile or StreamingInfo into its partitioned form. MySQL wants
+    the partitioning column in the primary key, so the shared ID becomes (ID, Released_Year).
+    """
+    sql = create_sql.replace(f"{id_column} INT AUTO_INCREMENT PRIMARY KEY", f"{id_column} INT AUTO_INCREMENT")
+    sql = sql.rstrip().rstrip(";").rstrip()
+    return (f"{sql[:-1].rstrip()},\n            PRIMARY KEY ({id_column}, Released_Year)\n"
+            f"        ) {year_partition_clause()};")
+
+class YearWindow:
+    """
+    The YEAR_FROM / YEAR_TO window as a SQL condition. The menu queries hold "{years:<alias>}"
+    placeholders for every year-carrying table they read, so each table's scan is pruned to the
+    partitions (or the Released_Year index range) of the window on its own. The years themselves
+    are bound parameters (see 4.13): only whether each bound is set changes the SQL text.
+    """
+
+    def __init__(self, start=None, end=None):
+        self.start = start
+        self.end = end
+
+    def __bool__(self):
+        return self.start is not None or self.end is not None
+
+    def __format__(self, alias):
+        column = f"{alias}.Released_Year" if alias else "Released_Year"
+        if self.start is not None and self.end is not None:
+            return f"{column} BETWEEN %(year_from)s AND %(year_to)s"
+        if self.start is not None:
+            return f"{column} >= %(year_from)s"
+        if self.end is not None:
+            return f"{column} <= %(year_to)s"
+        return "1 = 1"
+
+def year_partitions(curs, table):
+    """
+    Returns the (name, upper bound) of the year partitions of a table, oldest first; empty if it has none.
+    """
+    if BACKEND != "mysql":
+        return []
+    curs.execute(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION",
+        (table,)
+    )
+    return [(name, bound) for name, bound in curs.fetchall()]
+
+def exchange_old_partitions(curs, table, archive, before_year):
+    """
+    Swaps the partitions of `table` that end at or before `before_year` out into the new
+    table `archive` and drops them: the rows change tables without being copied or deleted.
+    Returns False when no whole partition is that old, or when `archive` already exists
+    (a partition can only be exchanged with an empty table, so it is appended to by copying).
+    """
+    old = [name for name, bound in year_partitions(curs, table)
+           if bound != "MAXVALUE" and int(bound) <= before_year]
+    if not old:
+        return False
+    curs.execute(
+        "SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (archive,)
+    )
+    if curs.fetchone()[0]:
+        return False
+    if len(old) > 1:
+        # Only the archived rows are rewritten, into one partition that can be exchanged at once
+        last_bound = dict(year_partitions(curs, table))[old[-1]]
+        curs.execute(f"ALTER TABLE {table} REORGANIZE PARTITION {', '.join(old)} "
+                     f"INTO (PARTITION {old[-1]} VALUES LESS THAN ({last_bound}))")
+    curs.execute(f"CREATE TABLE {archive} LIKE {table}")
+    curs.execute(f"ALTER TABLE {archive} REMOVE PARTITIONING")
+    curs.execute(f"ALTER TABLE {table} EXCHANGE PARTITION {old[-1]} WITH TABLE {archive}")
+    curs.execute(f"ALTER TABLE {table} DROP PARTITION {old[-1]}")
+    return True
+
+def archive_years(user: str, passwd: str, before_year: int):
+    """
+    Moves the TrackProfile and StreamingInfo rows released before `before_year` into
+    <table>_Archive_<before_year> tables, so the menu queries no longer read them.
+    Whole partitions are exchanged out; rows in a partition that is only partly older
+    (and every row on unpartitioned tables) are copied and deleted. Running it again
+    appends to the existing archive tables. The Track_Key entries of the archived tracks
+    move to Track_Key_Archive_<before_year>, so an incremental load inserts such a track
+    as a new one. Track and Released_By keep their rows; the summary tables are rebuilt.
+    """
+    before_year = int(before_year)
+    db = None
+    try:
+        db = get_connection(user, passwd)
+        curs = db.cursor()
+        archived = {}
+        for table in YEAR_PARTITIONED_TABLES:
+            archive = f"{table}_Archive_{before_year}"
+            if exchange_old_partitions(curs, table, archive, before_year):
+                moved_before = 0
+            else:
+                curs.execute(f"CREATE TABLE IF NOT EXISTS {archive} AS SELECT * FROM {table} WHERE 1 = 0")
+                curs.execute(f"SELECT COUNT(*) FROM {archive}")
+                moved_before = curs.fetchone()[0]
+            curs.execute(f"INSERT INTO {archive} SELECT * FROM {table} WHERE Released_Year < {before_year}")
+            curs.execute(f"DELETE FROM {table} WHERE Released_Year < {before_year}")
+            curs.execute(f"SELECT COUNT(*) FROM {archive}")
+            archived[table] = curs.fetchone()[0] - moved_before
+
+        # Keys of archived tracks would otherwise match incoming rows that have no StreamingInfo row to update
+        key_archive = f"Track_Key_Archive_{before_year}"
+        archived_ids = f"SELECT Info_ID FROM StreamingInfo_Archive_{before_year}"
+        curs.execute(TRACK_KEY_TABLE)
+        curs.execute(f"CREATE TABLE IF NOT EXISTS {key_archive} AS SELECT * FROM Track_Key WHERE 1 = 0")
+        curs.execute(f"INSERT INTO {key_archive} SELECT * FROM Track_Key WHERE Track_ID IN ({archived_ids})")
+        curs.execute(f"DELETE FROM Track_Key WHERE Track_ID IN ({archived_ids})")
+        rebuild_summaries(curs)
+        bump_dataset_version(curs)
+        db.commit()
+        print(f"Archived the rows released before {before_year}: "
+              + ", ".join(f"{count} from {table}" for table, count in archived.items()) + ".")
+    except Error as e:
+        print("Error:", e)
+    finally:
+        if db is not None and db.is_connected():
+            curs.close()
+            db.close()
+
+
+##________________________________________________________________________
+# STEP 4: LOADING DATA INTO TABLES
+
+def dataload(user: str, passwd: str, csv_file: str):
+    """
+    Load data from a CSV file into the database.
+    """
+    db = None
+    try:
+        db = get_connection(user, passwd)
+        cursor = db.cursor()
+        if not use_stored_energy_thresholds(cursor):
+            return
+        artists = ArtistInterner().preload(cursor)
+        released_by_pairs = []
+
+        with open(csv_file, mode='r', encoding='utf-8') as file:
+            csv_reader = csv.DictReader(file)
+
+            for row in csv_reader:
+
+                track_insert_query = """
+                INSERT IGNORE INTO Track (Track_Name, Cover_URL, Artist_Count)
+                VALUES (%s, %s, %s)
+                """
+
+                cursor.execute(track_insert_query, (
+                    row['track_name'],
+                    row['cover_url'],
+                    row['artist_count']
+                ))
+
+                track_id = cursor.lastrowid
+
+                artist_names = [artist.strip() for artist in row['artist(s)_name'].split(',')]
+
+                for artist_name in artists.intern(artist_names):
+                    artist_insert_query = """
+                    INSERT IGNORE INTO Artist (Artist_Name)
+                    VALUES (%s)
+                    """
+                    cursor.execute(artist_insert_query, (artist_name,))
+
+                released_by_pairs.extend((track_id, artist_name) for artist_name in artist_names)
+
+
+                info_insert_query = """
+                INSERT IGNORE INTO StreamingInfo (Apple_Playlists, Apple_Charts, Spotify_Charts, Spotify_Playlists, Streams, Deezer_Charts, Deezer_Playlists, Shazam_Charts, Platform_Presence, Dominant_Platform, Released_Year)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """
+
+                cursor.execute(info_insert_query, (
+                    row['in_apple_playlists'],
+                    row['in_apple_charts'],
+                    row['in_spotify_charts'],
+                    row['in_spotify_playlists'],
+                    row['streams'],
+                    row['in_deezer_charts'],
+                    int(row['in_deezer_playlists'].replace("," , "")),  
+                    row['in_shazam_charts'],
+                    platform_presence(parse_count(row['in_spotify_charts']), parse_count(row['in_deezer_charts']),
+                                      parse_count(row['in_apple_charts'])),
+                    dominant_platform(parse_count(row['in_spotify_playlists']), parse_count(row['in_apple_playlists']),
+                                      parse_count(row['in_deezer_playlists'])),
+                    row['released_year']
+                ))
+
+                profile_insert_query = """
+                INSERT IGNORE INTO TrackProfile (
+                    Liveliness, Instrumentalness, Mode, Music_Key, Bpm, Speechiness, Acoustiness, Valence, Danceability,
+                    Energy, Released_Day, Released_Month, Released_Year, Energy_Category
+                )
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """
+   
+                cursor.execute(profile_insert_query, (
+                    row['liveness_%'],
+                    row['instrumentalness_%'],
+                    row['mode'],
+                    row['key'],
+                    row['bpm'],
+                    row['speechiness_%'],
+                    row['acousticness_%'],
+                    row['valence_%'],
+                    row['danceability_%'],
+                    row['energy_%'],
+                    row['released_day'],
+                    row['released_month'],
+                    row['released_year'],
+                    energy_category(parse_count(row['energy_%']))
+                ))
+
+        released_by_insert_query = """
+        INSERT IGNORE INTO Released_By (Track_ID, Artist_Name)
+        VALUES (%s, %s)
+        """
+        cursor.executemany(released_by_insert_query, released_by_pairs)
+
+        refresh_summaries(cursor)
+        bump_dataset_version(cursor)
+        db.commit()
+        artists.report()
+        print("Data loaded successfully into the database.")
+
+    except Error as e:
+        print("Error:", e)
+
+    finally:
+        if db is not None and db.is_connected():
+            cursor.close()
+            db.close()
+            print("Database connection released.")
+
+
+##__________________________________________________
+# 4.1 Bulk loading: batched multi-row inserts or LOAD DATA LOCAL INFILE staging
+
+TRACK_COLUMNS = ("Track_ID", "Track_Name", "Cover_URL", "Artist_Count")
+RELEASED_BY_COLUMNS = ("Track_ID", "Artist_Name")
+INFO_COLUMNS = (
+    "Info_ID", "Apple_Playlists", "Apple_Charts", "Spotify_Charts", "Spotify_Playlists",
+    "Streams", "Deezer_Charts", "Deezer_Playlists", "Shazam_Charts", "Platform_Presence", "Dominant_Platform",
+    "Released_Year"
+)
+PROFILE_COLUMNS = (
+    "Profile_ID", "Liveliness", "Instrumentalness", "Mode", "Music_Key", "Bpm", "Speechiness",
+    "Acoustiness", "Valence", "Danceability", "Energy", "Released_Day", "Released_Month", "Released_Year",
+    "Energy_Category"
+)
+
+
+def parse_count(value):
+    """
+    Parses counts written as "1,021" (or "826.0" when pandas saw the column as float).
+    """
+    return int(float(str(value).replace(",", "")))
+
+
+def split_row(row, track_id):
+    """
+    Splits one CSV row into the values for every table. The same ID is used for
+    Track_ID, Info_ID and Profile_ID so the queries can keep joining on it.
+    """
+    artist_names = [artist.strip() for artist in row['artist(s)_name'].split(',')]
+    track = (track_id, row['track_name'], row['cover_url'], row['artist_count'])
+    released_by = [(track_id, artist_name) for artist_name in artist_names]
+    info = (
+        track_id,
+        row['in_apple_playlists'],
+        row['in_apple_charts'],
+        row['in_spotify_charts'],
+        row['in_spotify_playlists'],
+        row['streams'],
+        row['in_deezer_charts'],
+        parse_count(row['in_deezer_playlists']),
+        parse_count(row['in_shazam_charts']),
+        platform_presence(parse_count(row['in_spotify_charts']), parse_count(row['in_deezer_charts']),
+                          parse_count(row['in_apple_charts'])),
+        dominant_platform(parse_count(row['in_spotify_playlists']), parse_count(row['in_apple_playlists']),
+                          parse_count(row['in_deezer_playlists'])),
+        row['released_year']
+    )
+    profile = (
+        track_id,
+        row['liveness_%'],
+        row['instrumentalness_%'],
+        row['mode'],
+        row['key'],
+        row['bpm'],
+        row['speechiness_%'],
+        row['acousticness_%'],
+        row['valence_%'],
+        row['danceability_%'],
+        row['energy_%'],
+        row['released_day'],
+        row['released_month'],
+        row['released_year'],
+        energy_category(parse_count(row['energy_%']))
+    )
+    return track, artist_names, released_by, info, profile
+
+
+def insert_sql(table, columns, ignore=False):
+    """
+    Builds an INSERT statement that executemany() can rewrite into one multi-row INSERT.
+    """
+    placeholders = ", ".join(["%s"] * len(columns))
+    return "INSERT {}INTO {} ({}) VALUES ({})".format(
+        "IGNORE " if ignore else "", table, ", ".join(columns), placeholders
+    )
+
+
+def next_track_id(cursor):
+    """
+    Returns the first free ID shared by Track, StreamingInfo and TrackProfile.
+    """
+    cursor.execute(
+        "SELECT GREATEST("
+        "(SELECT COALESCE(MAX(Track_ID), 0) FROM Track), "
+        "(SELECT COALESCE(MAX(Info_ID), 0) FROM StreamingInfo), "
+        "(SELECT COALESCE(MAX(Profile_ID), 0) FROM TrackProfile))"
+    )
+    return int(cursor.fetchone()[0]) + 1
+
+
+ARTIST_CACHE_SIZE = 500_000   # artist names the loader remembers (oldest unused ones are forgotten first)
+
+
+class ArtistInterner:
+    """
+    Remembers which artists are already in the Artist table so the loaders send each one only once.
+    Preloaded from the table for incremental loads and bounded to max_entries names (least recently
+    seen are dropped first); a forgotten artist is at worst sent again, which INSERT IGNORE absorbs.
+    """
+
+    def __init__(self, max_entries: int = ARTIST_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.known = OrderedDict()
+        self.sent = 0
+        self.skipped = 0
+
+    def preload(self, cursor):
+        """
+        Fills the cache with the artists already stored, up to max_entries of them.
+        """
+        cursor.execute("SELECT Artist_Name FROM Artist LIMIT %s", (self.max_entries,))
+        for (artist_name,) in cursor.fetchall():
+            self.known[artist_name] = None
+        return self
+
+    def intern(self, artist_names):
+        """
+        Returns the names that still have to be sent to the database and remembers them as sent.
+        """
+        new_names = []
+        for artist_name in artist_names:
+            if artist_name in self.known:
+                self.known.move_to_end(artist_name)
+                self.skipped += 1
+            else:
+                self.known[artist_name] = None
+                new_names.append(artist_name)
+                self.sent += 1
+        while len(self.known) > self.max_entries:
+            self.known.popitem(last=False)
+        return new_names
+
+    def forget(self, artist_names):
+        """
+        Drops names whose insert was rolled back, so they are sent again when next seen.
+        """
+        for artist_name in artist_names:
+            self.known.pop(artist_name, None)
+
+    def report(self):
+        print(f"Artists sent to the database: {self.sent} (skipped {self.skipped} already known).")
+
+
+def flush_executemany(cursor, batch):
+    """
+    Sends one batch to the server with one multi-row INSERT per table.
+    """
+    cursor.executemany(insert_sql("Track", TRACK_COLUMNS), batch["tracks"])
+    cursor.executemany(insert_sql("Artist", ("Artist_Name",), ignore=True), [(a,) for a in batch["artists"]])
+    cursor.executemany(insert_sql("Released_By", RELEASED_BY_COLUMNS, ignore=True), batch["released_by"])
+    cursor.executemany(insert_sql("StreamingInfo", INFO_COLUMNS), batch["infos"])
+    cursor.executemany(insert_sql("TrackProfile", PROFILE_COLUMNS), batch["profiles"])
+
+
+def flush_load_data(cursor, batch, staging_dir):
+    """
+    Writes one batch to tab-separated staging files and loads each file with LOAD DATA LOCAL INFILE.
+    """
+    staged = [
+        ("Track", TRACK_COLUMNS, batch["tracks"], ""),
+        ("Artist", ("Artist_Name",), [(a,) for a in batch["artists"]], "IGNORE "),
+        ("Released_By", RELEASED_BY_COLUMNS, batch["released_by"], "IGNORE "),
+        ("StreamingInfo", INFO_COLUMNS, batch["infos"], ""),
+        ("TrackProfile", PROFILE_COLUMNS, batch["profiles"], ""),
+    ]
+    for table, columns, rows, ignore in staged:
+        path = os.path.join(staging_dir, f"{table}.tsv")
+        with open(path, mode='w', encoding='utf-8', newline='') as staging_file:
+            writer = csv.writer(staging_file, delimiter='\t', quotechar='"', lineterminator='\n')
+            writer.writerows(rows)
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE '{path}' {ignore}INTO TABLE {table} "
+            "CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY '\\t' OPTIONALLY ENCLOSED BY '\"' "
+            "LINES TERMINATED BY '\\n' "
+            f"({', '.join(columns)})"
+        )
+
+
+# MySQL errors caused by the values of a row. Strict mode reports most of them as plain
+# DatabaseError (HY000), like lock wait timeouts or a full disk, so they go by number
+ROW_ERRNOS = {
+    errorcode.ER_TRUNCATED_WRONG_VALUE_FOR_FIELD,   # 1366 Incorrect integer value
+    errorcode.ER_WARN_DATA_OUT_OF_RANGE,            # 1264
+    errorcode.WARN_DATA_TRUNCATED,                  # 1265
+    errorcode.ER_TRUNCATED_WRONG_VALUE,             # 1292
+    errorcode.ER_DATA_TOO_LONG,                     # 1406
+    errorcode.ER_NO_REFERENCED_ROW_2,               # 1452
+    errorcode.ER_DUP_ENTRY,                         # 1062
+}
+
+def is_row_error(e):
+    """
+    True when the database rejected the data itself rather than failing (connection, lock
+    timeout, full disk, syntax); everything else is re-raised and left to the checkpoint.
+    """
+    if isinstance(e, errors.DataError) or e.errno in ROW_ERRNOS:
+        return True
+    # The embedded engines have no MySQL error numbers; their constraint errors are IntegrityError
+    return BACKEND != "mysql" and isinstance(e, errors.IntegrityError)
+
+
+def bulk_load_rows(user: str, passwd: str, rows, batch_size: int = 5000, use_load_data: bool = False,
+                   first_id=None, concurrent: bool = False, checkpoint=None, quarantine_path=None):
+    """
+    Load an iterable of CSV-style row dicts into the database in batches instead of row by row.
+    IDs are assigned here (not by AUTO_INCREMENT) so Track_ID, Info_ID and Profile_ID
+    stay aligned. With use_load_data=True every batch is staged to files and sent
+    with LOAD DATA LOCAL INFILE; otherwise multi-row executemany() is used.
+    concurrent=True is used by the parallel loader (see 4.5): IDs start at first_id, every
+    batch is committed on its own and the summary tables are left to the coordinator.
+    With a checkpoint (see 4.6) every batch is committed together with the load position.
+    Rows that cannot be parsed go to the quarantine file. When batches are committed on their
+    own, a batch the database rejects is retried row by row and only the failing rows are quarantined.
+    Returns (rows loaded, seconds), or None if the load failed.
+    """
+    db = None
+    if use_load_data and BACKEND != "mysql":
+        print("LOAD DATA LOCAL INFILE needs the MySQL backend, using multi-row inserts instead.")
+        use_load_data = False
+    staging_dir = tempfile.mkdtemp(prefix="spotify_load_") if use_load_data else None
+    quarantine = Quarantine(quarantine_path)
+    commit_batches = concurrent or checkpoint is not None
+    try:
+        db = get_connection(user, passwd, local_infile=use_load_data)
+        cursor = db.cursor()
+        # The parallel loader's coordinator checked them and handed them to its workers
+        if not concurrent and not use_stored_energy_thresholds(cursor):
+            return None
+        start = time.perf_counter()
+        if checkpoint is not None:
+            checkpoint.restore(cursor)
+            if checkpoint.done:
+                return 0, time.perf_counter() - start
+        track_id = next_track_id(cursor) if first_id is None else first_id
+        if checkpoint is not None:
+            track_id = max(track_id, checkpoint.next_id)
+        artists = ArtistInterner().preload(cursor)
+        loaded = 0
+
+        def new_batch():
+            return {"tracks": [], "artists": [], "released_by": [], "infos": [], "profiles": [], "rows": []}
+
+        def write(batch):
+            if concurrent:
+                # Other workers insert artists too: commit ours first, in sorted order, so
+                # two workers never hold each other's artist rows locked in a cycle
+                cursor.executemany(insert_sql("Artist", ("Artist_Name",), ignore=True),
+                                   [(a,) for a in sorted(batch["artists"])])
+                db.commit()
+                batch["artists"] = []
+            if use_load_data:
+                flush_load_data(cursor, batch, staging_dir)
+            else:
+                flush_executemany(cursor, batch)
+
+        def commit(next_id, offset):
+            if checkpoint is not None:
+                checkpoint.save(cursor, next_id, offset, quarantine.count)
+            db.commit()
+            quarantine.flush()
+
+        def replay(batch):
+            # Only the rows the database refuses are quarantined, the rest of the batch is kept
+            for track, artist_names, released_by, info, profile, row, offset in batch["rows"]:
+                single = {"tracks": [track], "artists": list(artist_names), "released_by": released_by,
+                          "infos": [info], "profiles": [profile]}
+                try:
+                    write(single)
+                except Error as e:
+                    if not is_row_error(e):
+                        raise
+                    db.rollback()
+                    artists.forget(artist_names)
+                    quarantine.add(row, str(e).splitlines()[0])
+                commit(track[0] + 1, offset)
+
+        def flush(batch):
+            if not batch["rows"]:
+                return 0
+            try:
+                write(batch)
+            except Error as e:
+                if not (commit_batches and is_row_error(e)):
+                    raise
+                db.rollback()
+                rejected = quarantine.count
+                replay(batch)
+                return len(batch["rows"]) - (quarantine.count - rejected)
+            if commit_batches:
+                commit(track_id, batch["rows"][-1][-1])
+            return len(batch["rows"])
+
+        batch = new_batch()
+        for row in rows:
+            if None in row or None in row.values():
+                quarantine.add(row, "wrong number of fields")
+                continue
+            try:
+                track, artist_names, released_by, info, profile = split_row(row, track_id)
+            except (ValueError, KeyError, AttributeError) as e:
+                quarantine.add(row, f"{type(e).__name__}: {e}")
+                continue
+            batch["tracks"].append(track)
+            batch["artists"].extend(artists.intern(artist_names))
+            batch["released_by"].extend(released_by)
+            batch["infos"].append(info)
+            batch["profiles"].append(profile)
+            offset = checkpoint.position if checkpoint is not None else None
+            batch["rows"].append((track, artist_names, released_by, info, profile, row, offset))
+            track_id += 1
+
+            if len(batch["rows"]) >= batch_size:
+                loaded += flush(batch)
+                batch = new_batch()
+        loaded += flush(batch)
+        if not concurrent:
+            refresh_summaries(cursor)
+            if checkpoint is not None:
+                checkpoint.save(cursor, track_id, checkpoint.position, quarantine.count, finished=True)
+            bump_dataset_version(cursor)
+            db.commit()
+        elif checkpoint is not None:
+            checkpoint.save(cursor, track_id, checkpoint.position, quarantine.count, finished=True)
+            db.commit()
+        artists.report()
+        elapsed = time.perf_counter() - start
+        rate = loaded / elapsed if elapsed > 0 else float("inf")
+        print(f"Data loaded successfully into the database: {loaded} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec).")
+        return loaded, elapsed
+
+    except Error as e:
+        print("Error:", e)
+        if checkpoint is not None:
+            print("Batches committed so far are kept; run again with --resume to continue the load.")
+
+    finally:
+        quarantine.close()
+        if db is not None and db.is_connected():
+            cursor.close()
+            db.close()
+            print("Database connection released.")
+        if staging_dir is not None:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def iter_csv_rows(csv_file: str, start=None, end=None):
+    """
+    Yields (row dict, byte offset just past the row) for the rows of a CSV file, from
+    byte `start` (default: the first data row) up to byte `end`. Both must be row boundaries.
+    """
+    with open(csv_file, mode='rb') as file:
+        header = next(csv.reader([file.readline().decode('utf-8')]))
+        position = file.tell() if start is None else start
+        file.seek(position)
+        consumed = [position]
+
+        def lines():
+            # The csv reader pulls lines only as it needs them, so consumed[0] ends at the current row
+            for line in file:
+                if end is not None and consumed[0] >= end:
+                    return
+                consumed[0] += len(line)
+                yield line.decode('utf-8')
+
+        for row in csv.DictReader(lines(), fieldnames=header):
+            yield row, consumed[0]
+
+
+def bulk_dataload(user: str, passwd: str, csv_file: str, batch_size: int = 5000, use_load_data: bool = False,
+                  resume: bool = False, force: bool = False):
+    """
+    Load data from a cleaned CSV file into the database in batches, committing every batch
+    with a checkpoint. With resume=True an interrupted load of the same file continues after
+    its last committed batch instead of starting over. A file already loaded completely is
+    skipped while its content is unchanged; force=True loads it again. A CSV written by run_cleaning() is
+    read from its Arrow cache (see 1.8) instead of being parsed.
+    """
+    source = csv_file
+    if USE_CLEANED_CACHE and optional_module("pyarrow") is not None:
+        rows_path = cleaned_rows_path(csv_file)
+        if os.path.exists(rows_path):
+            print(f"Reading the rows of {csv_file} from the cache {rows_path}.")
+            source = rows_path
+    checkpoint = LoadCheckpoint(source, resume=resume, force=force)
+    return bulk_load_rows(user, passwd, checkpoint.rows(), batch_size=batch_size,
+                          use_load_data=use_load_data, checkpoint=checkpoint)
+
+
+##__________________________________________________
+# 4.2 Streaming load: chunked cleaning fed straight into the bulk loader
+
+def stream_dataload(user: str, passwd: str, csv_file, chunksize: int = 100_000,
+                    batch_size: int = 5000, use_load_data: bool = False, output_path=None):
+    """
+    Cleans a raw CSV chunk by chunk (see 1.6) and loads the surviving rows without
+    ever holding the whole file in memory. csv_file may also be an iterable of raw
+    DataFrame chunks. Pass output_path to also keep the cleaned CSV.
+    """
+    with tempfile.TemporaryDirectory(prefix="spotify_stream_") as spool_dir:
+        spool_path = os.path.join(spool_dir, "cleaned_chunks.csv")
+        winners = stream_clean_chunks(csv_file, spool_path, chunksize=chunksize)
+        rows = iter_deduplicated_rows(spool_path, winners, chunksize=chunksize, output_path=output_path)
+        return bulk_load_rows(user, passwd, rows, batch_size=batch_size, use_load_data=use_load_data)
+
+
+##__________________________________________________
+# 4.3 Load generation, bumped inside the transaction of every completed load
+
+# Kept in the database itself, so every process and working directory sees the generation
+# of the data it queries, and loads into other databases leave it alone. The token is drawn
+# when the table is created, so a database dropped and built again never repeats a version
+LOAD_GENERATION_TABLE = """
+CREATE TABLE IF NOT EXISTS Load_Generation(
+    Id SMALLINT PRIMARY KEY,
+    Token CHAR(32) NOT NULL,
+    Generation BIGINT NOT NULL
+);
+"""
+
+def create_load_generation(curs):
+    curs.execute(LOAD_GENERATION_TABLE)
+    curs.execute("INSERT IGNORE INTO Load_Generation (Id, Token, Generation) VALUES (1, %s, 0)",
+                 (uuid.uuid4().hex,))
+
+def dataset_version(curs):
+    """
+    Returns "<token>.<load generation>" for the data curs sees, or None when the database
+    has no Load_Generation row and results must not be cached.
+    """
+    try:
+        curs.execute("SELECT Token, Generation FROM Load_Generation WHERE Id = 1")
+        rows = curs.fetchall()
+    except Error:
+        return None
+    return f"{rows[0][0]}.{rows[0][1]}" if rows else None
+
+def bump_dataset_version(curs):
+    """
+    Records that a load completed. Runs in the load's transaction, before its commit, so
+    the new generation becomes visible together with the rows it stamps; the row lock the
+    UPDATE takes keeps two concurrent loads from ending on the same generation.
+    """
+    curs.execute("UPDATE Load_Generation SET Generation = Generation + 1 WHERE Id = 1")
+
+
+##__________________________________________________
+# 4.4 Summary tables for the rollup queries (1, 7, 8 and 9), refreshed incrementally
+
+STREAMS_BUCKET = 10_000_000   # width of the Streams buckets query 7 sums over
+
+SUMMARY_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS Summary_Watermark(
+        Summary_Name VARCHAR(50) PRIMARY KEY,
+        Last_ID INT NOT NULL
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Year_Summary(
+        Released_Year SMALLINT PRIMARY KEY,
+        Bpm_Sum BIGINT NOT NULL,
+        Danceability_Sum BIGINT NOT NULL,
+        Song_Count BIGINT NOT NULL
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Month_Summary(
+        Released_Month SMALLINT PRIMARY KEY,
+        Streams_Sum BIGINT NOT NULL,
+        Track_Count BIGINT NOT NULL
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Energy_Streams_Summary(
+        Energy_Category VARCHAR(20),
+        Streams_Bucket BIGINT,
+        Streams_Sum BIGINT NOT NULL,
+        Track_Count BIGINT NOT NULL,
+        PRIMARY KEY (Energy_Category, Streams_Bucket)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Energy_Platform_Summary(
+        Energy_Category VARCHAR(20),
+        Platform_Presence VARCHAR(30),
+        Streams_Sum BIGINT NOT NULL,
+        Track_Count BIGINT NOT NULL,
+        PRIMARY KEY (Energy_Category, Platform_Presence)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Summary_Changed(
+        Changed_ID INT PRIMARY KEY
+    );
+    """,
+]
+
+# (summary table, key columns, additive columns (the last one counts rows), ID column,
+#  aggregate over the rows selected by {ids}: an ID range or the IDs in Summary_Changed)
+SUMMARIES = [
+    ("Year_Summary", ("Released_Year",), ("Bpm_Sum", "Danceability_Sum", "Song_Count"), "Profile_ID", """
+        SELECT Released_Year, SUM(Bpm), SUM(Danceability), COUNT(*)
+        FROM TrackProfile
+        WHERE {ids}
+        GROUP BY Released_Year
+    """),
+    ("Month_Summary", ("Released_Month",), ("Streams_Sum", "Track_Count"), "t.Track_ID", """
+        SELECT tp.Released_Month, SUM(si.Streams), COUNT(*)
+        FROM Track t
+        JOIN StreamingInfo si ON t.Track_ID = si.Info_ID
+        JOIN TrackProfile tp ON t.Track_ID = tp.Profile_ID
+        WHERE {ids}
+        GROUP BY tp.Released_Month
+    """),
+    ("Energy_Streams_Summary", ("Energy_Category", "Streams_Bucket"), ("Streams_Sum", "Track_Count"), "tp.Profile_ID", f"""
+        SELECT tp.Energy_Category, si.Streams DIV {STREAMS_BUCKET}, SUM(si.Streams), COUNT(*)
+        FROM TrackProfile tp
+        JOIN StreamingInfo si ON tp.Profile_ID = si.Info_ID
+        WHERE {{ids}}
+        GROUP BY 1, 2
+    """),
+    # Query 8 only counts tracks with at least one artist and leaves out the 'Other' presence
+    ("Energy_Platform_Summary", ("Energy_Category", "Platform_Presence"), ("Streams_Sum", "Track_Count"), "tp.Profile_ID", """
+        SELECT tp.Energy_Category, si.Platform_Presence, SUM(si.Streams), COUNT(*)
+        FROM TrackProfile tp
+        JOIN StreamingInfo si ON tp.Profile_ID = si.Info_ID
+        WHERE {ids}
+            AND EXISTS (SELECT 1 FROM Released_By rb WHERE rb.Track_ID = tp.Profile_ID)
+        GROUP BY 1, 2
+    """),
+]
+
+ID_RANGE_FILTER = "{column} > %s AND {column} <= %s"
+CHANGED_IDS_FILTER = "{column} IN (SELECT Changed_ID FROM Summary_Changed)"
+
+def create_summary_tables(curs):
+    for table in SUMMARY_TABLES:
+        curs.execute(table)
+    create_load_generation(curs)
+
+def merge_summary(curs, table, keys, values, delta):
+    """
+    Adds the delta rows (keys + values) onto the summary table: existing keys are
+    incremented in place, new keys are inserted.
+    """
+    curs.execute(f"SELECT {', '.join(keys)} FROM {table}")
+    existing = set(curs.fetchall())
+    updates, inserts = [], []
+    for row in delta:
+        key = tuple(row[:len(keys)])
+        additions = [int(value) for value in row[len(keys):]]
+        if key in existing:
+            updates.append((*additions, *key))
+        else:
+            inserts.append((*key, *additions))
+    if updates:
+        assignments = ", ".join(f"{column} = {column} + %s" for column in values)
+        conditions = " AND ".join(f"{column} = %s" for column in keys)
+        curs.executemany(f"UPDATE {table} SET {assignments} WHERE {conditions}", updates)
+    if inserts:
+        curs.executemany(insert_sql(table, keys + values), inserts)
+
+def summary_deltas(curs, id_filter, params=()):
+    """
+    Yields (table, keys, values, rows) with the aggregates of every summary over the rows id_filter selects.
+    """
+    for table, keys, values, id_column, query in SUMMARIES:
+        curs.execute(query.format(ids=id_filter.format(column=id_column)), params)
+        delta = curs.fetchall()
+        if table == "Energy_Platform_Summary":
+            delta = [row for row in delta if row[1] != 'Other']
+        yield table, keys, values, delta
+
+def summary_watermark(curs):
+    """
+    Returns the highest ID already folded into the summary tables.
+    """
+    curs.execute("SELECT Last_ID FROM Summary_Watermark WHERE Summary_Name = 'rollups'")
+    row = curs.fetchone()
+    return row[0] if row else 0
+
+def refresh_summaries(curs):
+    """
+    Folds the rows loaded since the last refresh into the summary tables. Only the new
+    IDs are aggregated and their sums and counts added to the stored ones, so the cost
+    follows the size of the load, not of the tables. The caller commits.
+    """
+    create_summary_tables(curs)
+    curs.execute("SELECT Last_ID FROM Summary_Watermark WHERE Summary_Name = 'rollups'")
+    row = curs.fetchone()
+    last_id = row[0] if row else 0
+    curs.execute("SELECT COALESCE(MAX(Profile_ID), 0) FROM TrackProfile")
+    new_last_id = curs.fetchone()[0]
+    if new_last_id <= last_id:
+        return
+
+    for table, keys, values, delta in summary_deltas(curs, ID_RANGE_FILTER, (last_id, new_last_id)):
+        merge_summary(curs, table, keys, values, delta)
+
+    if row:
+        curs.execute("UPDATE Summary_Watermark SET Last_ID = %s WHERE Summary_Name = 'rollups'", (new_last_id,))
+    else:
+        curs.execute("INSERT INTO Summary_Watermark (Summary_Name, Last_ID) VALUES ('rollups', %s)", (new_last_id,))
+    print(f"Summary tables refreshed with IDs {last_id + 1} to {new_last_id}.")
+
+def rebuild_summaries(curs):
+    """
+    Empties the summary tables and folds every row in again, e.g. after the derived columns changed.
+    """
+    create_summary_tables(curs)
+    for table in ("Summary_Watermark", "Year_Summary", "Month_Summary", "Energy_Streams_Summary",
+                  "Energy_Platform_Summary", "Summary_Changed"):
+        curs.execute(f"DELETE FROM {table}")
+    refresh_summaries(curs)
+
+def build_summaries(user: str, passwd: str):
+    """
+    Creates and fills the summary tables of a database loaded before they existed.
+    """
+    db = None
+    try:
+        db = get_connection(user, passwd)
+        curs = db.cursor()
+        refresh_summaries(curs)
+        bump_dataset_version(curs)
+        db.commit()
+        print("Summary tables are up to date.")
+    except Error as e:
+        print("Error:", e)
+    finally:
+        if db is not None and db.is_connected():
+            curs.close()
+            db.close()
+
+
+##__________________________________________________
+# 4.5 Parallel load: byte-range partitions of the cleaned CSV loaded by worker processes
+
+PARTITION_SCAN_BLOCK = 1 << 20   # bytes read at a time while looking for partition boundaries
+
+
+def partition_csv(csv_file: str, partitions: int):
+    """
+    Splits a CSV file into up to `partitions` byte ranges that each start on a row boundary.
+    Quote parity is tracked from the first data row, so a newline inside a quoted field
+    never splits a row. Returns a list of (start, end, max_rows), where
+    max_rows (the newlines in the range) bounds the rows the range holds.
+    """
+    size = os.path.getsize(csv_file)
+    with open(csv_file, mode='rb') as file:
+        file.readline()
+        data_start = file.tell()
+        targets = [data_start + (size - data_start) * part // partitions for part in range(1, partitions)]
+        boundaries = [data_start]
+        newlines = [0]
+        in_quotes = False
+        offset = data_start
+        while True:
+            block = file.read(PARTITION_SCAN_BLOCK)
+            if not block:
+                break
+            scanned = 0
+            while targets:
+                newline = block.find(b"\n", max(scanned, targets[0] - offset))
+                if newline < 0:
+                    break
+                in_quotes ^= block.count(b'"', scanned, newline) % 2 == 1
+                newlines[-1] += block.count(b"\n", scanned, newline + 1)
+                scanned = newline + 1
+                if not in_quotes:
+                    boundaries.append(offset + scanned)
+                    newlines.append(0)
+                    while targets and targets[0] < boundaries[-1]:
+                        targets.pop(0)
+            in_quotes ^= block.count(b'"', scanned) % 2 == 1
+            newlines[-1] += block.count(b"\n", scanned)
+            offset += len(block)
+
+    boundaries.append(size)
+    partitions = []
+    for start, end, max_rows in zip(boundaries, boundaries[1:], newlines):
+        if end > start:
+            # The last row may have no trailing newline
+            partitions.append((start, end, max_rows + (end == size)))
+    return partitions
+
+
+def init_load_worker(settings):
+    """
+    Runs once in every worker process: applies the coordinator's connection settings and
+    drops pools inherited through fork, whose sockets belong to the parent.
+    """
+    globals().update(settings)
+    _pools.clear()
+
+
+def load_partition(task):
+    """
+    Worker body: parses and loads one partition with the IDs reserved for it, from the
+    position its checkpoint holds.
+    """
+    user, passwd, csv_file, digest, start, end, first_id, batch_size, use_load_data, quarantine_path = task
+    checkpoint = LoadCheckpoint(csv_file, resume=True, span=(start, end), digest=digest)
+    return bulk_load_rows(user, passwd, checkpoint.rows(), batch_size=batch_size, use_load_data=use_load_data,
+                          first_id=first_id, concurrent=True, checkpoint=checkpoint, quarantine_path=quarantine_path)
+
+
+def parallel_dataload(user: str, passwd: str, csv_file: str, processes=None,
+                      batch_size: int = 5000, use_load_data: bool = False, resume: bool = False,
+                      force: bool = False):
+    """
+    Load a cleaned CSV with one worker process and one connection per byte-range partition.
+    Every partition gets its own range of IDs up front (sized by its newline count), so
+    Track_ID, Info_ID and Profile_ID stay aligned without the workers coordinating; the
+    ranges may leave gaps when fields contain newlines. Each partition has its own checkpoint
+    (see 4.6), written with its ID range before any worker starts, so with resume=True a failed
+    load continues every partition where it stopped and finished partitions are not loaded
+    again; resuming needs the same number of processes. The workers' rejected rows are merged
+    into QUARANTINE_FILE and the summary tables are refreshed once all partitions are in.
+    Embedded backends allow a single writer, so there the partitions are loaded one after
+    another in this process.
+    Returns (rows loaded, seconds), or None if a partition failed.
+    """
+    processes = processes or os.cpu_count() or 1
+    partitions = partition_csv(csv_file, processes)
+    quarantine_base, quarantine_ext = os.path.splitext(QUARANTINE_FILE)
+    # One quarantine file per worker, so processes never interleave their writes
+    quarantine_paths = [f"{quarantine_base}.part{part}{quarantine_ext}" for part in range(len(partitions))]
+    db = None
+    try:
+        db = get_connection(user, passwd)
+        cursor = db.cursor()
+        if not use_stored_energy_thresholds(cursor):
+            return None
+        start = time.perf_counter()
+        digest = file_digest(csv_file).hexdigest()
+        checkpoints = [LoadCheckpoint(csv_file, resume=resume, force=force, span=(part_start, part_end), digest=digest)
+                       for part_start, part_end, _ in partitions]
+        for checkpoint in checkpoints:
+            checkpoint.restore(cursor)
+        # Checkpoints of this file split into other partitions, by an earlier run with another --processes
+        cursor.execute("SELECT Source_File, Finished FROM Load_Checkpoint WHERE Source_Digest = %s", (digest,))
+        path = os.path.abspath(csv_file)
+        ours = {checkpoint.source for checkpoint in checkpoints}
+        others = [(source, finished) for source, finished in cursor.fetchall()
+                  if "#" in source and path.endswith(source.rsplit("#", 1)[0]) and source not in ours]
+        if others:
+            if not force and all(finished for _, finished in others):
+                print(f"{csv_file} was already loaded completely, nothing to do (use --force to load it again).")
+                return 0, time.perf_counter() - start
+            if resume:
+                raise Error(msg=f"{csv_file} was partly loaded with another number of processes, "
+                                f"resume it with the same --processes")
+            cursor.executemany("DELETE FROM Load_Checkpoint WHERE Source_File = %s", [(source,) for source, _ in others])
+
+        tasks = []
+        first_id = next_track_id(cursor)
+        for checkpoint, (part_start, part_end, max_rows), quarantine_path in zip(checkpoints, partitions, quarantine_paths):
+            if checkpoint.done:
+                continue
+            if resume and checkpoint.exists:
+                part_first_id = checkpoint.next_id
+            else:
+                part_first_id = first_id
+                first_id += max_rows
+                checkpoint.save(cursor, part_first_id, part_start, 0)
+            tasks.append((user, passwd, csv_file, digest, part_start, part_end, part_first_id, batch_size,
+                          use_load_data, quarantine_path))
+        # Commit the checkpoints, which also ends the read transaction so the refresh below sees the workers' rows
+        db.commit()
+        if not tasks:
+            return 0, time.perf_counter() - start
+
+        if BACKEND == "mysql" and len(tasks) > 1:
+            settings = {"BACKEND": BACKEND, "DB_HOST": DB_HOST, "DB_NAME": DB_NAME, "POOL_SIZE": 1,
+                        "ENERGY_LOW": ENERGY_LOW, "ENERGY_HIGH": ENERGY_HIGH}
+            with multiprocessing.Pool(len(tasks), initializer=init_load_worker, initargs=(settings,)) as pool:
+                results = pool.map(load_partition, tasks)
+        else:
+            results = [load_partition(task) for task in tasks]
+
+        if any(result is None for result in results):
+            print("A partition failed to load; the summary tables were not refreshed. "
+                  "Run again with --resume to finish the failed partitions.")
+            return None
+        refresh_summaries(cursor)
+        bump_dataset_version(cursor)
+        db.commit()
+        loaded = sum(rows for rows, seconds in results)
+        elapsed = time.perf_counter() - start
+        rate = loaded / elapsed if elapsed > 0 else float("inf")
+        print(f"Parallel load finished: {loaded} rows from {len(tasks)} partitions in {elapsed:.2f}s ({rate:,.0f} rows/sec).")
+        return loaded, elapsed
+
+    except Error as e:
+        print("Error:", e)
+
+    finally:
+        merge_quarantine(quarantine_paths)
+        if db is not None and db.is_connected():
+            cursor.close()
+            db.close()
+            print("Database connection released.")
+
+
+##__________________________________________________
+# 4.6 Checkpoints and quarantine: resumable loads that survive bad rows
+
+QUARANTINE_FILE = 'rejected_rows.csv'
+
+CHECKPOINT_TABLE = """
+CREATE TABLE IF NOT EXISTS Load_Checkpoint(
+    Source_File VARCHAR(255) PRIMARY KEY,
+    Source_Size BIGINT NOT NULL,
+    Source_Digest CHAR(40) NOT NULL,
+    Byte_Offset BIGINT NOT NULL,
+    Next_ID INT NOT NULL,
+    Rows_Rejected INT NOT NULL,
+    Finished SMALLINT NOT NULL
+);
+"""
+
+
+class Quarantine:
+    """
+    Appends the rows a load rejects to a CSV file, each with the reason in front,
+    so one bad record never aborts the load. The file is only created when needed.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or QUARANTINE_FILE
+        self.count = 0
+        self.file = None
+        self.writer = None
+
+    def add(self, row, reason):
+        if self.writer is None:
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            self.file = open(self.path, mode='a', encoding='utf-8', newline='')
+            self.writer = csv.writer(self.file)
+            if new_file:
+                self.writer.writerow(["rejected_because", *(column for column in row if column is not None)])
+        values = [value for column, value in row.items() if column is not None]
+        values.extend(row.get(None) or [])   # fields beyond the header
+        self.writer.writerow([reason, *values])
+        self.count += 1
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            print(f"{self.count} rejected rows written to {self.path}.")
+
+
+def merge_quarantine(paths, path=None):
+    """
+    Appends the quarantine files of the parallel load workers to QUARANTINE_FILE, writing
+    the header only once, and removes them.
+    """
+    path = path or QUARANTINE_FILE
+    merged = 0
+    for part_path in paths:
+        if not os.path.exists(part_path):
+            continue
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(part_path, mode='rb') as part, open(path, mode='ab') as target:
+            header = part.readline()
+            if new_file:
+                target.write(header)
+            shutil.copyfileobj(part, target)
+        os.remove(part_path)
+        merged += 1
+    if merged:
+        print(f"Rejected rows of {merged} partitions merged into {path}.")
+
+
+class LoadCheckpoint:
+    """
+    Position of a CSV load (byte offset of the next row, or its number when the rows come
+    from a cleaned-data cache file, and next free ID), stored in
+    Load_Checkpoint and committed in the same transaction as the batch it follows, so
+    after a crash the table and the data always agree and a resumed load neither
+    skips nor repeats rows. A file whose load finished is not loaded again while its
+    content is unchanged, unless force=True. With span=(start, end) the checkpoint covers
+    one byte range of a CSV, the partition of one parallel load worker (see 4.5).
+    """
+
+    def __init__(self, csv_file: str, resume: bool = False, force: bool = False, span=None, digest=None):
+        self.csv_file = csv_file
+        self.span = span
+        source = os.path.abspath(csv_file) + (f"#{span[0]}-{span[1]}" if span else "")
+        self.source = source[-255:]
+        self.label = csv_file if span is None else f"{csv_file} (bytes {span[0]} to {span[1]})"
+        self.size = os.path.getsize(csv_file)
+        self.digest = digest or file_digest(csv_file).hexdigest()
+        self.resume = resume
+        self.force = force
+        self.done = False
+        self.start = None
+        self.position = None
+        self.next_id = 0
+        self.rejected = 0
+        self.exists = False
+
+    def restore(self, cursor):
+        """
+        Reads the stored checkpoint; with resume=True the load continues from it. Sets done
+        when the same content was already loaded completely and there is nothing to do.
+        """
+        cursor.execute(CHECKPOINT_TABLE)
+        cursor.execute(
+            "SELECT Source_Size, Source_Digest, Byte_Offset, Next_ID, Rows_Rejected, Finished "
+            "FROM Load_Checkpoint WHERE Source_File = %s",
+            (self.source,)
+        )
+        stored = cursor.fetchone()
+        self.exists = stored is not None
+        if stored is None:
+            if self.resume:
+                print(f"No checkpoint for {self.label}, loading it from the start.")
+            return
+        size, digest, offset, next_id, rejected, finished = stored
+        unchanged = size == self.size and digest == self.digest
+        if finished and unchanged and not self.force:
+            print(f"{self.label} was already loaded completely, nothing to do (use --force to load it again).")
+            self.done = True
+            return
+        if not self.resume:
+            if not finished:
+                print(f"An earlier load of {self.label} did not finish; starting over (use --resume to continue it).")
+            return
+        if not unchanged:
+            raise Error(msg=f"{self.label} changed since the checkpoint was written, it cannot be resumed")
+        if finished:
+            print(f"{self.label} was already loaded completely.")
+        elif self.span is None or offset != self.span[0]:
+            print(f"Resuming the load of {self.label} at position {offset}.")
+        self.start = offset
+        self.next_id = next_id
+        self.rejected = rejected
+
+    def rows(self):
+        """
+        Yields the rows from the checkpoint on, keeping self.position just past the last one.
+        Lazy, so restore() has run by the time the first row is read.
+        """
+        if self.span is not None:
+            rows = iter_csv_rows(self.csv_file, self.start if self.start is not None else self.span[0], self.span[1])
+        elif self.csv_file.endswith(".arrow"):
+            rows = iter_cached_rows(self.csv_file, self.start)
+        else:
+            rows = iter_csv_rows(self.csv_file, self.start)
+        for row, self.position in rows:
+            yield row
+        if self.position is None:
+            end = self.span[1] if self.span is not None else self.size
+            self.position = self.start if self.start is not None else end
+
+    def save(self, cursor, next_id, offset, rejected, finished=False):
+        """
+        Records the position and the rows rejected in this run; the caller commits it
+        together with the rows it covers.
+        """
+        values = (self.size, self.digest, offset, next_id, self.rejected + rejected, int(finished), self.source)
+        if self.exists:
+            cursor.execute(
+                "UPDATE Load_Checkpoint SET Source_Size = %s, Source_Digest = %s, Byte_Offset = %s, Next_ID = %s, "
+                "Rows_Rejected = %s, Finished = %s WHERE Source_File = %s", values
+            )
+        else:
+            cursor.execute(
+                "INSERT INTO Load_Checkpoint (Source_Size, Source_Digest, Byte_Offset, Next_ID, Rows_Rejected, "
+                "Finished, Source_File) VALUES (%s, %s, %s, %s, %s, %s, %s)", values
+            )
+            self.exists = True
+
+
+##__________________________________________________
+# 4.7 Incremental upserts: merge a new chart snapshot into the loaded tables
+
+TRACK_KEY_TABLE = """
+CREATE TABLE IF NOT EXISTS Track_Key(
+    Key_Hash CHAR(40) PRIMARY KEY,
+    Track_ID INT NOT NULL
+);
+"""
+
+KEY_BACKFILL_WINDOW = 50_000   # Track_IDs read per query while backfilling Track_Key
+
+
+def track_key(track_name, artist_names):
+    """
+    Step 1.4's normalized track/artist key, hashed to a fixed width. The artists are
+    normalized one by one and sorted, so the key can be rebuilt from Released_By.
+    """
+    artists = sorted(normalize_string(artist_name) for artist_name in artist_names)
+    key = "\x1f".join([normalize_string(track_name), *artists])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def backfill_track_keys(cursor):
+    """
+    Adds the Track_Key entries of tracks loaded without one (every loader but the incremental one).
+    Track_Key always covers every unarchived ID up to its highest one, so only the newer tracks
+    are read. Archived tracks (no StreamingInfo row, see 3.3) get no key.
+    """
+    cursor.execute(TRACK_KEY_TABLE)
+    cursor.execute("SELECT COALESCE(MAX(Track_ID), 0) FROM Track_Key")
+    low = cursor.fetchone()[0]
+    cursor.execute("SELECT COALESCE(MAX(Track_ID), 0) FROM Track")
+    high = cursor.fetchone()[0]
+    added = 0
+    while low < high:
+        cursor.execute(
+            "SELECT t.Track_ID, t.Track_Name, rb.Artist_Name FROM Track t "
+            "JOIN StreamingInfo si ON si.Info_ID = t.Track_ID "
+            "LEFT JOIN Released_By rb ON rb.Track_ID = t.Track_ID "
+            "WHERE t.Track_ID > %s AND t.Track_ID <= %s",
+            (low, low + KEY_BACKFILL_WINDOW)
+        )
+        tracks = {}
+        for track_id, track_name, artist_name in cursor.fetchall():
+            name, artists = tracks.setdefault(track_id, (track_name, []))
+            if artist_name is not None:
+                artists.append(artist_name)
+        keys = [(track_key(name, artists), track_id) for track_id, (name, artists) in tracks.items()]
+        # Tracks that were already duplicates keep their first ID
+        cursor.executemany(insert_sql("Track_Key", ("Key_Hash", "Track_ID"), ignore=True), sorted(keys, key=lambda k: k[1]))
+        added += len(keys)
+        low += KEY_BACKFILL_WINDOW
+    if added:
+        print(f"Track keys added for {added} tracks.")
+
+
+def adjust_summaries(cursor, changed_ids, update):
+    """
+    Runs update(), which changes rows already folded into the summary tables, and keeps
+    the summaries right by taking out the rows' old contribution and adding the new one.
+    """
+    create_summary_tables(cursor)
+    cursor.execute("DELETE FROM Summary_Changed")
+    cursor.executemany(insert_sql("Summary_Changed", ("Changed_ID",)), [(i,) for i in changed_ids])
+    for sign in (-1, 1):
+        if sign > 0:
+            update()
+        for table, keys, values, delta in summary_deltas(cursor, CHANGED_IDS_FILTER):
+            signed = [(*row[:len(keys)], *(sign * int(value) for value in row[len(keys):])) for row in delta]
+            merge_summary(cursor, table, keys, values, signed)
+    for table, keys, values, id_column, query in SUMMARIES:
+        # A group can lose its last row when an update moves it to another bucket
+        cursor.execute(f"DELETE FROM {table} WHERE {values[-1]} = 0")
+    cursor.execute("DELETE FROM Summary_Changed")
+
+
+def upsert_load_rows(user: str, passwd: str, rows, batch_size: int = 5000):
+    """
+    Merges an iterable of cleaned CSV-style row dicts into the loaded tables. Rows are matched
+    to existing tracks by track_key(); a matched track gets the incoming StreamingInfo metrics
+    only when they have more streams (the step 1.4 rule), and only unmatched rows are inserted.
+    Every batch is committed on its own: rerunning an interrupted upsert gives the same result.
+    Returns (rows inserted, rows updated, seconds), or None if the load failed.
+    """
+    db = None
+    quarantine = Quarantine()
+    try:
+        db = get_connection(user, passwd)
+        cursor = db.cursor()
+        if not use_stored_energy_thresholds(cursor):
+            return None
+        start = time.perf_counter()
+        # Fold every existing row into the summaries first, so updates can be corrected against them
+        refresh_summaries(cursor)
+        backfill_track_keys(cursor)
+        db.commit()
+        folded = summary_watermark(cursor)
+        track_id = next_track_id(cursor)
+        artists = ArtistInterner().preload(cursor)
+        inserted = updated = 0
+
+        def flush(incoming):
+            nonlocal track_id, inserted, updated
+            if not incoming:
+                return
+            placeholders = ", ".join(["%s"] * len(incoming))
+            cursor.execute(
+                "SELECT k.Key_Hash, k.Track_ID, si.Streams FROM Track_Key k "
+                f"JOIN StreamingInfo si ON si.Info_ID = k.Track_ID WHERE k.Key_Hash IN ({placeholders})",
+                list(incoming)
+            )
+            existing = {key: (existing_id, streams) for key, existing_id, streams in cursor.fetchall()}
+
+            batch = {"tracks": [], "artists": [], "released_by": [], "infos": [], "profiles": []}
+            keys, updates = [], []
+            for key, (row, streams) in incoming.items():
+                if key in existing:
+                    existing_id, existing_streams = existing[key]
+                    if streams > existing_streams:
+                        info = split_row(row, existing_id)[3]
+                        updates.append((*info[1:], existing_id))
+                    continue
+                track, artist_names, released_by, info, profile = split_row(row, track_id)
+                batch["tracks"].append(track)
+                batch["artists"].extend(artists.intern(artist_names))
+                batch["released_by"].extend(released_by)
+                batch["infos"].append(info)
+                batch["profiles"].append(profile)
+                keys.append((key, track_id))
+                track_id += 1
+
+            def update():
+                assignments = ", ".join(f"{column} = %s" for column in INFO_COLUMNS[1:])
+                cursor.executemany(f"UPDATE StreamingInfo SET {assignments} WHERE Info_ID = %s", updates)
+
+            if updates:
+                # Rows past the watermark are folded in later with their new values anyway
+                adjust_summaries(cursor, [u[-1] for u in updates if u[-1] <= folded], update)
+            if batch["tracks"]:
+                flush_executemany(cursor, batch)
+                cursor.executemany(insert_sql("Track_Key", ("Key_Hash", "Track_ID")), keys)
+            db.commit()
+            inserted += len(batch["tracks"])
+            updated += len(updates)
+
+        incoming = {}
+        for row in rows:
+            if None in row or None in row.values():
+                quarantine.add(row, "wrong number of fields")
+                continue
+            try:
+                key = track_key(row['track_name'], row['artist(s)_name'].split(','))
+                streams = parse_count(row['streams'])
+                split_row(row, 0)
+            except (ValueError, KeyError, AttributeError) as e:
+                quarantine.add(row, f"{type(e).__name__}: {e}")
+                continue
+            # The same track twice in one snapshot: keep the row with more streams
+            if key not in incoming or streams > incoming[key][1]:
+                incoming[key] = (row, streams)
+            if len(incoming) >= batch_size:
+                flush(incoming)
+                incoming = {}
+        flush(incoming)
+
+        refresh_summaries(cursor)
+        bump_dataset_version(cursor)
+        db.commit()
+        artists.report()
+        elapsed = time.perf_counter() - start
+        print(f"Incremental load finished in {elapsed:.2f}s: {inserted} new tracks, {updated} tracks updated.")
+        return inserted, updated, elapsed
+
+    except Error as e:
+        print("Error:", e)
+        print("Batches committed so far are kept; running the same load again completes it.")
+
+    finally:
+        quarantine.close()
+        if db is not None and db.is_connected():
+            cursor.close()
+            db.close()
+            print("Database connection released.")
+
+
+def incremental_dataload(user: str, passwd: str, csv_file: str, batch_size: int = 5000):
+    """
+    Merges a cleaned CSV snapshot into the existing database, touching only what changed.
+    """
+    with open(csv_file, mode='r', encoding='utf-8') as file:
+        return upsert_load_rows(user, passwd, csv.DictReader(file), batch_size=batch_size)
+
+
+user = "root"
+password = ""
+SOURCE_CSV = 'Spotify.csv'
+CLEANED_CSV = 'Spotify.csv'   # point elsewhere to keep the source file untouched
+BATCH_SIZE = 5000         # rows per multi-row INSERT batch
+STREAMING = False         # clean and load in chunks for CSVs larger than memory
+CHUNK_SIZE = 100_000      # rows per chunk in streaming mode
+USE_LOAD_DATA = False     # stage batches through LOAD DATA LOCAL INFILE instead
+LOAD_PROCESSES = 1        # >1 loads the cleaned CSV with that many worker processes
+INCREMENTAL = False       # merge the cleaned CSV into the loaded tables (see 4.7)
+RESUME = False            # continue an interrupted load from its checkpoint (not with STREAMING)
+FORCE_LOAD = False        # load a CSV again even though its checkpoint says it was loaded completely
+
+def setup_database(user: str, password: str, csv_file: str = 'Spotify.csv', streaming: bool = False,
+                   resume: bool = False, force: bool = False):
+    """
+    Creates the database and its tables and loads the cleaned CSV into them.
+    With streaming=True, csv_file is the raw CSV (or an iterable of raw DataFrame chunks) and
+    is cleaned chunk by chunk while loading.
+    With resume=True the tables are kept and an interrupted load continues from its checkpoint;
+    force=True loads a CSV again that its checkpoint records as loaded (see 4.6).
+    Returns what the loader returns: (rows loaded, seconds), or None if the load failed.
+    """
+    try:
+        if not resume:
+            print("creating the database...")
+
+            loading_animation("Setting up the database")
+            createdb(user=user, passw=password)
+            print("defining tables...")
+
+            loading_animation("Creating tables")
+            creattables(user=user, passw=password)
+        print("loading the dataset into the DB...")
+
+        loading_animation("Loading data into database")  
+        if streaming:
+            return stream_dataload(user=user, passwd=password, csv_file=csv_file, chunksize=CHUNK_SIZE,
+                                   batch_size=BATCH_SIZE, use_load_data=USE_LOAD_DATA)
+        elif LOAD_PROCESSES > 1:
+            return parallel_dataload(user=user, passwd=password, csv_file=csv_file, processes=LOAD_PROCESSES,
+                                     batch_size=BATCH_SIZE, use_load_data=USE_LOAD_DATA, resume=resume, force=force)
+        else:
+            return bulk_dataload(user=user, passwd=password, csv_file=csv_file,
+                                 batch_size=BATCH_SIZE, use_load_data=USE_LOAD_DATA, resume=resume, force=force)
+    except Error as e:
+        if e.errno == errorcode.ER_DB_CREATE_EXISTS:
+            print("The database already exists, running queries only...")
+        else:
+            print("Error:", e)
+
+##________________________________________________________________________
+# STEP 4: QUERY EXPOSITION AND EXECUTING THEM
+
+##__________________________________________________
+# 4.8 Result cache for the menu queries, keyed on the load generation of the database
+
+CACHE_ENTRIES = 32                  # results kept in memory
+CACHE_BYTES = 64 * 1024 * 1024      # encoded size kept in memory
+# On-disk copy that survives restarts (None to disable), private to the user rather than the working directory
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "spotify_query_cache")
+
+def encode_results(results):
+    """
+    Encodes [(columns, rows)] as JSON, tagging the values JSON has no type for.
+    """
+    def tagged(value):
+        if isinstance(value, Decimal):
+            return {"decimal": str(value)}
+        if isinstance(value, datetime.datetime):
+            return {"datetime": value.isoformat()}
+        if isinstance(value, datetime.date):
+            return {"date": value.isoformat()}
+        if isinstance(value, (bytes, bytearray)):
+            return {"bytes": bytes(value).hex()}
+        raise TypeError(f"cannot cache a {type(value).__name__} value")
+    payload = [[list(columns), [list(row) for row in rows]] for columns, rows in results]
+    return json.dumps(payload, default=tagged, separators=(",", ":")).encode('utf-8')
+
+def decode_results(blob):
+    def untagged(value):
+        if "decimal" in value:
+            return Decimal(value["decimal"])
+        if "datetime" in value:
+            return datetime.datetime.fromisoformat(value["datetime"])
+        if "date" in value:
+            return datetime.date.fromisoformat(value["date"])
+        return bytes.fromhex(value["bytes"])
+    payload = json.loads(blob.decode('utf-8'), object_hook=untagged)
+    return [(columns, [tuple(row) for row in rows]) for columns, rows in payload]
+
+class QueryCache:
+    """
+    LRU cache of query results keyed by backend, host, database, query id, SQL text, parameters and
+    the token and load generation read from the database (see 4.3). Results are kept JSON-encoded, so their size
+    is known, callers get their own copy and nothing read back from disk is unpickled.
+    """
+
+    def __init__(self, max_entries=CACHE_ENTRIES, max_bytes=CACHE_BYTES, cache_dir=CACHE_DIR):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def prefix(self, query_id, query, params=()):
+        source = f"{BACKEND}:{DB_HOST}:{DB_NAME}:{query}:{tuple(params)}"
+        digest = hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+        return f"{query_id}-{digest}-"
+
+    def disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, query_id, query, version, params=()):
+        """
+        Returns the cached results for that load generation or None. Checks memory first, then the disk store.
+        """
+        key = self.prefix(query_id, query, params) + version
+        with self.lock:
+            blob = self.entries.get(key)
+            if blob is not None:
+                self.entries.move_to_end(key)
+                return decode_results(blob)
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self.disk_path(key), mode='rb') as file:
+                blob = file.read()
+            results = decode_results(blob)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        with self.lock:
+            self.remember(key, blob)
+        return results
+
+    def put(self, query_id, query, version, results, params=()):
+        prefix = self.prefix(query_id, query, params)
+        key = prefix + version
+        try:
+            blob = encode_results(results)
+        except TypeError:
+            return
+        if len(blob) > self.max_bytes:
+            return
+        with self.lock:
+            self.remember(key, blob)
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            temp_path = self.disk_path(key) + f".{os.getpid()}.tmp"
+            with open(temp_path, mode='wb') as file:
+                file.write(blob)
+            os.replace(temp_path, self.disk_path(key))
+            # Results of earlier generations can never be asked for again
+            for name in os.listdir(self.cache_dir):
+                if name.startswith(prefix) and name.endswith(".json") and name != f"{key}.json":
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(os.path.join(self.cache_dir, name))
+
+    def remember(self, key, blob):
+        # Caller holds the lock
+        if key in self.entries:
+            self.total_bytes -= len(self.entries.pop(key))
+        self.entries[key] = blob
+        self.total_bytes += len(blob)
+        while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= len(evicted)
+
+query_cache = QueryCache()
+
+
+##__________________________________________________
+# 4.9 In-process analytics engine (analytics.py) as an alternative to the SQL server
+
+QUERY_ENGINE = "sql"      # "sql", or "pandas" to answer the menu from CLEANED_CSV held in memory
+
+_analytics = {}
+
+def analytics_engine(csv_file=None):
+    """
+    Returns the AnalyticsEngine over the cleaned CSV, rebuilt when the file changes.
+    It categorizes with the energy thresholds stored in the database, so both engines agree.
+    analytics.py is imported here so the SQL-only path never pays for it.
+    """
+    from analytics import AnalyticsEngine
+
+    csv_file = csv_file or CLEANED_CSV
+    stat = os.stat(csv_file)
+    energy_low, energy_high = database_energy_thresholds()
+    key = (os.path.abspath(csv_file), stat.st_size, stat.st_mtime_ns, energy_low, energy_high, YEAR_FROM, YEAR_TO)
+    if _analytics.get("key") != key:
+        _analytics["engine"] = AnalyticsEngine.from_csv(csv_file, energy_low=energy_low, energy_high=energy_high,
+                                                        year_from=YEAR_FROM, year_to=YEAR_TO)
+        _analytics["key"] = key
+    return _analytics["engine"]
+
+
+##__________________________________________________
+# 4.10 Query timing: per-phase profiles, EXPLAIN ANALYZE capture and metric export
+
+PROFILE_QUERIES = False   # print the per-phase timings under every result
+EXPLAIN_ANALYZE = False   # also run EXPLAIN ANALYZE (EXPLAIN QUERY PLAN on sqlite) and keep the plan
+QUERY_LOG = None          # JSON-lines file every profile is appended to, e.g. 'query_profiles.jsonl'
+METRICS_FILE = None       # Prometheus text file rewritten after every query, e.g. 'query_metrics.prom'
+QUERY_HOOKS = []          # extra callables, each called with the profile dict of every query
 
-                for artist_name in artist_names:
-                    artist_insert_query = """
-                    INSERT IGNORE INTO Artist (Artist_Name)
-                    VALUES (%s)
-                    """
-                    cursor.execute(artist_insert_query, (artist_name,))
-                    
-                    released_by_insert_query = """
-                    INSERT IGNORE INTO Released_By (Track_ID, Artist_Name)
-                    VALUES (%s, %s)
-                    """
-                    cursor.execute(released_by_insert_query, (track_id, artist_name))
-            
+PHASES = ("connect", "execute", "fetch", "render")
 
-                info_insert_query = """
-                INSERT IGNORE INTO StreamingInfo (Apple_Playlists, Apple_Charts, Spotify_Charts, Spotify_Playlists, Streams, Deezer_Charts, Deezer_Playlists, Shazam_Charts)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """
+class QueryProfile:
+    """
+    Timings of one query run. connect covers taking a pooled connection, execute runs until the
+    server has answered (with a buffered cursor that includes transferring the rows), fetch
+    reads them into Python and render formats them. bytes is the size of the values as text,
+    which is what the MySQL text protocol sends.
+    """
 
-                cursor.execute(info_insert_query, (
-                    row['in_apple_playlists'],
-                    row['in_apple_charts'],
-                    row['in_spotify_charts'],
-                    row['in_spotify_playlists'],
-                    row['streams'],
-                    row['in_deezer_charts'],
-                    int(row['in_deezer_playlists'].replace("," , "")),  
-                    row['in_shazam_charts']
-                ))
+    def __init__(self, query_id=None, query="", params=()):
+        self.query_id = query_id
+        self.query = query
+        self.params = tuple(params)
+        self.source = "sql"
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.rows = 0
+        self.bytes = 0
+        self.plan = None
 
-                profile_insert_query = """
-                INSERT IGNORE INTO TrackProfile (
-                    Liveliness, Instrumentalness, Mode, Music_Key, Bpm, Speechiness, Acoustiness, Valence, Danceability,
-                    Energy, Released_Day, Released_Month, Released_Year
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-   
-                cursor.execute(profile_insert_query, (
-                    row['liveness_%'],
-                    row['instrumentalness_%'],
-                    row['mode'],
-                    row['key'],
-                    row['bpm'],
-                    row['speechiness_%'],
-                    row['acousticness_%'],
-                    row['valence_%'],
-                    row['danceability_%'],
-                    row['energy_%'],
-                    row['released_day'],
-                    row['released_month'],
-                    row['released_year']
-                ))
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
 
-        db.commit()
-        print("Data loaded successfully into the database.")
+    def count(self, rows):
+        self.rows += len(rows)
+        self.bytes += sum(len(str(value).encode('utf-8')) for row in rows for value in row if value is not None)
 
-    except Error as e:
-        print("Error:", e)
+    def as_dict(self):
+        return {
+            "timestamp": time.time(),
+            "query_id": self.query_id,
+            "query_sha1": hashlib.sha1(self.query.encode('utf-8')).hexdigest()[:12],
+            "params": list(self.params),
+            "backend": BACKEND,
+            "source": self.source,
+            "seconds": {phase: round(seconds, 6) for phase, seconds in self.seconds.items()},
+            "total_seconds": round(sum(self.seconds.values()), 6),
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "plan": self.plan,
+        }
 
-    finally:
-        if db.is_connected():
-            cursor.close()
-            db.close()
-            print("MySQL connection is closed.")
+    def summary(self):
+        phases = " | ".join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in self.seconds.items())
+        return f"{phases} | {self.rows} rows, {self.bytes / 1024:.1f} KB ({self.source})"
 
-user = "root"
-password = ""
 
-try:
-    print("creating the database...")
+class QueryMetrics:
+    """
+    Prometheus text-format counters per query. Values already in the file are read back
+    first, so the counters keep growing across the short-lived CLI processes.
+    """
 
-    loading_animation("Setting up the database") 
-    createdb(user=user, passw=password)
-    print("defining tables...")
+    def __init__(self):
+        self.values = {}
+        self.loaded_from = None
+        self.lock = threading.Lock()
 
-    loading_animation("Creating tables")  
-    creattables(user=user, passw=password)
-    print("loading the dataset into the DB...")
+    def load(self, path):
+        self.loaded_from = path
+        if not os.path.exists(path):
+            return
+        with open(path, mode='r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip() and not line.startswith("#"):
+                    sample, value = line.rsplit(" ", 1)
+                    name, _, labels = sample.partition("{")
+                    self.values[(name, "{" + labels if labels else "")] = float(value)
 
-    loading_animation("Loading data into database")  
-    dataload(user=user, passwd=password, csv_file='Spotify.csv')
-except Error as e:
-    print(f"The database already exists, running queries only...")
+    def observe(self, profile):
+        query = f'query="{profile["query_id"]}"'
+        with self.lock:
+            if self.loaded_from != METRICS_FILE:
+                self.values.clear()
+                self.load(METRICS_FILE)
+            for phase, seconds in profile["seconds"].items():
+                self.add("spotify_query_phase_seconds_total", f'{{{query},phase="{phase}"}}', seconds)
+            self.add("spotify_query_runs_total", f'{{{query},source="{profile["source"]}"}}', 1)
+            self.add("spotify_query_rows_total", f"{{{query}}}", profile["rows"])
+            self.add("spotify_query_bytes_total", f"{{{query}}}", profile["bytes"])
+            self.values[("spotify_query_last_seconds", f"{{{query}}}")] = profile["total_seconds"]
+            self.write(METRICS_FILE)
 
-def loading_animation(text="Loading"):
+    def add(self, name, labels, amount):
+        self.values[(name, labels)] = self.values.get((name, labels), 0.0) + amount
+
+    def write(self, path):
+        lines = []
+        for name in sorted({name for name, _ in self.values}):
+            kind = "gauge" if name.endswith("_last_seconds") else "counter"
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{labels} {value:g}" for (sample, labels), value in sorted(self.values.items())
+                         if sample == name)
+        partial = path + ".tmp"
+        with open(partial, mode='w', encoding='utf-8') as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(partial, path)
+
+query_metrics = QueryMetrics()
+
+
+def record_profile(profile):
     """
-    Displays a loading animation with the given text.
+    Hands a finished profile to the structured log, the metrics file and QUERY_HOOKS.
     """
-    for i in range(10):  
-        sys.stdout.write(f"\r{text} {'.' * (i % 4)}")  
-        sys.stdout.flush()
-        time.sleep(0.3)  
-    print("\r" + " " * len(text + " ...") + "\r", end="")        
+    record = profile.as_dict()
+    if PROFILE_QUERIES:
+        print(Fore.MAGENTA + profile.summary() + Style.RESET_ALL)
+        if profile.plan:
+            print(profile.plan)
+    if QUERY_LOG:
+        with open(QUERY_LOG, mode='a', encoding='utf-8') as file:
+            file.write(json.dumps(record) + "\n")
+    if METRICS_FILE:
+        query_metrics.observe(record)
+    for hook in QUERY_HOOKS:
+        hook(record)
+
+
+def explain_analyze(cursor, query, params=()):
+    """
+    Returns the executed plan of a query as text (the plan is the last column
+    on every backend; DuckDB puts a label and SQLite node ids before it).
+    """
+    cursor.execute("EXPLAIN ANALYZE " + query.strip().rstrip(";"), params)
+    return "\n".join(str(row[-1]) for row in cursor.fetchall())
 
-##________________________________________________________________________
-# STEP 4: QUERY EXPOSITION AND EXECUTING THEM
 
-def execute_query(query):
+def fetch_query(query, profile=None, timeout=None, params=(), connection=None):
     """
-    Executes the given SQL query and displays the result.
+    Runs one SQL statement with its bound parameters and returns [(columns, rows)] ([] when it
+    returns no rows). On MySQL it runs as a prepared statement of the session (see 4.13).
+    The phases are timed into profile when one is given; timeout (seconds) limits the statement.
+    A connection passed in is used as it is and left open for the caller.
     """
-    loading_animation("Executing query")  
+    profile = profile or QueryProfile(query=query, params=params)
+    results = []
+    owned_connection = connection is None
+    if owned_connection:
+        with profile.phase("connect"):
+            connection = get_connection(user, password)
     try:
-        connection = mysql.connect(
-            host="localhost",
-            user="root",
-            password="",
-            database="Spotify"
-        )
-        cursor = connection.cursor(buffered=True)
-
-        for result in cursor.execute(query, multi=True):
-            if result.with_rows: 
-                columns = [desc[0] for desc in result.description]  
-                rows = result.fetchall()  
-                if rows:
-                    print(tabulate(rows, headers=columns, tablefmt="fancy_grid"))
-                else:
-                    print(Fore.RED + "Query executed successfully but returned no results." + Style.RESET_ALL)
+        if timeout:
+            limit_statement_time(connection, timeout)
+        with profile.phase("execute"):
+            if BACKEND == "mysql" and PREPARED_STATEMENTS:
+                # The prepared cursor stays open in the session's cache
+                cursor, owned = statement_cache.execute(connection, query, params), False
+            else:
+                cursor, owned = connection.cursor(buffered=True), True
+                cursor.execute(query, params)
+        if cursor.description:
+            columns = [desc[0] for desc in cursor.description]
+            with profile.phase("fetch"):
+                rows = cursor.fetchall()
+            profile.count(rows)
+            results.append((columns, rows))
 
-        cursor.close()
+        if EXPLAIN_ANALYZE:
+            plan_cursor = connection.cursor(buffered=True)
+            try:
+                profile.plan = explain_analyze(plan_cursor, query, params)
+            except Error as e:
+                profile.plan = f"EXPLAIN ANALYZE failed: {e}"
+            plan_cursor.close()
+        if owned:
+            cursor.close()
+    finally:
+        try:
+            if timeout and BACKEND == "mysql":
+                # The session goes back to the pool as it is
+                limit_statement_time(connection, 0)
+        finally:
+            if owned_connection:
+                connection.close()
+    return results
+
+
+def fetch_results(query, query_id=None, profile=None, quiet=False, timeout=None, params=()):
+    """
+    Returns the [(columns, rows)] of a query. Menu queries (with a query_id) are answered from
+    query_cache when the load generation read on the query's own connection is unchanged, or
+    from the in-process analytics engine when QUERY_ENGINE is "pandas". quiet skips the
+    animation and the cache notice.
+    """
+    profile = profile or QueryProfile(query_id, query, params)
+    if query_id is not None and QUERY_ENGINE == "pandas":
+        profile.source = "pandas"
+        with profile.phase("execute"):
+            results = analytics_engine().run(query_id, top_n=TOP_N, liveliness=LIVELINESS_THRESHOLD)
+        for _, rows in results:
+            profile.count(rows)
+        return results
+    if query_id is None:
+        if not quiet:
+            loading_animation("Executing query")
+        return fetch_query(query, profile, timeout, params)
+
+    with profile.phase("connect"):
+        connection = get_connection(user, password)
+    try:
+        version_cursor = connection.cursor(buffered=True)
+        version = dataset_version(version_cursor)
+        version_cursor.close()
+        results = query_cache.get(query_id, query, version, params) if version is not None else None
+        if results is not None:
+            if not quiet:
+                print(Fore.CYAN + "(cached result)" + Style.RESET_ALL)
+            profile.source = "cache"
+            for _, rows in results:
+                profile.count(rows)
+            return results
+        if not quiet:
+            loading_animation("Executing query")
+        results = fetch_query(query, profile, timeout, params, connection=connection)
+    finally:
         connection.close()
+    if version is not None:
+        query_cache.put(query_id, query, version, results, params)
+    return results
+
 
-    except mysql.Error as e:
+def execute_query(query, query_id=None, params=()):
+    """
+    Executes the given SQL query, displays the result and records its profile.
+    """
+    profile = QueryProfile(query_id, query, params)
+    try:
+        results = fetch_results(query, query_id, profile, params=params)
+    except (mysql.Error, OSError, KeyError, ValueError) as e:
         print(Fore.RED + f"Error: {e}" + Style.RESET_ALL)
+        return
+
+    with profile.phase("render"):
+        for columns, rows in results:
+            if rows:
+                print(tabulate(rows, headers=columns, tablefmt="fancy_grid"))
+            else:
+                print(Fore.RED + "Query executed successfully but returned no results." + Style.RESET_ALL)
+    record_profile(profile)
+
+
+##__________________________________________________
+# 4.11 Report mode: every menu query at once on a thread pool over the connection pool
+
+REPORT_FILE = 'spotify_report.html'   # .html, .json or .csv
+REPORT_WORKERS = POOL_SIZE            # queries running at the same time (capped at POOL_SIZE on MySQL)
+REPORT_TIMEOUT = 60                   # seconds a single query may run
+
+def limit_statement_time(connection, seconds):
+    """
+    Makes the engine give up on statements of this connection after `seconds` (0: no limit), so
+    a query the report has stopped waiting for also frees its connection: max_execution_time on
+    MySQL, a progress handler on SQLite. DuckDB has no per-statement limit, so there the
+    statement finishes in the background.
+    """
+    if BACKEND == "mysql":
+        cursor = connection.cursor()
+        cursor.execute("SET SESSION max_execution_time = %s", (int(seconds * 1000),))
+        cursor.close()
+    elif BACKEND == "sqlite" and not seconds:
+        connection.raw.set_progress_handler(None, 0)
+    elif BACKEND == "sqlite":
+        deadline = time.perf_counter() + seconds
+        connection.raw.set_progress_handler(lambda: time.perf_counter() > deadline, 10_000)
+
+
+def run_report(queries=None, workers=None, timeout=None):
+    """
+    Runs the queries concurrently and returns one entry per query, in menu order, with its status
+    ("ok", "error" or "timeout"), columns, rows and profile. Wall-clock time is close to the
+    slowest query rather than the sum. Each query's timeout counts from when it starts running.
+    """
+    queries = queries or QUERIES
+    workers = workers or REPORT_WORKERS
+    timeout = timeout or REPORT_TIMEOUT
+    if BACKEND == "mysql":
+        workers = min(workers, POOL_SIZE)
+    workers = max(1, min(workers, len(queries)))
+    if QUERY_ENGINE == "pandas":
+        analytics_engine()   # build it once, not in every thread
+
+    started = {}
+    def run(query_id, profile):
+        started[query_id] = time.perf_counter()
+        return fetch_results(profile.query, query_id, profile, quiet=True, timeout=timeout, params=profile.params)
+
+    entries = {}
+    profiles = {query_id: QueryProfile(query_id, *menu_query(entry)) for query_id, entry in queries.items()}
+    wall_start = time.perf_counter()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+    try:
+        futures = {executor.submit(run, query_id, profile): query_id for query_id, profile in profiles.items()}
+        pending = set(futures)
+        while pending:
+            done, pending = concurrent.futures.wait(pending, timeout=0.05,
+                                                    return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                query_id = futures[future]
+                try:
+                    results = future.result()
+                    columns, rows = results[-1] if results else ([], [])
+                    entries[query_id] = {"status": "ok", "columns": columns, "rows": rows, "error": None}
+                except (Error, OSError, KeyError, ValueError) as e:
+                    # A statement the engine abandoned at the deadline is reported as a timeout
+                    late = time.perf_counter() - started.get(query_id, wall_start) >= timeout
+                    entries[query_id] = {"status": "timeout" if late else "error", "columns": [], "rows": [],
+                                         "error": str(e)}
+            now = time.perf_counter()
+            for future in list(pending):
+                query_id = futures[future]
+                if query_id in started and now - started[query_id] > timeout:
+                    pending.discard(future)
+                    entries[query_id] = {"status": "timeout", "columns": [], "rows": [],
+                                         "error": f"no result after {timeout}s"}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    wall_seconds = time.perf_counter() - wall_start
+
+    report = []
+    for query_id, entry in queries.items():
+        profile = profiles[query_id]
+        if entries[query_id]["status"] == "ok":
+            record_profile(profile)
+        report.append({
+            "id": query_id,
+            "description": entry["description"].strip(),
+            **entries[query_id],
+            "seconds": round(sum(profile.seconds.values()), 6),
+            "profile": profile.as_dict(),
+        })
+    return report, wall_seconds
+
+
+def write_report(report, wall_seconds, path=None):
+    """
+    Writes the report as one artifact; the format follows the extension (.html, .json or .csv).
+    """
+    path = path or REPORT_FILE
+    extension = os.path.splitext(path)[1].lower()
+    generated_at = time.strftime("%Y-%m-%d %H:%M:%S")
+    if extension == ".json":
+        with open(path, mode='w', encoding='utf-8') as file:
+            json.dump({"generated_at": generated_at, "backend": BACKEND, "wall_seconds": round(wall_seconds, 6),
+                       "queries": [dict(entry, rows=[list(row) for row in entry["rows"]]) for entry in report]},
+                      file, indent=2, default=json_value)
+    elif extension == ".csv":
+        # One block per query: a title row, the column names, the rows and a blank separator
+        with open(path, mode='w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file)
+            for entry in report:
+                writer.writerow([f"Query {entry['id']}", entry["description"], entry["status"], entry["seconds"]])
+                if entry["status"] == "ok":
+                    writer.writerow(entry["columns"])
+                    writer.writerows(entry["rows"])
+                else:
+                    writer.writerow([entry["error"]])
+                writer.writerow([])
+    elif extension in (".html", ".htm"):
+        sections = []
+        for entry in report:
+            body = (tabulate(entry["rows"], headers=entry["columns"], tablefmt="html") if entry["status"] == "ok"
+                    else f"<p class=\"{entry['status']}\">{html.escape(entry['error'])}</p>")
+            sections.append(f"<h2>{entry['id']}. {html.escape(entry['description'])}</h2>\n"
+                            f"<p>{entry['status']}, {entry['seconds'] * 1000:.1f} ms</p>\n{body}")
+        with open(path, mode='w', encoding='utf-8') as file:
+            file.write(
+                "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Spotify report</title></head><body>\n"
+                f"<h1>Spotify report</h1>\n<p>Generated {generated_at} on {BACKEND} in {wall_seconds:.2f}s.</p>\n"
+                + "\n".join(sections) + "\n</body></html>\n"
+            )
+    else:
+        raise ValueError(f"Unknown report format {extension!r}; use .html, .json or .csv")
+    return path
+
+
+##__________________________________________________
+# 4.12 Streaming large results: unbuffered fetchmany() batches, paged output and exports
+
+STREAM_BATCH = 1000       # rows per fetchmany() call
+PAGE_SIZE = 50            # rows per table page in the terminal
+
+class ResultStream:
+    """
+    One SELECT read through an unbuffered cursor, fetchmany() batch by batch, so memory holds
+    a single batch however many rows the query returns. Use it as a context manager:
+
+        with ResultStream("SELECT * FROM Track") as stream:
+            for row in stream: ...
+    """
+
+    def __init__(self, query, params=(), batch_size=None, profile=None):
+        self.query = query.strip().rstrip(";")
+        self.params = params
+        self.batch_size = batch_size or STREAM_BATCH
+        self.profile = profile or QueryProfile(query=query)
+        self.profile.source = "stream"
+        self.connection = self.cursor = None
+        self.columns = []
+        self.exhausted = False
+
+    def __enter__(self):
+        with self.profile.phase("connect"):
+            self.connection = get_connection(user, password)
+        try:
+            self.cursor = self.connection.cursor(buffered=False)
+            with self.profile.phase("execute"):
+                self.cursor.execute(self.query, self.params)
+        except Error:
+            self.connection.close()
+            raise
+        self.columns = [desc[0] for desc in self.cursor.description or ()]
+        return self
+
+    def batches(self):
+        while True:
+            with self.profile.phase("fetch"):
+                rows = self.cursor.fetchmany(self.batch_size)
+            if not rows:
+                self.exhausted = True
+                return
+            self.profile.count(rows)
+            yield rows
+
+    def __iter__(self):
+        for rows in self.batches():
+            yield from rows
+
+    def __exit__(self, exc_type, exc, traceback):
+        try:
+            # mysql.connector refuses to reuse a connection with unread rows; they are read
+            # and dropped without keeping them (the server has already sent them)
+            if BACKEND == "mysql" and not self.exhausted:
+                self.connection.consume_results()
+            self.cursor.close()
+        finally:
+            self.connection.close()
+        return False
+
+
+def page_stream(stream, page_size=None, out=None, interactive=None):
+    """
+    Renders the stream as fancy_grid tables of page_size rows. In a terminal the user is asked
+    before each further page and can stop with q; otherwise every page is written.
+    """
+    out = out or sys.stdout
+    page_size = page_size or PAGE_SIZE
+    interactive = sys.stdin.isatty() and out.isatty() if interactive is None else interactive
+    shown = 0
+    rows = iter(stream)
+    while True:
+        page = list(itertools.islice(rows, page_size))
+        if not page:
+            break
+        with stream.profile.phase("render"):
+            out.write(tabulate(page, headers=stream.columns, tablefmt="fancy_grid") + "\n")
+        shown += len(page)
+        if len(page) < page_size:
+            break
+        if interactive:
+            answer = input(Fore.GREEN + f"-- {shown} rows shown, Enter for more, q to stop -- " + Style.RESET_ALL)
+            if answer.strip().lower() == "q":
+                break
+    if not shown:
+        out.write("Query executed successfully but returned no results.\n")
+    return shown
+
+
+def export_stream(stream, output_format, out=None):
+    """
+    Writes the stream as CSV (with a header row) or JSON lines (one object per row),
+    batch by batch. Returns the number of rows written.
+    """
+    out = out or sys.stdout
+    written = 0
+    writer = csv.writer(out) if output_format == "csv" else None
+    if writer:
+        writer.writerow(stream.columns)
+    for rows in stream.batches():
+        with stream.profile.phase("render"):
+            if writer:
+                writer.writerows(rows)
+            else:
+                out.writelines(json.dumps(dict(zip(stream.columns, row)), default=json_value) + "\n" for row in rows)
+        written += len(rows)
+    return written
+
+
+##__________________________________________________
+# 4.13 Prepared query templates: bound parameters and a per-session statement cache
+
+TOP_N = None                  # rows of the top-N queries (2, 3, 4, 6, 9, 10); None keeps each query's own
+LIVELINESS_THRESHOLD = 70     # query 5: Liveliness above this counts as a lively track
+PREPARED_STATEMENTS = True    # run the menu queries as server-side prepared statements (MySQL)
+STATEMENT_CACHE_SIZE = 32     # prepared statements kept per MySQL session
+
+# "%(name)s" markers in the menu query templates
+PARAM_PATTERN = re.compile(r"%\((\w+)\)s")
+
+def query_params(entry=None):
+    """
+    The values the "%(name)s" markers of a QUERIES entry are bound to.
+    """
+    return {
+        "top_n": TOP_N or (entry or {}).get("top_n"),
+        "liveliness": LIVELINESS_THRESHOLD,
+        "year_from": YEAR_FROM,
+        "year_to": YEAR_TO,
+    }
+
+def query_statement(template, entry=None):
+    """
+    Turns a menu query template into (SQL with positional %s markers, parameters). Only the
+    shape of the year window is written into the text (see 3.3); every value is bound, so
+    changing the top-N, threshold or years reuses the statement the server already prepared.
+    """
+    template = template.format(years=YearWindow(YEAR_FROM, YEAR_TO))
+    values = query_params(entry)
+    params = tuple(values[name] for name in PARAM_PATTERN.findall(template))
+    return PARAM_PATTERN.sub("%s", template), params
+
+
+class StatementCache:
+    """
+    Prepared-statement cursors of each pooled MySQL connection, so a query run again on the
+    same connection is only executed, not parsed and planned again. When the connection was
+    reconnected (it has a new connection_id) the old session's statements are dropped and it
+    starts with an empty cache; past max_statements the least recently used statement is
+    deallocated. Holds at most one entry per connection of the pools; reset_pool() clears it.
+    """
+
+    def __init__(self, max_statements=STATEMENT_CACHE_SIZE):
+        self.max_statements = max_statements
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def statements(self, connection):
+        # The pool hands out wrappers around the same few connections, which keep their
+        # identity when ping() reconnects them; a session is only used by the thread that
+        # checked its connection out
+        connection_id = connection.connection_id
+        key = getattr(connection, "_cnx", connection)
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is None or session[0] != connection_id:
+                # The handles of a replaced session are gone with it, so they are forgotten,
+                # not closed: closing them would deallocate statements of the new session
+                session = self.sessions[key] = (connection_id, OrderedDict())
+            return session[1]
+
+    def execute(self, connection, query, params=()):
+        """
+        Executes a single statement as a prepared statement of the connection's session
+        and returns its cursor, with the rows still to be fetched.
+        """
+        statements = self.statements(connection)
+        for attempt in range(2):
+            if query not in statements:
+                statements[query] = (query, connection.cursor(prepared=True))
+            statements.move_to_end(query)
+            sql, cursor = statements[query]
+            try:
+                # The connector prepares again unless it gets the very string it prepared
+                cursor.execute(sql, params)
+                break
+            except errors.DatabaseError as e:
+                # The server forgot the statement (e.g. it restarted and reused the connection id)
+                if e.errno != errorcode.ER_UNKNOWN_STMT_HANDLER or attempt:
+                    raise
+                statements.clear()
+        while len(statements) > self.max_statements:
+            _, (_, evicted) = statements.popitem(last=False)
+            evicted.close()
+        return cursor
+
+    def clear(self):
+        with self.lock:
+            self.sessions.clear()
+
+statement_cache = StatementCache()
 
 
 def display_menu(queries):
@@ -407,355 +3666,392 @@ def display_menu(queries):
     return choice
 
 
-def main():
-    queries = {
-        1: {
-            "description": "Cultural Trends: How Have They Evolved Over a Century?",
-            "Qinfo": """
-            -> Your wish is our command! This ouput provides insight into how track features have evolved across the span of a century. 
-            With this information we are reflecting fluctuations in public taste and facilitating researchers or 
-            music sommeliers in correlating possible cultural/socioeconomic events during these years to the 
-            released music in chronological publication.""",
-            "query": """
+USE_SUMMARY_TABLES = True     # answer queries 1, 7, 8 and 9 from the summary tables (see 4.4)
+
+QUERIES = {
+    1: {
+        "description": "Cultural Trends: How Have They Evolved Over a Century?",
+        "Qinfo": """
+        -> Your wish is our command! This ouput provides insight into how track features have evolved across the span of a century. 
+        With this information we are reflecting fluctuations in public taste and facilitating researchers or 
+        music sommeliers in correlating possible cultural/socioeconomic events during these years to the 
+        released music in chronological publication.""",
+        "query": """
+        SELECT 
+            Released_Year,                           
+            AVG(Bpm) AS avg_bpm,                     
+            AVG(Danceability) AS avg_danceability,   
+            COUNT(Profile_ID) AS total_songs         
+        FROM TrackProfile                            
+        WHERE Released_Year IS NOT NULL              
+            AND {years}                              
+        GROUP BY Released_Year                       
+        ORDER BY Released_Year;                      
+        """,
+        "summary_query": """
+        SELECT
+            Released_Year,
+            Bpm_Sum * 1.0 / Song_Count AS avg_bpm,
+            Danceability_Sum * 1.0 / Song_Count AS avg_danceability,
+            Song_Count AS total_songs
+        FROM Year_Summary
+        WHERE {years}
+        ORDER BY Released_Year;
+        """
+    },
+
+    2 : {
+        "description": "Top Charting Tracks in Shazam",
+        "Qinfo": """
+        -> Your wish is our command! This output gives insight about Shazam trends and helps identify
+        songs that are popular among people discovering new music. This allows us to find niche trends:
+        Shazam is a platform for new music discovery and if a song is interesting enough to compel a
+        first-time listener, these tracks are gold-mines for music researchers.
+        """,
+        "query":"""         
+        SELECT
+            t.Track_Name AS track_name, 
+            GROUP_CONCAT(DISTINCT rb.Artist_Name) AS artist_name, 
+            si.Shazam_Charts AS in_shazam_charts, 
+            MAX(si.Streams) AS streams 
+        FROM
+            Track t 
+        JOIN
+            Released_By rb ON t.Track_ID = rb.Track_ID 
+        JOIN
+            StreamingInfo si ON t.Track_ID = si.Info_ID 
+        WHERE
+            si.Shazam_Charts IS NOT NULL 
+            AND {years:si}
+        GROUP BY
+            t.Track_Name, si.Shazam_Charts 
+        ORDER BY
+            si.Shazam_Charts DESC 
+        LIMIT %(top_n)s; 
+        """,
+        "top_n": 10,
+    },
+   
+    3 : {
+        "description": "Tracks Most Present Accross ALL Platforms",
+        "Qinfo":"""
+        -> Your wish is our command! This ouput allows us to identify the Top 10 Tracks 
+        with the most presence in playlist platforms available to our database; this 
+        includes Spotify, Apple Music, and Deezer. This may help you identify the songs
+        with the greatest appeal across the most used platforms!""",
+        "query": """
             SELECT 
-                Released_Year,                           
-                AVG(Bpm) AS avg_bpm,                     
-                AVG(Danceability) AS avg_danceability,   
-                COUNT(Profile_ID) AS total_songs         
-            FROM TrackProfile                            
-            WHERE Released_Year IS NOT NULL              
-            GROUP BY Released_Year                       
-            ORDER BY Released_Year;                      
-            """
-        },
-
-        2 : {
-            "description": "Top Charting Tracks in Shazam",
-            "Qinfo": """
-            -> Your wish is our command! This output gives insight about Shazam trends and helps identify
-            songs that are popular among people discovering new music. This allows us to find niche trends:
-            Shazam is a platform for new music discovery and if a song is interesting enough to compel a
-            first-time listener, these tracks are gold-mines for music researchers.
-            """,
-            "query":"""         
-            SELECT
-                t.Track_Name AS track_name, 
+                t.Track_Name AS track_name,
                 GROUP_CONCAT(DISTINCT rb.Artist_Name) AS artist_name, 
-                si.Shazam_Charts AS in_shazam_charts, 
-                MAX(si.Streams) AS streams 
-            FROM
-                Track t 
-            JOIN
-                Released_By rb ON t.Track_ID = rb.Track_ID 
-            JOIN
-                StreamingInfo si ON t.Track_ID = si.Info_ID 
-            WHERE
-                si.Shazam_Charts IS NOT NULL 
-            GROUP BY
-                t.Track_Name, si.Shazam_Charts 
-            ORDER BY
-                si.Shazam_Charts DESC 
-            LIMIT 10; 
-            """
-        },
-       
-        3 : {
-            "description": "Tracks Most Present Accross ALL Platforms",
-            "Qinfo":"""
-            -> Your wish is our command! This ouput allows us to identify the Top 10 Tracks 
-            with the most presence in playlist platforms available to our database; this 
-            includes Spotify, Apple Music, and Deezer. This may help you identify the songs
-            with the greatest appeal across the most used platforms!""",
-            "query": """
-                SELECT 
-                    t.Track_Name AS track_name,
-                    GROUP_CONCAT(DISTINCT rb.Artist_Name) AS artist_name, 
-                    SUM(DISTINCT si.Spotify_Playlists + si.Apple_Playlists + si.Deezer_Playlists) AS total_playlist_presence
-                FROM 
-                    Track t
-                JOIN 
-                    Released_By rb ON t.Track_ID = rb.Track_ID
-                JOIN 
-                    StreamingInfo si ON t.Track_ID = si.Info_ID
-                GROUP BY 
-                    t.Track_Name
-                ORDER BY 
-                    total_playlist_presence DESC
-                LIMIT 10;
-            """
-        },
-
-        4: {
-            "description": "Could BPM Range Correlate with Stream Success?",
-            "Qinfo": """ 
-            -> Your wish is our command! This output allows us to identify the Top 10 Tracks 
-            with the highest streams and their BPM range. By analyzing this data, we can gain 
-            insights into the tempo characteristics that are most associated with popular songs. 
-            Whether you're exploring music trends or crafting playlists, this data can guide 
-            your understanding of how BPM influences audience appeal!
-            """,
-            "query": """
-                SELECT 
-                    t.Track_Name AS track_name,
-                    GROUP_CONCAT(DISTINCT rb.Artist_Name) AS artist_name,
-                    si.Streams AS streams,
-                    tp.Bpm AS bpm
-                FROM 
-                    Track t
-                JOIN 
-                    Released_By rb ON t.Track_ID = rb.Track_ID
-                JOIN 
-                    StreamingInfo si ON t.Track_ID = si.Info_ID
-                JOIN 
-                    TrackProfile tp ON t.Track_ID = tp.Profile_ID
-                WHERE 
-                    si.Streams IS NOT NULL
-                GROUP BY 
-                    t.Track_Name, tp.Bpm, si.Streams
-
-                ORDER BY 
-                    si.Streams DESC
-                LIMIT 10;
-            """
-        },
-        
-        5 : {
-            "description": "Liveliness and Album Cover Correlation",
-            "Qinfo": """
-            -> Your wish is our command! This ouput, establishing a liveliness threshold above 
-            70percent liveliness, allows us to find a possible correlation between an Album Cover 
-            presence and the track's ability to be engaging/lively. This is highly interpretable 
-            and is valuable to see how much high-energy songs are visually represented by artists.
-            """,
-            "query": """
-            WITH ValidCoverCount AS (
-                SELECT 
-                    COUNT(*) AS total_high_liveness_songs, 
-                    SUM(
-                        CASE 
-                            WHEN t.Cover_URL IS NOT NULL 
-                                AND t.Cover_URL NOT IN ('', 'Not Found') 
-                            THEN 1 
-                            ELSE 0 
-                        END
-                    ) AS songs_with_cover_url 
-                FROM 
-                    Track t 
-                JOIN 
-                    TrackProfile tp ON tp.Profile_ID = t.Track_ID 
-                WHERE 
-                    tp.Liveliness > 70 
-            )
-            SELECT 
-                total_high_liveness_songs, 
-                songs_with_cover_url, 
-                ROUND(songs_with_cover_url * 100.0 / total_high_liveness_songs, 2) AS percentage_with_cover_url 
+                SUM(DISTINCT si.Spotify_Playlists + si.Apple_Playlists + si.Deezer_Playlists) AS total_playlist_presence
             FROM 
-                ValidCoverCount; 
-            """
-        },
-
-        6: {
-            "description": "Top 5 Most Successful Artists, According to Spotify playlists",
-            "Qinfo": """
-            -> Your wish is our command! This ouput allows us to identify the Top 5 Artists 
-            with the highest number of distinct tracks in Spotify Playlists. Here, we can measure a certain
-            metric of popularity, given that Spotify has 626 million monthy active users!
-            """,
-            "query": """
+                Track t
+            JOIN 
+                Released_By rb ON t.Track_ID = rb.Track_ID
+            JOIN 
+                StreamingInfo si ON t.Track_ID = si.Info_ID
+            WHERE
+                {years:si}
+            GROUP BY 
+                t.Track_Name
+            ORDER BY 
+                total_playlist_presence DESC
+            LIMIT %(top_n)s;
+        """,
+        "top_n": 10,
+    },
+
+    4: {
+        "description": "Could BPM Range Correlate with Stream Success?",
+        "Qinfo": """ 
+        -> Your wish is our command! This output allows us to identify the Top 10 Tracks 
+        with the highest streams and their BPM range. By analyzing this data, we can gain 
+        insights into the tempo characteristics that are most associated with popular songs. 
+        Whether you're exploring music trends or crafting playlists, this data can guide 
+        your understanding of how BPM influences audience appeal!
+        """,
+        "query": """
             SELECT 
-                rb.Artist_Name,  
-                COUNT(DISTINCT t.Track_ID) AS tracks_in_playlists 
+                t.Track_Name AS track_name,
+                GROUP_CONCAT(DISTINCT rb.Artist_Name) AS artist_name,
+                si.Streams AS streams,
+                tp.Bpm AS bpm
             FROM 
-                Released_By rb 
+                Track t
             JOIN 
-                Track t ON rb.Track_ID = t.Track_ID
+                Released_By rb ON t.Track_ID = rb.Track_ID
             JOIN 
-                StreamingInfo si ON t.Track_ID = si.Info_ID 
+                StreamingInfo si ON t.Track_ID = si.Info_ID
+            JOIN 
+                TrackProfile tp ON t.Track_ID = tp.Profile_ID
             WHERE 
-                si.Spotify_Playlists > 0 
+                si.Streams IS NOT NULL
+                AND {years:si} AND {years:tp}
             GROUP BY 
-                rb.Artist_Name 
+                t.Track_Name, tp.Bpm, si.Streams
+
             ORDER BY 
-                tracks_in_playlists DESC
-            LIMIT 5; 
-            """
-        },
-  
-        7: {
-            "description": "Does Energy Category Predict Overall Streaming Patterns?",
-            "Qinfo": """ 
-            -> Your wish is our command! This output allows us to analyze 
-            the average number of high streams by energy category. This can provide 
-            insights into listener preferences and trends based on the energy levels of 
-            tracks, enabling data-driven decisions in playlist curation and marketing strategies!
-            """,
-            "query": """
-            WITH AvgStreams AS (
-                SELECT AVG(Streams) AS avg_streams
-                FROM StreamingInfo
-            )
-            SELECT
-                Energy_Category,
-                AVG(High_Streams) AS avg_high_streams
-            FROM (
-                SELECT 
+                si.Streams DESC
+            LIMIT %(top_n)s;
+        """,
+        "top_n": 10,
+    },
+    
+    5 : {
+        "description": "Liveliness and Album Cover Correlation",
+        "Qinfo": """
+        -> Your wish is our command! This ouput, establishing a liveliness threshold above 
+        70percent liveliness, allows us to find a possible correlation between an Album Cover 
+        presence and the track's ability to be engaging/lively. This is highly interpretable 
+        and is valuable to see how much high-energy songs are visually represented by artists.
+        """,
+        "query": """
+        WITH ValidCoverCount AS (
+            SELECT 
+                COUNT(*) AS total_high_liveness_songs, 
+                SUM(
                     CASE 
-                        WHEN Energy < 30 THEN 'Low Energy' 
-                        WHEN Energy BETWEEN 30 AND 70 THEN 'Medium Energy' 
-                        ELSE 'High Energy' 
-                    END AS Energy_Category,
-                    Streams AS High_Streams
-                FROM TrackProfile
-                JOIN StreamingInfo 
-                    ON TrackProfile.Profile_ID = StreamingInfo.Info_ID
-                JOIN AvgStreams 
-                    ON Streams > avg_streams 
-            ) AS Energy_Classification
-            GROUP BY Energy_Category;
-            """
-        },
-
-        8: {
-            "description": "How Energy Levels Impact Platform Presence",
-            "Qinfo": """ 
-            -> Your wish is our command! This query examines the relationship 
-            between a track's energy category and its presence on different music 
-            platforms. By categorizing platform presence into single-platform and 
-            multi-platform exposure, and calculating average streams for each group, 
-            this analysis reveals how energy levels influence a track's distribution 
-            and success across platforms.
-            """,
-            "query": """
-            -- Step 1: Categorize tracks based on their energy levels and collect related data
-            WITH Energy_Categorization AS (
-                SELECT DISTINCT 
-                    t.Track_ID, 
-                    t.Track_Name, 
-                    rb.Artist_Name, 
-                    tp.Energy, 
-                    si.Streams, 
-                    CASE
-                        WHEN tp.Energy < 30 THEN 'Low Energy'
-                        WHEN tp.Energy BETWEEN 30 AND 70 THEN 'Medium Energy' 
-                        ELSE 'High Energy' 
-                    END AS Energy_Category, 
-                    si.Spotify_Charts, 
-                    si.Deezer_Charts, 
-                    si.Apple_Charts 
-                FROM
-                    TrackProfile tp 
-                JOIN StreamingInfo si ON tp.Profile_ID = si.Info_ID 
-                JOIN Track t ON t.Track_ID = tp.Profile_ID 
-                JOIN Released_By rb ON rb.Track_ID = t.Track_ID 
-            ),
-            Platform_Presence_Categorization AS (
-                SELECT
-                    Track_ID, 
-                    Track_Name, 
-                    Artist_Name, 
-                    Energy, 
-                    Streams, 
-                    Energy_Category, 
-                    Spotify_Charts, 
-                    Deezer_Charts, 
-                    Apple_Charts, 
-                    CASE
-                        WHEN 
-                            (Spotify_Charts = 0 AND Deezer_Charts = 0 AND Apple_Charts > 0) OR
-                            (Spotify_Charts = 0 AND Deezer_Charts > 0 AND Apple_Charts = 0) OR
-                            (Spotify_Charts > 0 AND Deezer_Charts = 0 AND Apple_Charts = 0)
-                        THEN 'Single-Platform Presence'
-                        WHEN 
-                            (Spotify_Charts > 0 AND Deezer_Charts > 0 AND Apple_Charts > 0) OR
-                            (Spotify_Charts > 0 AND Deezer_Charts > 0) OR
-                            (Spotify_Charts > 0 AND Apple_Charts > 0) OR
-                            (Deezer_Charts > 0 AND Apple_Charts > 0)
-                        THEN 'Multi-Platform Presence' 
-                        ELSE 'Other' 
-                    END AS Platform_Presence 
-                FROM
-                    Energy_Categorization 
-            )
-            SELECT
-                Energy_Category, 
-                Platform_Presence, 
-                ROUND(AVG(Streams), 2) AS avg_streams, 
-                COUNT(DISTINCT Track_ID) AS unique_tracks 
-            FROM (
-                SELECT DISTINCT
-                    Track_ID, 
-                    Energy_Category, 
-                    Platform_Presence, 
-                    Streams 
-                FROM
-                    Platform_Presence_Categorization 
-                WHERE
-                    Platform_Presence IN ('Multi-Platform Presence', 'Single-Platform Presence')
-            ) AS filtered_tracks 
-            GROUP BY
-                Platform_Presence, Energy_Category 
-            ORDER BY
-                FIELD(Energy_Category, 'High Energy', 'Medium Energy', 'Low Energy'), 
-                Platform_Presence; 
-            """
-        },
-
-        9: {
-            "description": " Most Seasonal Tracks",
-            "Qinfo": """ 
-            -> Analyze the release patterns for tracks that are most frequently streamed during 
-            specific months of the year. This can be extremely telling in terms of which months
-            produce the most seasonally-streamed tracks. Utilizing these stats, one can produce 
-            songs to have continuous relevance in designated months.
-            """,
-            "query": """
-			SELECT 
-                tp.Released_Month AS release_month, 
-                COUNT(t.Track_ID) AS track_count, 
-                ROUND(AVG(si.Streams), 2) AS avg_streams 
+                        WHEN t.Cover_URL IS NOT NULL 
+                            AND t.Cover_URL NOT IN ('', 'Not Found') 
+                        THEN 1 
+                        ELSE 0 
+                    END
+                ) AS songs_with_cover_url 
             FROM 
                 Track t 
             JOIN 
-                StreamingInfo si ON t.Track_ID = si.Info_ID 
-            JOIN 
-                TrackProfile tp ON t.Track_ID = tp.Profile_ID 
-            GROUP BY 
-                tp.Released_Month 
-            ORDER BY 
-                avg_streams DESC 
-            LIMIT 12; 
-            """,
-        },
-     
-        10: {
-            "description": "Tracks Dominating a Single Platform",
-            "Qinfo": """ 
-            -> Your wish is our command! This query identifies tracks that perform 
-            best on a single platform—Spotify, Apple Music, or Deezer—by comparing 
-            playlist presence. It highlights platform-specific dominance and 
-            streaming trends for top tracks.
-            """,
-            "query": """
+                TrackProfile tp ON tp.Profile_ID = t.Track_ID 
+            WHERE 
+                tp.Liveliness > %(liveliness)s 
+                AND {years:tp}
+        )
+        SELECT 
+            total_high_liveness_songs, 
+            songs_with_cover_url, 
+            ROUND(songs_with_cover_url * 100.0 / total_high_liveness_songs, 2) AS percentage_with_cover_url 
+        FROM 
+            ValidCoverCount; 
+        """
+    },
+
+    6: {
+        "description": "Top 5 Most Successful Artists, According to Spotify playlists",
+        "Qinfo": """
+        -> Your wish is our command! This ouput allows us to identify the Top 5 Artists 
+        with the highest number of distinct tracks in Spotify Playlists. Here, we can measure a certain
+        metric of popularity, given that Spotify has 626 million monthy active users!
+        """,
+        "query": """
+        SELECT 
+            rb.Artist_Name,  
+            COUNT(DISTINCT t.Track_ID) AS tracks_in_playlists 
+        FROM 
+            Released_By rb 
+        JOIN 
+            Track t ON rb.Track_ID = t.Track_ID
+        JOIN 
+            StreamingInfo si ON t.Track_ID = si.Info_ID 
+        WHERE 
+            si.Spotify_Playlists > 0 
+            AND {years:si}
+        GROUP BY 
+            rb.Artist_Name 
+        ORDER BY 
+            tracks_in_playlists DESC
+        LIMIT %(top_n)s; 
+        """,
+        "top_n": 5,
+    },
+
+    7: {
+        "description": "Does Energy Category Predict Overall Streaming Patterns?",
+        "Qinfo": """ 
+        -> Your wish is our command! This output allows us to analyze 
+        the average number of high streams by energy category. This can provide 
+        insights into listener preferences and trends based on the energy levels of 
+        tracks, enabling data-driven decisions in playlist curation and marketing strategies!
+        """,
+        "query": """
+        WITH AvgStreams AS (
+            SELECT AVG(Streams) AS avg_streams
+            FROM StreamingInfo
+            WHERE {years}
+        )
+        SELECT
+            Energy_Category,
+            AVG(High_Streams) AS avg_high_streams
+        FROM (
+            SELECT 
+                Energy_Category,            -- stored at load time (see 3.2)
+                Streams AS High_Streams
+            FROM TrackProfile
+            JOIN StreamingInfo 
+                ON TrackProfile.Profile_ID = StreamingInfo.Info_ID
+            JOIN AvgStreams 
+                ON Streams > avg_streams 
+            WHERE {years:StreamingInfo} AND {years:TrackProfile}
+        ) AS Energy_Classification
+        GROUP BY Energy_Category;
+        """,
+        # Whole Streams buckets above the average come from the summary; only the bucket
+        # holding the average is resolved row by row (a range scan on idx_info_streams)
+        "summary_query": f"""
+        WITH Totals AS (
+            SELECT
+                SUM(Streams_Sum) * 1.0 / SUM(Track_Count) AS avg_streams,
+                SUM(Streams_Sum) DIV (SUM(Track_Count) * {STREAMS_BUCKET}) AS avg_bucket
+            FROM Energy_Streams_Summary
+        ),
+        Above_Average AS (
+            SELECT Energy_Category, Streams_Sum, Track_Count
+            FROM Energy_Streams_Summary
+            JOIN Totals ON Streams_Bucket > avg_bucket
+            UNION ALL
+            SELECT tp.Energy_Category, si.Streams, 1
+            FROM StreamingInfo si
+            JOIN TrackProfile tp ON tp.Profile_ID = si.Info_ID
+            JOIN Totals
+                ON si.Streams > avg_streams AND si.Streams < (avg_bucket + 1) * {STREAMS_BUCKET}
+        )
+        SELECT
+            Energy_Category,
+            SUM(Streams_Sum) * 1.0 / SUM(Track_Count) AS avg_high_streams
+        FROM Above_Average
+        GROUP BY Energy_Category;
+        """
+    },
+
+    8: {
+        "description": "How Energy Levels Impact Platform Presence",
+        "Qinfo": """ 
+        -> Your wish is our command! This query examines the relationship 
+        between a track's energy category and its presence on different music 
+        platforms. By categorizing platform presence into single-platform and 
+        multi-platform exposure, and calculating average streams for each group, 
+        this analysis reveals how energy levels influence a track's distribution 
+        and success across platforms.
+        """,
+        "query": """
+        -- Energy_Category and Platform_Presence are stored at load time (see 3.2), so the
+        -- presence filter is a range scan on idx_info_presence
+        SELECT
+            Energy_Category, 
+            Platform_Presence, 
+            ROUND(AVG(Streams), 2) AS avg_streams, 
+            COUNT(DISTINCT Track_ID) AS unique_tracks 
+        FROM (
+            SELECT DISTINCT
+                t.Track_ID, 
+                tp.Energy_Category, 
+                si.Platform_Presence, 
+                si.Streams 
+            FROM
+                StreamingInfo si 
+            JOIN TrackProfile tp ON tp.Profile_ID = si.Info_ID 
+            JOIN Track t ON t.Track_ID = si.Info_ID 
+            JOIN Released_By rb ON rb.Track_ID = t.Track_ID 
+            WHERE
+                si.Platform_Presence IN ('Multi-Platform Presence', 'Single-Platform Presence')
+                AND {years:si} AND {years:tp}
+        ) AS filtered_tracks 
+        GROUP BY
+            Platform_Presence, Energy_Category 
+        ORDER BY
+            FIELD(Energy_Category, 'High Energy', 'Medium Energy', 'Low Energy'), 
+            Platform_Presence; 
+        """,
+        "summary_query": """
+        SELECT
+            Energy_Category,
+            Platform_Presence,
+            ROUND(Streams_Sum * 1.0 / Track_Count, 2) AS avg_streams,
+            Track_Count AS unique_tracks
+        FROM Energy_Platform_Summary
+        ORDER BY
+            FIELD(Energy_Category, 'High Energy', 'Medium Energy', 'Low Energy'),
+            Platform_Presence;
+        """
+    },
+
+    9: {
+        "description": " Most Seasonal Tracks",
+        "Qinfo": """ 
+        -> Analyze the release patterns for tracks that are most frequently streamed during 
+        specific months of the year. This can be extremely telling in terms of which months
+        produce the most seasonally-streamed tracks. Utilizing these stats, one can produce 
+        songs to have continuous relevance in designated months.
+        """,
+        "query": """
 			SELECT 
-                t.Track_Name, 
-                GROUP_CONCAT(DISTINCT rb.Artist_Name) AS Artists, 
-                MAX(si.Streams) AS Streams, 
-                CASE
-                    WHEN si.Spotify_Playlists > si.Apple_Playlists AND si.Spotify_Playlists > si.Deezer_Playlists THEN 'Spotify' 
-                    WHEN si.Apple_Playlists > si.Spotify_Playlists AND si.Apple_Playlists > si.Deezer_Playlists THEN 'Apple Music' 
-                    WHEN si.Deezer_Playlists > si.Spotify_Playlists AND si.Deezer_Playlists > si.Apple_Playlists THEN 'Deezer' 
-                    ELSE 'Tied' 
-                END AS Dominant_Platform 
-            FROM Track t -- Select data from the `Track` table as the base table.
-            JOIN Released_By rb ON t.Track_ID = rb.Track_ID 
-            JOIN StreamingInfo si ON t.Track_ID = si.Info_ID 
-            GROUP BY t.Track_Name, Dominant_Platform 
-            ORDER BY Streams DESC 
-            LIMIT 20; 
-            """,
-        }        
-    }
+            tp.Released_Month AS release_month, 
+            COUNT(t.Track_ID) AS track_count, 
+            ROUND(AVG(si.Streams), 2) AS avg_streams 
+        FROM 
+            Track t 
+        JOIN 
+            StreamingInfo si ON t.Track_ID = si.Info_ID 
+        JOIN 
+            TrackProfile tp ON t.Track_ID = tp.Profile_ID 
+        WHERE 
+            {years:si} AND {years:tp}
+        GROUP BY 
+            tp.Released_Month 
+        ORDER BY 
+            avg_streams DESC 
+        LIMIT %(top_n)s; 
+        """,
+        "summary_query": """
+        SELECT
+            Released_Month AS release_month,
+            Track_Count AS track_count,
+            ROUND(Streams_Sum * 1.0 / Track_Count, 2) AS avg_streams
+        FROM Month_Summary
+        ORDER BY avg_streams DESC
+        LIMIT %(top_n)s;
+        """,
+        "top_n": 12,
+    },
+ 
+    10: {
+        "description": "Tracks Dominating a Single Platform",
+        "Qinfo": """ 
+        -> Your wish is our command! This query identifies tracks that perform 
+        best on a single platform—Spotify, Apple Music, or Deezer—by comparing 
+        playlist presence. It highlights platform-specific dominance and 
+        streaming trends for top tracks.
+        """,
+        "query": """
+			SELECT 
+            t.Track_Name, 
+            GROUP_CONCAT(DISTINCT rb.Artist_Name) AS Artists, 
+            MAX(si.Streams) AS Streams, 
+            si.Dominant_Platform       -- stored at load time (see 3.2)
+        FROM Track t -- Select data from the `Track` table as the base table.
+        JOIN Released_By rb ON t.Track_ID = rb.Track_ID 
+        JOIN StreamingInfo si ON t.Track_ID = si.Info_ID 
+        WHERE {years:si}
+        GROUP BY t.Track_Name, si.Dominant_Platform 
+        ORDER BY Streams DESC 
+        LIMIT %(top_n)s; 
+        """,
+        "top_n": 20,
+    }        
+}
+
+
+def menu_query(entry):
+    """
+    Returns the (SQL, parameters) the menu runs for a QUERIES entry (see 4.13).
+    """
+    summary = entry.get("summary_query") if USE_SUMMARY_TABLES else None
+    # Most summaries roll every year up together; only one kept per year can take a window
+    if summary and (not YearWindow(YEAR_FROM, YEAR_TO) or "{years" in summary):
+        return query_statement(summary, entry)
+    return query_statement(entry["query"], entry)
+
+
+def main():
+    queries = QUERIES
 
 ##________________________________________________________________________
 # STEP 5: INTERFACE CODE, INTERACTING WITH USER
@@ -774,7 +4070,8 @@ def main():
             print(Fore.BLUE + f"\nExecuting: {query_description}\n" + Style.RESET_ALL)
 
             try:
-                execute_query(queries[int(choice)]["query"])
+                query, params = menu_query(queries[int(choice)])
+                execute_query(query, query_id=int(choice), params=params)
                 if queries[int(choice)]['Qinfo']:
                     print(Fore.YELLOW + queries[int(choice)]['Qinfo'] + Style.RESET_ALL)
                 else:
@@ -790,5 +4087,304 @@ def main():
             print(Fore.RED + "Invalid choice. Please try again!" + Style.RESET_ALL)
 
 
+##________________________________________________________________________
+# STEP 6: COMMAND LINE
+#
+#   python project_final.py                  clean, create and load, then the interactive menu
+#   python project_final.py clean            STEP 1 only
+#   python project_final.py load             create the tables and load CLEANED_CSV
+#   python project_final.py derive --energy-low 25 --energy-high 75   re-bucket a loaded database
+#   python project_final.py load --partition-by-year   year-partitioned tables (see 3.3)
+#   python project_final.py query 3 --format json --year-from 2020 --top 25
+#   python project_final.py archive --before 2000   move the older years out of the live tables
+#   python project_final.py menu             the interactive menu over the loaded database
+#   python project_final.py report --output daily.html   every query at once into one file
+#   python project_final.py sql "SELECT * FROM Track" --format jsonl --output tracks.jsonl
+#   python project_final.py bench queries --scales 1,10   (arguments go to bench_queries.py)
+
+BENCHMARKS = ["queries", "cleaning", "analytics"]
+
+def json_value(value):
+    """
+    json.dump() fallback for the DECIMAL and DATE values drivers return.
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def render_results(results, output_format, out=None):
+    """
+    Writes [(columns, rows)] as a fancy_grid table, a JSON array of row objects or CSV.
+    """
+    out = out or sys.stdout
+    for columns, rows in results:
+        if output_format == "json":
+            json.dump([dict(zip(columns, row)) for row in rows], out, default=json_value)
+            out.write("\n")
+        elif output_format == "csv":
+            writer = csv.writer(out)
+            writer.writerow(columns)
+            writer.writerows(rows)
+        elif rows:
+            out.write(tabulate(rows, headers=columns, tablefmt="fancy_grid") + "\n")
+        else:
+            out.write("Query executed successfully but returned no results.\n")
+
+
+def run_query_command(args):
+    """
+    Prints one menu query. For json/csv, progress messages go to stderr so stdout stays parseable.
+    """
+    entry = QUERIES.get(args.query_id)
+    if entry is None:
+        print(f"Unknown query {args.query_id}; choose one of {', '.join(map(str, QUERIES))}.", file=sys.stderr)
+        return 2
+    global ANIMATION
+    if args.format != "table":
+        ANIMATION = False
+    out = sys.stdout
+    progress = sys.stderr if args.format != "table" else sys.stdout
+    profile = QueryProfile(args.query_id, *menu_query(entry))
+    try:
+        with contextlib.redirect_stdout(progress):
+            results = fetch_results(profile.query, query_id=args.query_id, profile=profile, params=profile.params)
+    except (Error, OSError, KeyError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    with profile.phase("render"):
+        render_results(results, args.format, out)
+    with contextlib.redirect_stdout(progress):
+        record_profile(profile)
+    return 0
+
+
+def run_report_command(args):
+    """
+    Runs the report, writes the artifact and prints one status line per query.
+    """
+    report, wall_seconds = run_report(workers=args.workers, timeout=args.timeout)
+    path = write_report(report, wall_seconds, args.output)
+    print(tabulate([[entry["id"], entry["status"], entry["seconds"] * 1000, len(entry["rows"])] for entry in report],
+                   headers=["Query", "Status", "ms", "Rows"], tablefmt="fancy_grid"))
+    total = sum(entry["seconds"] for entry in report)
+    print(f"Report written to {path}: {wall_seconds:.2f}s wall clock for {total:.2f}s of queries.")
+    return 0 if all(entry["status"] == "ok" for entry in report) else 1
+
+
+def run_sql_command(args):
+    """
+    Streams an ad-hoc SELECT: paged tables in the terminal, or CSV / JSON lines to stdout or --output.
+    """
+    out = open(args.output, mode='w', encoding='utf-8', newline='') if args.output else sys.stdout
+    progress = sys.stdout if args.format == "table" and not args.output else sys.stderr
+    profile = QueryProfile(query=args.statement)
+    try:
+        with contextlib.redirect_stdout(progress), \
+                ResultStream(args.statement, batch_size=args.batch_size, profile=profile) as stream:
+            if args.format == "table":
+                count = page_stream(stream, args.page_size, out, interactive=False if args.output else None)
+            else:
+                count = export_stream(stream, args.format, out)
+    except (Error, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.output:
+            out.close()
+    with contextlib.redirect_stdout(progress):
+        record_profile(profile)
+    if args.output:
+        print(f"{count} rows written to {args.output}", file=sys.stderr)
+    return 0
+
+
+def run_bench_command(args):
+    """
+    Runs one of the bench_*.py scripts with the remaining arguments.
+    """
+    bench = importlib.import_module(f"bench_{args.benchmark}")
+    sys.argv = [f"bench_{args.benchmark}.py", *args.bench_args]
+    bench.main()
+    return 0
+
+
+def parse_args(argv=None):
+    # Shared options are accepted before or after the command; SUPPRESS keeps a
+    # subcommand from resetting a value given before it
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--no-animation", action="store_true", default=argparse.SUPPRESS,
+                        help="skip the loading animations")
+    common.add_argument("--backend", choices=["mysql", *EMBEDDED_BACKENDS], default=argparse.SUPPRESS)
+    common.add_argument("--database", default=argparse.SUPPRESS, help=f"database name (default {DB_NAME})")
+    common.add_argument("--user", default=argparse.SUPPRESS)
+    common.add_argument("--password", default=argparse.SUPPRESS)
+    common.add_argument("--energy-low", type=int, default=argparse.SUPPRESS,
+                        help=f"Energy below this is 'Low Energy' (default {ENERGY_LOW}; loads keep the "
+                             "thresholds stored in the database, derive changes them, see 3.2)")
+    common.add_argument("--energy-high", type=int, default=argparse.SUPPRESS,
+                        help=f"Energy above this is 'High Energy' (default {ENERGY_HIGH})")
+    common.add_argument("--year-from", type=int, default=argparse.SUPPRESS,
+                        help="only tracks released in or after this year (see 3.3)")
+    common.add_argument("--year-to", type=int, default=argparse.SUPPRESS,
+                        help="only tracks released in or before this year")
+    common.add_argument("--top", type=int, default=argparse.SUPPRESS, metavar="N",
+                        help="rows returned by the top-N queries (default: each query's own, see 4.13)")
+    common.add_argument("--liveliness", type=int, default=argparse.SUPPRESS,
+                        help=f"query 5 liveliness threshold (default {LIVELINESS_THRESHOLD})")
+
+    profiling = argparse.ArgumentParser(add_help=False)
+    profiling.add_argument("--profile", action="store_true", help="print per-phase timings (see 4.10)")
+    profiling.add_argument("--explain", action="store_true", help="capture EXPLAIN ANALYZE with each profile")
+    profiling.add_argument("--log", metavar="FILE", help="append every profile to this JSON-lines file")
+    profiling.add_argument("--metrics", metavar="FILE", help="keep Prometheus counters in this text file")
+
+    parser = argparse.ArgumentParser(description="Spotify database: cleaning, loading and analytics queries.",
+                                     parents=[common])
+    commands = parser.add_subparsers(dest="command")
+
+    clean = commands.add_parser("clean", parents=[common], help="run STEP 1 on the source CSV")
+    clean.add_argument("--source", default=SOURCE_CSV, help="raw CSV")
+    clean.add_argument("--output", default=CLEANED_CSV, help="cleaned CSV written")
+    clean.add_argument("--no-cache", action="store_true", help="ignore the cleaned-data cache (see 1.8)")
+    clean.add_argument("--near-duplicates", action="store_true",
+                       help="also merge near-duplicate names (see 1.5); needs an --output other than --source")
+
+    load = commands.add_parser("load", parents=[common], help="create the tables and load the cleaned CSV")
+    load.add_argument("--csv", default=CLEANED_CSV, help="cleaned CSV (the raw CSV with --streaming)")
+    load.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    load.add_argument("--processes", type=int, default=LOAD_PROCESSES, help="worker processes (see 4.5)")
+    mode = load.add_mutually_exclusive_group()
+    mode.add_argument("--streaming", action="store_true", help="clean and load the raw CSV in chunks")
+    mode.add_argument("--incremental", action="store_true", help="merge into the loaded tables (see 4.7)")
+    mode.add_argument("--resume", action="store_true", help="continue an interrupted load (see 4.6)")
+    load.add_argument("--force", action="store_true", help="load the CSV again even if it was loaded completely")
+    load.add_argument("--partition-by-year", action="store_true", default=PARTITION_BY_YEAR,
+                      help="RANGE-partition TrackProfile and StreamingInfo on Released_Year (MySQL, see 3.3)")
+
+    commands.add_parser("derive", parents=[common],
+                        help="recompute the derived columns and summaries with --energy-low/--energy-high")
+
+    index = commands.add_parser("index", parents=[common], help="add the workload indexes to a loaded database")
+    index.add_argument("--no-explain", action="store_true", help="skip the query plans printed before and after")
+
+    commands.add_parser("summaries", parents=[common],
+                        help="create and fill the summary tables of a database loaded before they existed")
+
+    archive = commands.add_parser("archive", parents=[common], help="move old years into archive tables")
+    archive.add_argument("--before", type=int, required=True, metavar="YEAR",
+                         help="archive the tracks released before this year")
+
+    query = commands.add_parser("query", parents=[common, profiling], help="print one menu query")
+    query.add_argument("query_id", type=int, metavar="N")
+    query.add_argument("--format", choices=["table", "json", "csv"], default="table")
+    query.add_argument("--engine", choices=["sql", "pandas"], default=QUERY_ENGINE,
+                       help="answer from the database or from the cleaned CSV in memory (see 4.9)")
+    query.add_argument("--csv", default=CLEANED_CSV, help="cleaned CSV read by --engine pandas")
+
+    commands.add_parser("menu", parents=[common, profiling], help="interactive menu over the loaded database")
+
+    report = commands.add_parser("report", parents=[common, profiling], help="run every menu query concurrently")
+    report.add_argument("--output", default=REPORT_FILE, help="report file: .html, .json or .csv")
+    report.add_argument("--workers", type=int, default=REPORT_WORKERS, help="queries running at once")
+    report.add_argument("--timeout", type=float, default=REPORT_TIMEOUT, help="seconds per query")
+    report.add_argument("--engine", choices=["sql", "pandas"], default=QUERY_ENGINE)
+    report.add_argument("--csv", default=CLEANED_CSV, help="cleaned CSV read by --engine pandas")
+
+    sql = commands.add_parser("sql", parents=[common, profiling], help="stream the rows of an ad-hoc SELECT")
+    sql.add_argument("statement", help="one SELECT statement")
+    sql.add_argument("--format", choices=["table", "csv", "jsonl"], default="table")
+    sql.add_argument("--output", help="write to this file instead of stdout")
+    sql.add_argument("--page-size", type=int, default=PAGE_SIZE, help="rows per table page")
+    sql.add_argument("--batch-size", type=int, default=STREAM_BATCH, help="rows per fetchmany() call")
+
+    bench = commands.add_parser("bench", help="run a bench_*.py script")
+    bench.add_argument("benchmark", choices=BENCHMARKS)
+    bench.add_argument("bench_args", nargs=argparse.REMAINDER, help="arguments for the benchmark script")
+    return parser.parse_args(argv)
+
+
+def cli(argv=None):
+    """
+    Entry point: only the requested stage runs, and pandas/numpy are only imported if it needs them.
+    """
+    global ANIMATION, BACKEND, DB_NAME, user, password, SOURCE_CSV, CLEANED_CSV, BATCH_SIZE, LOAD_PROCESSES
+    global NEAR_DUPLICATE_REPORT
+    global STREAMING, INCREMENTAL, RESUME, FORCE_LOAD, QUERY_ENGINE
+    global PROFILE_QUERIES, EXPLAIN_ANALYZE, QUERY_LOG, METRICS_FILE, ENERGY_LOW, ENERGY_HIGH, ENERGY_THRESHOLDS_GIVEN
+    global PARTITION_BY_YEAR, YEAR_FROM, YEAR_TO, TOP_N, LIVELINESS_THRESHOLD
+    args = parse_args(argv)
+    ANIMATION = ANIMATION and not getattr(args, "no_animation", False)
+    BACKEND = getattr(args, "backend", BACKEND)
+    DB_NAME = getattr(args, "database", DB_NAME)
+    user = getattr(args, "user", user)
+    password = getattr(args, "password", password)
+    ENERGY_LOW = getattr(args, "energy_low", ENERGY_LOW)
+    ENERGY_HIGH = getattr(args, "energy_high", ENERGY_HIGH)
+    ENERGY_THRESHOLDS_GIVEN = hasattr(args, "energy_low") or hasattr(args, "energy_high")
+    YEAR_FROM = getattr(args, "year_from", YEAR_FROM)
+    YEAR_TO = getattr(args, "year_to", YEAR_TO)
+    TOP_N = getattr(args, "top", TOP_N)
+    LIVELINESS_THRESHOLD = getattr(args, "liveliness", LIVELINESS_THRESHOLD)
+    if args.command in ("query", "menu", "report", "sql"):
+        PROFILE_QUERIES = PROFILE_QUERIES or args.profile
+        EXPLAIN_ANALYZE = EXPLAIN_ANALYZE or args.explain
+        QUERY_LOG = args.log or QUERY_LOG
+        METRICS_FILE = args.metrics or METRICS_FILE
+
+    if args.command == "clean":
+        SOURCE_CSV, CLEANED_CSV = args.source, args.output
+        stages = CLEANING_STAGES
+        if args.near_duplicates:
+            if os.path.abspath(SOURCE_CSV) == os.path.abspath(CLEANED_CSV):
+                print("Error: --near-duplicates needs an --output other than the source, "
+                      "cleaning its own output again would merge more rows every time.")
+                return 1
+            stages = CLEANING_STAGES + [NEAR_DUPLICATE_STAGE]
+            NEAR_DUPLICATE_REPORT = os.path.join(os.path.dirname(os.path.abspath(CLEANED_CSV)),
+                                                 os.path.basename(NEAR_DUPLICATE_REPORT))
+        run_cleaning(SOURCE_CSV, output_path=CLEANED_CSV, stages=stages, use_cache=not args.no_cache)
+    elif args.command == "load":
+        CLEANED_CSV, BATCH_SIZE, LOAD_PROCESSES = args.csv, args.batch_size, args.processes
+        STREAMING, INCREMENTAL, RESUME = args.streaming, args.incremental, args.resume
+        FORCE_LOAD = args.force
+        PARTITION_BY_YEAR = args.partition_by_year
+        if INCREMENTAL:
+            incremental_dataload(user=user, passwd=password, csv_file=CLEANED_CSV, batch_size=BATCH_SIZE)
+        else:
+            setup_database(user=user, password=password, csv_file=CLEANED_CSV, streaming=STREAMING, resume=RESUME,
+                           force=FORCE_LOAD)
+    elif args.command == "derive":
+        refresh_derived_columns(user=user, passwd=password)
+    elif args.command == "index":
+        add_indexes(user=user, passw=password, show_explain=not args.no_explain)
+    elif args.command == "summaries":
+        build_summaries(user=user, passwd=password)
+    elif args.command == "archive":
+        archive_years(user=user, passwd=password, before_year=args.before)
+    elif args.command == "query":
+        QUERY_ENGINE, CLEANED_CSV = args.engine, args.csv
+        return run_query_command(args)
+    elif args.command == "menu":
+        main()
+    elif args.command == "report":
+        QUERY_ENGINE, CLEANED_CSV = args.engine, args.csv
+        return run_report_command(args)
+    elif args.command == "sql":
+        return run_sql_command(args)
+    elif args.command == "bench":
+        return run_bench_command(args)
+    else:
+        if STREAMING:
+            setup_database(user=user, password=password, csv_file=SOURCE_CSV, streaming=True)
+        else:
+            run_cleaning(SOURCE_CSV, output_path=CLEANED_CSV)
+            setup_database(user=user, password=password, csv_file=CLEANED_CSV)
+        main()
+    return 0
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(cli())
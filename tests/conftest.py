@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+import project_final as pf
+
+
+@pytest.fixture(scope="session")
+def cleaned_csv(tmp_path_factory):
+    """
+    The bundled Spotify.csv after STEP 1, written once for the whole session.
+    """
+    csv_file = str(tmp_path_factory.mktemp("cleaned") / "clean.csv")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(pf, "USE_CLEANED_CACHE", False)
+        np.random.seed(0)
+        pf.run_cleaning("Spotify.csv", output_path=csv_file, use_cache=False)
+    return csv_file
+
+
+@pytest.fixture
+def sqlite_database(tmp_path, monkeypatch):
+    """
+    Points project_final at an empty SQLite database and result cache under tmp_path.
+    """
+    monkeypatch.setattr(pf, "BACKEND", "sqlite")
+    monkeypatch.setattr(pf, "DB_NAME", str(tmp_path / "Spotify"))
+    monkeypatch.setattr(pf, "ANIMATION", False)
+    monkeypatch.setattr(pf, "USE_CLEANED_CACHE", False)
+    monkeypatch.setattr(pf, "YEAR_FROM", None)
+    monkeypatch.setattr(pf, "YEAR_TO", None)
+    monkeypatch.setattr(pf, "query_cache", pf.QueryCache(cache_dir=str(tmp_path / "query_cache")))
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    pf.EMBEDDED_BACKENDS["sqlite"].drop_database()
@@ -0,0 +1,87 @@
+import math
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+import project_final as pf
+
+# Column holding the ORDER BY value of the queries that end in LIMIT; rows tied on it at the
+# cut-off may legitimately differ between engines, so only the rows above it are compared
+LIMITED_QUERIES = {2: 2, 3: 2, 4: 2, 6: 1, 9: 2, 10: 2}
+ARTIST_COLUMNS = {"artist_name", "Artists"}
+
+
+def normalize(columns, row):
+    """
+    Makes one result row comparable across engines: numbers become floats and
+    GROUP_CONCAT lists become sets, since their order is up to the engine.
+    """
+    values = []
+    for column, value in zip(columns, row):
+        if column in ARTIST_COLUMNS and value is not None:
+            value = frozenset(value.split(','))
+        elif isinstance(value, (int, float, Decimal, np.number)):
+            value = float(value)
+        values.append(value)
+    return values
+
+
+def same_row(a, b):
+    return len(a) == len(b) and all(
+        math.isclose(x, y, rel_tol=1e-9, abs_tol=0.01) if isinstance(x, float) and isinstance(y, float) else x == y
+        for x, y in zip(a, b)
+    )
+
+
+def same_rows(expected, actual):
+    """
+    True when both lists hold the same rows in any order.
+    """
+    remaining = list(expected)
+    for row in actual:
+        match = next((i for i, candidate in enumerate(remaining) if same_row(candidate, row)), None)
+        if match is None:
+            return False
+        remaining.pop(match)
+    return not remaining
+
+
+@pytest.fixture(scope="module")
+def loaded(tmp_path_factory, cleaned_csv):
+    """
+    Loads the cleaned Spotify.csv into a scratch SQLite database.
+    """
+    tmp_path = tmp_path_factory.mktemp("analytics")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(pf, "BACKEND", "sqlite")
+        patch.setattr(pf, "DB_NAME", str(tmp_path / "Spotify"))
+        patch.setattr(pf, "CLEANED_CSV", cleaned_csv)
+        patch.setattr(pf, "ANIMATION", False)
+        patch.setattr(pf, "USE_CLEANED_CACHE", False)
+        patch.setattr(pf, "YEAR_FROM", None)
+        patch.setattr(pf, "YEAR_TO", None)
+        assert pf.setup_database(pf.user, pf.password, cleaned_csv) is not None
+        yield pf.analytics_engine(cleaned_csv)
+        pf.EMBEDDED_BACKENDS["sqlite"].drop_database()
+
+
+@pytest.mark.parametrize("query_id", sorted(pf.QUERIES))
+def test_engine_matches_sql(loaded, query_id):
+    [(columns, engine_rows)] = loaded.run(query_id, top_n=pf.TOP_N, liveliness=pf.LIVELINESS_THRESHOLD)
+    query, params = pf.menu_query(pf.QUERIES[query_id])
+    [(_, sql_rows)] = pf.fetch_query(query, params=params)
+
+    expected = [normalize(columns, row) for row in sql_rows]
+    actual = [normalize(columns, row) for row in engine_rows]
+    assert len(actual) == len(expected)
+    if query_id not in LIMITED_QUERIES:
+        assert same_rows(expected, actual)
+        return
+
+    order = LIMITED_QUERIES[query_id]
+    assert same_row([row[order] for row in expected], [row[order] for row in actual])
+    if expected:
+        cutoff = expected[-1][order]
+        above = lambda rows: [row for row in rows if row[order] > cutoff]
+        assert same_rows(above(expected), above(actual))
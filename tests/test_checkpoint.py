@@ -0,0 +1,28 @@
+import project_final as pf
+
+
+def track_count():
+    connection = pf.get_connection(pf.user, pf.password)
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*), COUNT(DISTINCT Track_Name) FROM Track")
+        return cursor.fetchone()
+    finally:
+        connection.close()
+
+
+def test_finished_load_is_not_repeated(sqlite_database, cleaned_csv):
+    loaded, _ = pf.setup_database(pf.user, pf.password, cleaned_csv)
+    counts = track_count()
+    assert counts[0] == loaded
+
+    assert pf.setup_database(pf.user, pf.password, cleaned_csv)[0] == 0
+    assert track_count() == counts
+
+
+def test_forced_load_runs_again(sqlite_database, cleaned_csv):
+    pf.setup_database(pf.user, pf.password, cleaned_csv)
+    rows, distinct = track_count()
+
+    assert pf.setup_database(pf.user, pf.password, cleaned_csv, force=True)[0] == rows
+    assert track_count() == (2 * rows, distinct)
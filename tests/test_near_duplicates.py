@@ -0,0 +1,48 @@
+import pandas as pd
+
+import project_final as pf
+
+
+def clusters(rows):
+    df = pd.DataFrame(rows, columns=['track_name', 'artist(s)_name'])
+    return list(pf.near_duplicate_clusters(*pf.fuzzy_names(df)))
+
+
+def test_same_artist_different_titles_stay_apart():
+    labels = clusters([
+        ("Amor", "Ana Mena"),
+        ("Amor Amor", "Ana Mena"),
+        ("Money Tattoo Sunflower", "Post Malone"),
+        ("Dance Tattoo Sunflower", "Post Malone"),
+        ("Wild Bill", "SZA"),
+        ("Bill Wild", "SZA"),
+    ])
+    assert len(set(labels)) == 6
+
+
+def test_same_title_different_artists_stay_apart():
+    labels = clusters([("Flowers", "Miley Cyrus"), ("Flowers", "Lauren Spencer Smith")])
+    assert labels[0] != labels[1]
+
+
+def test_variants_of_one_song_merge():
+    labels = clusters([
+        ("Snow On The Beach (feat. Lana Del Rey)", "Taylor Swift, Lana Del Rey"),
+        ("Snow On The Beach (feat. More Lana Del Rey)", "Lana Del Rey, Taylor Swift"),
+        ("Kill Bill", "SZA"),
+        ("Kill  Bill!", "sza"),
+        ("Tattoo Sunflowers", "Post Malone"),
+        ("Tattoo Sunflower", "Post Malone"),
+    ])
+    assert labels[0] == labels[1] and labels[2] == labels[3] and labels[4] == labels[5]
+    assert len(set(labels)) == 3
+
+
+def test_drop_near_duplicates_keeps_the_most_streamed(tmp_path, monkeypatch):
+    monkeypatch.setattr(pf, "NEAR_DUPLICATE_REPORT", str(tmp_path / "near_duplicates.csv"))
+    df = pd.DataFrame({
+        'track_name': ["Tattoo Sunflower", "Tattoo Sunflowers", "Money Tattoo Sunflower"],
+        'artist(s)_name': ["Post Malone", "Post Malone", "Post Malone"],
+        'streams': [10, 20, 30],
+    })
+    assert pf.drop_near_duplicates(df)['streams'].tolist() == [20, 30]
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+from mysql.connector import errors
+
+import project_final as pf
+
+
+@pytest.fixture
+def source_csv(sqlite_database, cleaned_csv):
+    """
+    The cleaned CSV with one row the loader must quarantine in every partition's range.
+    """
+    with open(cleaned_csv, encoding='utf-8') as file:
+        lines = file.readlines()
+    for position in (len(lines) * 3 // 4, len(lines) // 4):
+        lines.insert(position, "short,row\n")
+    path = sqlite_database / "source.csv"
+    path.write_text("".join(lines), encoding='utf-8')
+    return str(path)
+
+
+def table_state():
+    connection = pf.get_connection(pf.user, pf.password)
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*), COUNT(DISTINCT Track_Name) FROM Track")
+        tracks = cursor.fetchone()
+        cursor.execute("SELECT COUNT(*) FROM Track t JOIN StreamingInfo s ON s.Info_ID = t.Track_ID "
+                       "JOIN TrackProfile p ON p.Profile_ID = t.Track_ID")
+        return tracks, cursor.fetchone()[0]
+    finally:
+        connection.close()
+
+
+def crash_on_batch(monkeypatch, number):
+    """
+    Makes the number-th batch the loader writes fail like a dropped connection.
+    """
+    flush = pf.flush_executemany
+    calls = []
+
+    def crashing(cursor, batch):
+        calls.append(None)
+        if len(calls) == number:
+            raise errors.OperationalError(msg="Lost connection to MySQL server during query")
+        return flush(cursor, batch)
+
+    monkeypatch.setattr(pf, "flush_executemany", crashing)
+    return flush
+
+
+def test_failed_partition_resumes_without_duplicates(source_csv, monkeypatch):
+    monkeypatch.setattr(pf, "LOAD_PROCESSES", 3)
+    monkeypatch.setattr(pf, "BATCH_SIZE", 50)
+    flush = crash_on_batch(monkeypatch, 9)
+    assert pf.setup_database(pf.user, pf.password, source_csv) is None
+    monkeypatch.setattr(pf, "flush_executemany", flush)
+    assert pf.setup_database(pf.user, pf.password, source_csv, resume=True) is not None
+
+    (rows, distinct), joined = table_state()
+    assert rows == joined == 948
+    assert pf.setup_database(pf.user, pf.password, source_csv)[0] == 0
+    assert table_state() == ((rows, distinct), joined)
+
+    with open(pf.QUARANTINE_FILE, encoding='utf-8') as file:
+        rejected = file.read().splitlines()
+    assert rejected[0].startswith("rejected_because,")
+    assert len(rejected) == 3 and all("short,row" in line for line in rejected[1:])
+    assert not [name for name in os.listdir(".") if ".part" in name]
+
+
+def test_resume_needs_the_same_partitions(source_csv, monkeypatch):
+    monkeypatch.setattr(pf, "LOAD_PROCESSES", 3)
+    monkeypatch.setattr(pf, "BATCH_SIZE", 50)
+    flush = crash_on_batch(monkeypatch, 9)
+    assert pf.setup_database(pf.user, pf.password, source_csv) is None
+    monkeypatch.setattr(pf, "flush_executemany", flush)
+    state = table_state()
+
+    assert pf.parallel_dataload(pf.user, pf.password, source_csv, processes=2, resume=True) is None
+    assert table_state() == state
+    assert pf.parallel_dataload(pf.user, pf.password, source_csv, processes=3, resume=True) is not None
+    assert pf.parallel_dataload(pf.user, pf.password, source_csv, processes=2)[0] == 0
+    assert table_state()[1] == 948
@@ -0,0 +1,48 @@
+import project_final as pf
+
+
+def rebuild(csv_file):
+    pf.EMBEDDED_BACKENDS["sqlite"].drop_database()
+    pf.createdb(pf.user, pf.password)
+    pf.creattables(pf.user, pf.password)
+    assert pf.bulk_dataload(pf.user, pf.password, csv_file) is not None
+
+
+def run_query(query_id):
+    query, params = pf.menu_query(pf.QUERIES[query_id])
+    profile = pf.QueryProfile(query_id, query, params)
+    return pf.fetch_results(query, query_id, profile, quiet=True, params=params), profile.source
+
+
+def test_rebuilt_database_misses_the_cache(sqlite_database, cleaned_csv):
+    with open(cleaned_csv, encoding='utf-8') as file:
+        head = [next(file) for _ in range(101)]
+    small_csv = sqlite_database / "small.csv"
+    small_csv.write_text("".join(head), encoding='utf-8')
+
+    rebuild(cleaned_csv)
+    full, source = run_query(9)
+    assert source == "sql"
+    assert run_query(9) == (full, "cache")
+
+    # Dropped and built again, the database starts over at the same load generation
+    rebuild(str(small_csv))
+    pf.query_cache = pf.QueryCache(cache_dir=pf.query_cache.cache_dir)
+    results, source = run_query(9)
+    assert source == "sql"
+    assert results != full
+    query, params = pf.menu_query(pf.QUERIES[9])
+    assert results == pf.fetch_query(query, params=params)
+
+
+def test_load_bumps_the_generation(sqlite_database, cleaned_csv):
+    rebuild(cleaned_csv)
+    connection = pf.get_connection(pf.user, pf.password)
+    try:
+        cursor = connection.cursor()
+        token, generation = pf.dataset_version(cursor).split(".")
+        pf.bump_dataset_version(cursor)
+        connection.commit()
+        assert pf.dataset_version(cursor) == f"{token}.{int(generation) + 1}"
+    finally:
+        connection.close()